@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark of the Emotes lookup tables.
+
+Run from the repository root:
+    python -m benchmarks.assets_lookup
+"""
+import timeit
+
+from modules.Assets import Emotes
+
+NUMBER = 200_000
+
+
+def legacy_champion_get(id):
+    """Champions.get as it was before the tables were built at import: one dict literal per call."""
+    map = {str(key): value for key, value in Emotes.Lol.Champions._by_id.items()}
+    return map.get(str(id), Emotes.Lol.Champions.NONE)
+
+
+CASES = {
+    "Champions.get (legacy dict per call)": lambda: legacy_champion_get(143),
+    "Champions.get": lambda: Emotes.Lol.Champions.get(143),
+    "Runes.Perks.Get": lambda: Emotes.Lol.Runes.Perks.Get(9923),
+    "Runes.Styles.Get": lambda: Emotes.Lol.Runes.Styles.Get(8400),
+    "SummonerSpells.get": lambda: Emotes.Lol.SummonerSpells.get(55),
+    "Tier.get": lambda: Emotes.Lol.Tier.get("CHALLENGER"),
+    "Rank.get": lambda: Emotes.Lol.Rank.get("IV"),
+    "Positions.get": lambda: Emotes.Lol.Positions.get("FILL"),
+}
+
+
+if __name__ == "__main__":
+    for name, case in CASES.items():
+        number = NUMBER // 100 if "legacy" in name else NUMBER
+        best = min(timeit.repeat(case, number=number, repeat=5))
+        print(f"{name:<40} {best / number * 1e9:>10.1f} ns/lookup")
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark of the /champion autocompletion and validation.
+
+Run from the repository root:
+    python -m benchmarks.champion_search
+"""
+import re
+import timeit
+
+from cogs.Lol.search import ChampionIndex
+from modules.Assets import Emotes
+
+NUMBER = 20_000
+
+# The emote names are the champion names without their spaces and punctuation, close enough to time the lookups.
+NAMES = [re.match(r"<:(\w+):", emote).group(1) for emote in Emotes.Lol.Champions._by_id.values()]
+NAMES += ["Kha'Zix", "Miss Fortune", "Nunu & Willump", "Dr. Mundo", "Jarvan IV"]
+INDEX = ChampionIndex(NAMES)
+
+
+def legacy_complete(user_input: str):
+    """Lol.autocomp_championt as it was: a lowercase scan of every name on each keystroke."""
+    champions = []
+    for champion in NAMES:
+        if champion.lower().startswith(user_input.lower()):
+            champions.append(champion)
+    return champions[:25]
+
+
+CASES = {
+    "complete 'a' (legacy scan)": lambda: legacy_complete("a"),
+    "complete 'a'": lambda: INDEX.complete("a"),
+    "complete 'kha' (legacy scan)": lambda: legacy_complete("kha"),
+    "complete 'kha'": lambda: INDEX.complete("kha"),
+    "complete 'mf' (alias)": lambda: INDEX.complete("mf"),
+    "complete 'Kayzix' (fuzzy)": lambda: INDEX.complete("Kayzix"),
+    "validate 'Miss Fortune' (legacy scan)": lambda: "Miss Fortune" in NAMES,
+    "validate 'Miss Fortune'": lambda: INDEX.resolve("Miss Fortune"),
+    "validate 'miss-fortune'": lambda: INDEX.resolve("miss-fortune"),
+}
+
+
+if __name__ == "__main__":
+    for name, case in CASES.items():
+        number = NUMBER // 20 if "fuzzy" in name else NUMBER
+        best = min(timeit.repeat(case, number=number, repeat=5))
+        print(f"{name:<40} {best / number * 1e6:>10.2f} µs/call")
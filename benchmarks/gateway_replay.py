@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Replay of synthetic gateway events through the connection state of the bot, with all the intents and in lean mode.
+
+Discord only sends the events of the requested intents, so both modes are offered the same seeded stream and each
+parses the events of its intents. Each mode runs in its own process so their resident memory can be compared.
+The lean mode fails if its intents miss one declared by a cog, or if a cog can not be imported.
+
+Run from the repository root:
+    python -m benchmarks.gateway_replay
+"""
+import asyncio
+import importlib
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+GUILDS = 10
+MEMBERS = 2_000  # per guild
+EVENTS = 200_000
+SEED = 0
+
+# Share of each event in the stream, with the intent Discord requires to send it.
+MIX = {
+    "PRESENCE_UPDATE": (60, "presences"),
+    "MESSAGE_CREATE": (15, "guild_messages"),
+    "TYPING_START": (10, "guild_typing"),
+    "GUILD_MEMBER_UPDATE": (10, "members"),
+    "VOICE_STATE_UPDATE": (5, "voice_states"),
+}
+JOINED_AT = "2022-01-01T00:00:00.000000+00:00"
+BOT_ID = 1
+TIMESTAMP = 1_650_000_000
+
+
+def guild_id(guild: int) -> str:
+    return str(100_000 + guild)
+
+
+def channel_id(guild: int) -> str:
+    return str(200_000 + guild)
+
+
+def user(member: int) -> dict:
+    return {"id": str(1_000_000 + member), "username": f"Poro{member}", "discriminator": "0001", "avatar": None}
+
+
+def member(member: int) -> dict:
+    return {"user": user(member), "roles": [], "joined_at": JOINED_AT, "deaf": False, "mute": False}
+
+
+def guild_create(guild: int, members: bool) -> dict:
+    return {
+        "id": guild_id(guild),
+        "name": f"Guild {guild}",
+        "owner_id": str(BOT_ID),
+        "unavailable": False,
+        "large": MEMBERS > 250,
+        "member_count": MEMBERS,
+        "roles": [
+            {
+                "id": guild_id(guild),
+                "name": "@everyone",
+                "permissions": "0",
+                "position": 0,
+                "color": 0,
+                "hoist": False,
+                "managed": False,
+                "mentionable": False,
+            }
+        ],
+        "channels": [
+            {"id": channel_id(guild), "type": 0, "name": "general", "position": 0, "permission_overwrites": []},
+            {"id": str(300_000 + guild), "type": 2, "name": "Vocal", "position": 1, "permission_overwrites": []},
+        ],
+        # With the members intent, the members arrive in GUILD_CREATE or through the chunks requested after it.
+        "members": [member(i) for i in range(MEMBERS)] if members else [],
+        "presences": [],
+        "voice_states": [],
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+        "threads": [],
+        "stage_instances": [],
+        "guild_scheduled_events": [],
+    }
+
+
+def event(name: str, guild: int, id: int, rng: random.Random) -> dict:
+    m = rng.randrange(MEMBERS)
+    if name == "PRESENCE_UPDATE":
+        status = rng.choice(("online", "idle", "dnd"))
+        return {
+            "user": {"id": user(m)["id"]},
+            "guild_id": guild_id(guild),
+            "status": status,
+            "activities": [{"name": "League of Legends", "type": 0, "created_at": TIMESTAMP * 1000}],
+            "client_status": {"desktop": status},
+        }
+    if name == "MESSAGE_CREATE":
+        return {
+            "id": str(10_000_000 + id),
+            "channel_id": channel_id(guild),
+            "guild_id": guild_id(guild),
+            "author": user(m),
+            "member": {"roles": [], "joined_at": JOINED_AT, "deaf": False, "mute": False},
+            "content": "gg ez",
+            "timestamp": JOINED_AT,
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+        }
+    if name == "TYPING_START":
+        return {
+            "channel_id": channel_id(guild),
+            "guild_id": guild_id(guild),
+            "user_id": user(m)["id"],
+            "timestamp": TIMESTAMP,
+            "member": member(m),
+        }
+    if name == "GUILD_MEMBER_UPDATE":
+        return {**member(m), "guild_id": guild_id(guild), "nick": f"Poro {id}"}
+    return {
+        **member(m),
+        "guild_id": guild_id(guild),
+        "channel_id": str(300_000 + guild) if rng.random() < 0.5 else None,
+        "user_id": user(m)["id"],
+        "session_id": str(id),
+        "self_deaf": False,
+        "self_mute": False,
+        "self_video": False,
+        "suppress": False,
+        "request_to_speak_timestamp": None,
+    }
+
+
+def stream() -> Iterator[Tuple[str, str, dict]]:
+    """(event, required intent, payload) of the seeded event stream."""
+    rng = random.Random(SEED)
+    names = list(MIX)
+    weights = [MIX[name][0] for name in names]
+    for id, name in enumerate(rng.choices(names, weights, k=EVENTS)):
+        yield name, MIX[name][1], event(name, rng.randrange(GUILDS), id, rng)
+
+
+def check_intents(intents) -> None:
+    import disnake
+
+    for extension in os.listdir("./cogs"):
+        if extension != ".gitignore":
+            module = importlib.import_module(f"cogs.{extension}.{extension}")
+            declared: disnake.Intents = getattr(module, "INTENTS", disnake.Intents.all())
+            missing = [name for name, value in declared if value and not getattr(intents, name)]
+            if missing:
+                raise SystemExit(f"The lean intents miss {', '.join(missing)}, declared by the {extension} cog")
+
+
+async def replay(mode: str) -> None:
+    import disnake
+    from disnake.ext.commands import InteractionBot
+
+    from bot.bot import Bot
+    from bot.metrics import rss
+
+    # Only needed to activate the pipeline of the Lol cog, nothing is requested.
+    os.environ.setdefault("RIOT_APIKEY", "RGAPI-benchmark")
+    options = Bot.gateway_options(mode == "lean")
+    intents: disnake.Intents = options["intents"]
+    if mode == "lean":
+        check_intents(intents)
+    # Nothing is requested to Discord, the members are in GUILD_CREATE.
+    client = InteractionBot(**options, chunk_guilds_at_startup=False)
+    state = client._connection
+    state.user = disnake.ClientUser(
+        state=state,
+        data={"id": str(BOT_ID), "username": "PoroBot", "discriminator": "0001", "avatar": None, "bot": True},
+    )
+    events: List[Tuple[str, dict]] = [(name, data) for name, intent, data in stream() if getattr(intents, intent)]
+    baseline = rss()
+
+    started = time.perf_counter()
+    for guild in range(GUILDS):
+        state.parsers["GUILD_CREATE"](guild_create(guild, intents.members))
+    guilds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for name, data in events:
+        state.parsers[name](data)
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0)  # Let the dispatched events run.
+
+    members = sum(len(guild.members) for guild in client.guilds)
+    print(
+        f"{mode:<5} {len(events):>7}/{EVENTS} events parsed in {elapsed:.2f}s ({len(events) / elapsed:,.0f}/s, "
+        f"{elapsed / EVENTS * 1e6:.2f} µs per offered event), guilds in {guilds:.2f}s, "
+        f"{members} members and {len(client.cached_messages)} messages cached, "
+        f"RSS +{(rss() - baseline) / 1024 / 1024:.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        asyncio.run(replay(sys.argv[1]))
+    else:
+        for mode in ("full", "lean"):
+            subprocess.run([sys.executable, "-m", "benchmarks.gateway_replay", mode], check=True)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the logging done on the event loop for each command: the started and ended TRACE messages of bot.py,
+written to the info and debug log files.
+
+The rotation of the log files is checked first, as the bot does it at startup: on an empty logs directory, then on
+files with content.
+
+Run from the repository root:
+    python -m benchmarks.logging_overhead
+"""
+import datetime
+import gzip
+import logging.handlers
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from bot.logs import CompressedRotatingFileHandler
+from bot.logs import setup_logging
+
+NUMBER = 20_000
+TRACE = logging.INFO - 5
+
+INTERACTION = SimpleNamespace(
+    application_command=SimpleNamespace(name="invocateur"),
+    id=1034567890123456789,
+    guild=SimpleNamespace(name="Poro Land"),
+    channel=SimpleNamespace(name="general"),
+    author=SimpleNamespace(name="Poro"),
+    created_at=datetime.datetime.now(datetime.timezone.utc),
+)
+
+
+def origin(interaction) -> str:
+    return f"{interaction.guild.name}#{interaction.channel.name}" if interaction.guild else "DM"
+
+
+def eager_command(logger: logging.Logger, interaction) -> None:
+    """The log calls of a command as they were: f-strings built whether the level is enabled or not."""
+    logger.log(
+        TRACE,
+        f"[Bot] Slash command '{interaction.application_command.name}:{interaction.id}' from '{interaction.guild.name+'#'+interaction.channel.name if interaction.guild else 'DM'}' by '{interaction.author.name}' started...",
+    )
+    logger.log(
+        TRACE,
+        f"[Bot] Slash command '{interaction.application_command.name}:{interaction.id}' from '{interaction.guild.name+'#'+interaction.channel.name if interaction.guild else 'DM'}' by '{interaction.author.name}' at '{interaction.created_at}' ended normally",
+    )
+
+
+def lazy_command(logger: logging.Logger, interaction) -> None:
+    logger.log(
+        TRACE,
+        "[Bot] Slash command '%s:%s' from '%s' by '%s' started...",
+        interaction.application_command.name,
+        interaction.id,
+        origin(interaction),
+        interaction.author.name,
+    )
+    logger.log(
+        TRACE,
+        "[Bot] Slash command '%s:%s' from '%s' by '%s' at '%s' ended normally",
+        interaction.application_command.name,
+        interaction.id,
+        origin(interaction),
+        interaction.author.name,
+        interaction.created_at,
+    )
+
+
+def file_handlers(directory: str, handler_class, **kwargs):
+    formatter = logging.Formatter("%(asctime)s [%(threadName)-12.12s] [%(levelname)-5.5s]  %(message)s")
+    handlers = []
+    for name, level in (("info.log", TRACE), ("debug.log", logging.DEBUG)):
+        handler = handler_class(filename=os.path.join(directory, name), backupCount=5, **kwargs)
+        handler.setFormatter(formatter)
+        handler.setLevel(level)
+        handlers.append(handler)
+    return handlers
+
+
+def check_rollover() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        directory = os.path.join(directory, "logs")
+        handler = CompressedRotatingFileHandler(filename=os.path.join(directory, "info.log"), backupCount=2)
+        handler.doRollover()
+        assert os.listdir(directory) == [], os.listdir(directory)
+        for i in range(3):
+            handler.emit(logging.makeLogRecord({"msg": f"run {i}"}))
+            handler.doRollover()
+        handler.close()
+        backups = sorted(os.listdir(directory))
+        assert backups == ["info.log.1.gz", "info.log.2.gz"], backups
+        with gzip.open(os.path.join(directory, "info.log.1.gz"), "rt") as f:
+            assert f.read() == "run 2\n"
+    print("Rollover on an empty logs directory and on written files: ok")
+
+
+def run(name: str, command, level: int, queued: bool) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        logger = logging.getLogger(f"benchmark.{name}")
+        logger.propagate = False
+        logger.setLevel(level)
+        listener = None
+        if queued:
+            handlers = file_handlers(directory, CompressedRotatingFileHandler, maxBytes=1024 * 1024)
+            listener = setup_logging(logger, handlers)
+        else:
+            handlers = file_handlers(directory, logging.handlers.RotatingFileHandler, encoding="UTF-8", delay=True)
+            for handler in handlers:
+                logger.addHandler(handler)
+        started = time.perf_counter()
+        for _ in range(NUMBER):
+            command(logger, INTERACTION)
+        elapsed = time.perf_counter() - started
+        if listener is not None:
+            listener.stop()
+        drained = time.perf_counter() - started
+        for handler in handlers:
+            handler.close()
+        backups = len([file for file in os.listdir(directory) if file.endswith(".gz")])
+        print(
+            f"{name:<36} {elapsed / NUMBER * 1e6:>8.2f} µs/command on the loop"
+            + (f", {drained / NUMBER * 1e6:.2f} µs/command written, {backups} gzip backups" if queued else "")
+        )
+
+
+if __name__ == "__main__":
+    logging.addLevelName(TRACE, "TRACE")
+    check_rollover()
+    run("f-strings, direct files", eager_command, logging.DEBUG, queued=False)
+    run("lazy, queue writer", lazy_command, logging.DEBUG, queued=True)
+    run("f-strings, TRACE disabled", eager_command, logging.INFO, queued=False)
+    run("lazy, TRACE disabled", lazy_command, logging.INFO, queued=True)
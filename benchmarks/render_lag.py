@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Event loop lag under concurrent /champion and /masteries renders, with each mode of the RenderExecutor.
+
+Every simulated /champion renders the seven tabs of a champion missing from the RenderCache, every /masteries the
+embeds of an account with a mastery on each champion. A ticker measures how late the event loop wakes it up meanwhile,
+which is the delay added to every other interaction in flight. The champions are synthetic, shaped like the Meraki
+responses. Each mode runs in its own process.
+
+Run from the repository root:
+    python -m benchmarks.render_lag
+"""
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+CHAMPIONS = 160  # /champion commands, one per champion
+MASTERIES = 400  # /masteries commands
+CONCURRENCY = 8  # commands in flight
+TICK = 0.005
+SEED = 0
+MODES = ("inline", "thread", "process")
+
+
+def stat(rng: random.Random, per_level: bool = True) -> dict:
+    return {
+        "flat": round(rng.uniform(1, 700), 3),
+        "percent": 0,
+        "perLevel": round(rng.uniform(0.1, 100), 3) if per_level else 0,
+        "percentPerLevel": 0,
+    }
+
+
+def modifiers(rng: random.Random, count: int) -> List[dict]:
+    return [
+        {"values": [round(rng.uniform(10, 500)) + 25 * level for level in range(5)], "units": ["% AP"] * 5}
+        for _ in range(count)
+    ]
+
+
+def spell(rng: random.Random, letter: str) -> dict:
+    return {
+        "name": f"{letter} spell",
+        "icon": "https://cdn.merakianalytics.com/riot/lol/resources/latest/en-US/champions/Ahri/abilities/q.png",
+        "effects": [
+            {
+                "description": f"{'Active' if i == 0 else 'Passive'}: " + "Deals magic damage to enemies hit. " * 6,
+                "leveling": [
+                    {"attribute": f"Magic Damage {j}", "modifiers": modifiers(rng, 2), "affectedByCdr": False}
+                    for j in range(3)
+                ],
+            }
+            for i in range(3)
+        ],
+        "cost": {"attribute": "Cost", "modifiers": modifiers(rng, 1), "affectedByCdr": False},
+        "cooldown": {"attribute": "Cooldown", "modifiers": modifiers(rng, 1), "affectedByCdr": True},
+        "targeting": "Direction",
+        "affects": "Enemies",
+        "spellshieldable": "True",
+        "resource": "MANA",
+        "damageType": "MAGIC_DAMAGE",
+        "spellEffects": "Spell",
+        "projectile": "True",
+        "onHitEffects": None,
+        "occurrence": None,
+        "notes": "* Notes.",
+        "blurb": "Blurb.",
+        "missileSpeed": "1550",
+        "rechargeRate": None,
+        "collisionRadius": None,
+        "tetherRadius": None,
+        "onTargetCdStatic": None,
+        "innerRadius": None,
+        "speed": None,
+        "width": "200",
+        "angle": None,
+        "castTime": "0.25",
+        "effectRadius": None,
+        "targetRange": "970",
+    }
+
+
+def champion(id: int, rng: random.Random) -> dict:
+    stats = [
+        "health",
+        "healthRegen",
+        "mana",
+        "manaRegen",
+        "armor",
+        "magicResistance",
+        "attackDamage",
+        "movespeed",
+        "acquisitionRadius",
+        "selectionRadius",
+        "pathingRadius",
+        "gameplayRadius",
+        "criticalStrikeDamage",
+        "criticalStrikeDamageModifier",
+        "attackSpeed",
+        "attackSpeedRatio",
+        "attackCastTime",
+        "attackTotalTime",
+        "attackDelayOffset",
+        "attackRange",
+        "aramDamageTaken",
+        "aramDamageDealt",
+        "aramHealing",
+        "aramShielding",
+        "urfDamageTaken",
+        "urfDamageDealt",
+        "urfHealing",
+        "urfShielding",
+    ]
+    return {
+        "id": id,
+        "key": f"Champion{id}",
+        "name": f"Champion {id}",
+        "title": "the Nine-Tailed Fox",
+        "fullName": "",
+        "icon": "https://cdn.merakianalytics.com/riot/lol/resources/latest/en-US/champions/Ahri/icon.png",
+        "resource": "MANA",
+        "attackType": "RANGED",
+        "adaptiveType": "MAGIC_DAMAGE",
+        "stats": {name: stat(rng, i < 8) for i, name in enumerate(stats)},
+        "roles": ["MAGE", "ASSASSIN"],
+        "attributeRatings": {"damage": 3, "toughness": 1, "control": 2, "mobility": 3, "utility": 1},
+        "abilities": {letter: [spell(rng, letter) for _ in range(1 + (letter == "R"))] for letter in "PQWER"},
+        "releaseDate": "2011-12-14",
+        "releasePatch": "V1.0.0.131",
+        "patchLastChanged": "12.10",
+        "price": {"blueEssence": 3150, "rp": 790, "saleRp": 0},
+        "lore": "Innately connected to the magic of the spirit realm, Ahri is a fox-like vastaya. " * 8,
+        "skins": [
+            {
+                "name": f"Skin {i}",
+                "id": id * 1000 + i,
+                "isBase": i == 0,
+                "tilePath": "https://cdn.communitydragon.org/tile.jpg",
+                "loadScreenPath": "https://cdn.communitydragon.org/loadscreen.jpg",
+                "chromas": [],
+            }
+            for i in range(10)
+        ],
+    }
+
+
+async def replay(mode: str) -> None:
+    os.environ["RENDER_EXECUTOR"] = mode
+    # Only needed to activate the pipeline of the models, nothing is requested.
+    os.environ.setdefault("RIOT_APIKEY", "RGAPI-benchmark")
+    from cogs.Lol.masteries import MasteryIndex
+    from cogs.Lol.render import RenderCache
+    from cogs.Lol.watcher import ChampionMasteries
+    from cogs.Lol.watcher import MerakiChampion
+    from bot.executor import RenderExecutor
+    from modules.Assets import Emotes
+
+    rng = random.Random(SEED)
+    ids = list(Emotes.Lol.Champions._by_id)
+    index = MasteryIndex((id, rng.randint(1, 7), rng.randint(1_000, 2_000_000)) for id in ids)
+    champions = [MerakiChampion.load(champion(id, rng)) for id in ids[:CHAMPIONS]]
+
+    async def render_champion(i: int) -> None:
+        for tab in RenderCache.tabs:
+            await RenderCache.render(champions[i], tab)
+
+    async def render_masteries(i: int) -> None:
+        ChampionMasteries.remember(f"summoner-{i}", index)
+        await ChampionMasteries(summoner_id=f"summoner-{i}", platform="euw1").embeds
+
+    # The pool is started and warm before the measures, as it is after the first renders of the bot.
+    await asyncio.gather(render_champion(0), render_masteries(0))
+    RenderCache.clear()
+
+    lags: List[float] = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            expected = time.perf_counter() + TICK
+            await asyncio.sleep(TICK)
+            lags.append(max(0.0, time.perf_counter() - expected))
+
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def command(aw) -> float:
+        async with semaphore:
+            started = time.perf_counter()
+            await aw
+            return time.perf_counter() - started
+
+    tick = asyncio.ensure_future(ticker())
+    started = time.perf_counter()
+    commands = [render_champion(i) for i in range(CHAMPIONS)] + [render_masteries(i) for i in range(MASTERIES)]
+    random.Random(SEED).shuffle(commands)
+    latencies = await asyncio.gather(*[command(aw) for aw in commands])
+    elapsed = time.perf_counter() - started
+    done.set()
+    await tick
+    RenderExecutor.shutdown()
+
+    lags.sort()
+    print(
+        f"{mode:<7} {len(commands)} commands in {elapsed:.2f}s, "
+        f"command p50 {statistics.median(latencies) * 1000:.0f} ms, "
+        f"loop lag p50 {lags[len(lags) // 2] * 1000:.1f} ms, p99 {lags[int(len(lags) * 0.99)] * 1000:.1f} ms, "
+        f"max {lags[-1] * 1000:.1f} ms ({len(lags)} ticks of {TICK * 1000:.0f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        asyncio.run(replay(sys.argv[1]))
+    else:
+        for mode in MODES:
+            subprocess.run([sys.executable, "-m", "benchmarks.render_lag", mode], check=True)
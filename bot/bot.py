@@ -16,37 +16,163 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+import importlib
 import logging.handlers
+import math
 import os
 import platform
 import traceback
-import tracemalloc
 from typing import List
-
-tracemalloc.start()
+from typing import Optional
 
 import disnake
 from disnake import ApplicationCommandInteraction
-from disnake.ext.commands import InteractionBot
+from disnake.ext.commands import AutoShardedInteractionBot
+from disnake.ext.commands import CommandSyncFlags
+
+from .metrics import COMMAND_ERRORS
+from .metrics import COMMAND_LATENCY
+from .metrics import METRICS
+from .metrics import MetricsServer
+from .metrics import SHARD_EVENTS
+from .tracing import span
+from .tracing import Tracer
 
 
-class Bot(InteractionBot):
-    def __init__(self, logger, logFormatter):
+class Bot(AutoShardedInteractionBot):
+    def __init__(
+        self,
+        logger,
+        logFormatter,
+        cluster_id: Optional[int] = None,
+        shard_ids: Optional[List[int]] = None,
+        shard_count: Optional[int] = None,
+    ):
+        """A bot running every shard, or `shard_ids` of `shard_count` as the `cluster_id`-th worker of a cluster."""
         self.logger = logger
         self.logFormatter = logFormatter
         self.test_mode = bool(os.getenv("TEST_GUILD"))
         self.cog_not_loaded: List[str] = []
-        intents = disnake.Intents.all()
+        self.metrics_server: Optional[MetricsServer] = None
+        self.cluster_id: Optional[int] = cluster_id
+        gateway = self.gateway_options(os.getenv("LEAN_GATEWAY", "1") != "0")
+        gateway.update(shard_ids=shard_ids, shard_count=shard_count)
+        if cluster_id:
+            # The commands are the same in every worker, the first one syncs them.
+            gateway["command_sync_flags"] = CommandSyncFlags.none()
 
         if self.test_mode:
             logging.info("Starting in test mod...")
-            super().__init__(intents=intents, test_guilds=[int(os.getenv("TEST_GUILD"))])
+            super().__init__(**gateway, test_guilds=[int(os.getenv("TEST_GUILD"))])
         else:
             logging.info("Starting in prod mod...")
-            super().__init__(intents=intents)
+            super().__init__(**gateway)
 
+        self.trace_requests(self.http)
+        self.trace_requests(disnake.webhook.async_.async_context.get())
+        METRICS.collectors["shards"] = self.shard_samples
         self.load_commands()
 
+    @staticmethod
+    def cog_intents() -> disnake.Intents:
+        """Intents declared by the cogs with a module level INTENTS, all of them for a cog that does not declare any."""
+        intents = disnake.Intents(guilds=True)
+        for extension in os.listdir(f"./cogs"):
+            if extension != ".gitignore":
+                try:
+                    module = importlib.import_module(f"cogs.{extension}.{extension}")
+                except Exception as e:
+                    # The extension will not load either, its intents are not needed.
+                    logging.warning(f"[Bot] Could not read the intents of the {extension} cog: {e!r}")
+                    continue
+                intents.value |= getattr(module, "INTENTS", disnake.Intents.all()).value
+        return intents
+
+    @classmethod
+    def gateway_options(cls, lean: bool) -> dict:
+        """Options of the gateway connection and caches: all the intents, or only the ones the cogs need in lean mode.
+
+        In lean mode the members are cached only if a cog asked for them, without their voice state, and the messages
+        are not cached (MESSAGE_CACHE to keep the last ones), since the bot only answers interactions.
+        """
+        if not lean:
+            return {"intents": disnake.Intents.all()}
+        intents = cls.cog_intents()
+        member_cache_flags = disnake.MemberCacheFlags.none()
+        member_cache_flags.joined = intents.members
+        logging.info(f"Lean gateway with the intents {', '.join(name for name, value in intents if value)}")
+        return {
+            "intents": intents,
+            "member_cache_flags": member_cache_flags,
+            "max_messages": int(os.getenv("MESSAGE_CACHE", 0)) or None,
+        }
+
+    async def start(self, *args, **kwargs) -> None:
+        if os.getenv("METRICS_PORT") and self.metrics_server is None:
+            # One port per worker of a cluster.
+            port = int(os.getenv("METRICS_PORT")) + (self.cluster_id or 0)
+            self.metrics_server = MetricsServer(os.getenv("METRICS_HOST", "127.0.0.1"), port)
+            await self.metrics_server.start()
+        await super().start(*args, **kwargs)
+
+    async def close(self) -> None:
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        await super().close()
+
+    def shard_samples(self):
+        guilds = {}
+        for guild in self.guilds:
+            guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+        for shard_id, shard in self.shards.items():
+            labels = {"shard": str(shard_id)}
+            yield "porobot_shard_up", labels, int(not shard.is_closed())
+            if math.isfinite(shard.latency):
+                yield "porobot_shard_latency_seconds", labels, shard.latency
+            yield "porobot_shard_guilds", labels, guilds.get(shard_id, 0)
+
+    async def on_shard_connect(self, shard_id: int) -> None:
+        SHARD_EVENTS.inc(shard=str(shard_id), event="connect")
+
+    async def on_shard_disconnect(self, shard_id: int) -> None:
+        SHARD_EVENTS.inc(shard=str(shard_id), event="disconnect")
+        logging.warning(f"[Bot] Shard {shard_id} disconnected")
+
+    async def on_shard_resumed(self, shard_id: int) -> None:
+        SHARD_EVENTS.inc(shard=str(shard_id), event="resumed")
+
+    async def on_shard_ready(self, shard_id: int) -> None:
+        SHARD_EVENTS.inc(shard=str(shard_id), event="ready")
+        logging.info(f"[Bot] Shard {shard_id} ready")
+
+    @staticmethod
+    def observe_command(interaction: disnake.ApplicationCommandInteraction, type: str, status: str) -> None:
+        latency = (disnake.utils.utcnow() - interaction.created_at).total_seconds()
+        COMMAND_LATENCY.observe(latency, command=interaction.application_command.name, type=type, status=status)
+        Tracer.close(interaction.id, status)
+
+    @staticmethod
+    def trace_requests(adapter) -> None:
+        """Record the Discord requests of an HTTP client or webhook adapter as spans of the current trace."""
+        request = adapter.request
+
+        async def traced_request(route, *args, **kwargs):
+            # Drop the parameters of the route, such as the interaction token.
+            path = "/".join(part for part in getattr(route, "path", "").split("/") if not part.startswith("{"))
+            with span(f"{route.method} {path}", "discord"):
+                return await request(route, *args, **kwargs)
+
+        adapter.request = traced_request
+
+    async def process_application_commands(self, interaction: disnake.ApplicationCommandInteraction) -> None:
+        # The command is invoked in this task, unlike the on_*_command events, so its spans are recorded in the trace.
+        Tracer.open(interaction.id, interaction.data.name)
+        await super().process_application_commands(interaction)
+
+    @staticmethod
+    def origin(interaction: disnake.Interaction) -> str:
+        return f"{interaction.guild.name}#{interaction.channel.name}" if interaction.guild else "DM"
+
     def tracebackEx(self, ex):
         if type(ex) == str:
             return "No valid traceback."
@@ -62,13 +188,18 @@ class Bot(InteractionBot):
         """
         self.log_channel = self.get_channel(int(os.getenv("LOG_CHANNEL")))
         if not self.log_channel:
-            self.log_channel = self.owner.dm_channel
+            # In a cluster, the guild of the log channel may belong to the shards of another worker.
+            try:
+                self.log_channel = await self.fetch_channel(int(os.getenv("LOG_CHANNEL")))
+            except disnake.HTTPException:
+                self.log_channel = self.owner.dm_channel
         logging.info("-" * 50)
         logging.info(f"| Logged in as {self.user.name}")
         logging.info(f"| disnake API version: {disnake.__version__}")
         logging.info(f"| Python version: {platform.python_version()}")
         logging.info(f"| Running on: {platform.system()} {platform.release()} ({os.name})")
         logging.info(f"| Owner : {self.owner}")
+        logging.info(f"| Shards : {', '.join(str(shard_id) for shard_id in self.shards)} of {self.shard_count}")
         logging.info(f"| Cogs loaded : " + ", ".join([f"{cog}" for cog in self.cogs.keys()]))
         if self.cog_not_loaded:
             logging.info("| /!\ Cogs not loaded (see error above): " + ", ".join(self.cog_not_loaded))
@@ -115,39 +246,75 @@ class Bot(InteractionBot):
 
     async def on_slash_command(self, interaction: disnake.ApplicationCommandInteraction) -> None:
         logging.trace(
-            f"[Bot] Slash command '{interaction.application_command.name}:{interaction.id}' from '{interaction.guild.name+'#'+interaction.channel.name if interaction.guild else 'DM'}' by '{interaction.author.name}' started..."
+            "[Bot] Slash command '%s:%s' from '%s' by '%s' started...",
+            interaction.application_command.name,
+            interaction.id,
+            self.origin(interaction),
+            interaction.author.name,
         )
 
     async def on_user_command(self, interaction: disnake.UserCommandInteraction) -> None:
         logging.trace(
-            f"[Bot] User command '{interaction.application_command.name}:{interaction.id}' from '{interaction.guild.name+'#'+interaction.channel.name if interaction.guild else 'DM'}' by '{interaction.author.name}' started..."
+            "[Bot] User command '%s:%s' from '%s' by '%s' started...",
+            interaction.application_command.name,
+            interaction.id,
+            self.origin(interaction),
+            interaction.author.name,
         )
 
     async def on_message_command(self, interaction: disnake.MessageCommandInteraction) -> None:
         logging.trace(
-            f"[Bot] Message command '{interaction.application_command.name}:{interaction.id}' from '{interaction.guild.name+'#'+interaction.channel.name if interaction.guild else 'DM'}' by '{interaction.author.name}' started..."
+            "[Bot] Message command '%s:%s' from '%s' by '%s' started...",
+            interaction.application_command.name,
+            interaction.id,
+            self.origin(interaction),
+            interaction.author.name,
         )
 
     async def on_slash_command_error(self, interaction: ApplicationCommandInteraction, error: Exception) -> None:
+        self.observe_command(interaction, "slash", "error")
+        COMMAND_ERRORS.inc(command=interaction.application_command.name, type="slash", error=type(error).__name__)
         await self.send_error_log(interaction, error)
 
     async def on_user_command_error(self, interaction: disnake.UserCommandInteraction, error: Exception) -> None:
+        self.observe_command(interaction, "user", "error")
+        COMMAND_ERRORS.inc(command=interaction.application_command.name, type="user", error=type(error).__name__)
         await self.send_error_log(interaction, error)
 
     async def on_message_command_error(self, interaction: disnake.MessageCommandInteraction, error: Exception) -> None:
+        self.observe_command(interaction, "message", "error")
+        COMMAND_ERRORS.inc(command=interaction.application_command.name, type="message", error=type(error).__name__)
         await self.send_error_log(interaction, error)
 
     async def on_slash_command_completion(self, interaction: disnake.ApplicationCommandInteraction) -> None:
+        self.observe_command(interaction, "slash", "ok")
         logging.trace(
-            f"[Bot] Slash command '{interaction.application_command.name}:{interaction.id}' from '{interaction.guild.name+'#'+interaction.channel.name if interaction.guild else 'DM'}' by '{interaction.author.name}' at '{interaction.created_at}' ended normally"
+            "[Bot] Slash command '%s:%s' from '%s' by '%s' at '%s' ended normally",
+            interaction.application_command.name,
+            interaction.id,
+            self.origin(interaction),
+            interaction.author.name,
+            interaction.created_at,
         )
 
     async def on_user_command_completion(self, interaction: disnake.UserCommandInteraction) -> None:
+        self.observe_command(interaction, "user", "ok")
         logging.trace(
-            f"[Bot] User command '{interaction.application_command.name}:{interaction.id}' from '{interaction.guild.name+'#'+interaction.channel.name if interaction.guild else 'DM'}' by '{interaction.author.name}' at '{interaction.created_at}' ended normally"
+            "[Bot] User command '%s:%s' from '%s' by '%s' at '%s' ended normally",
+            interaction.application_command.name,
+            interaction.id,
+            self.origin(interaction),
+            interaction.author.name,
+            interaction.created_at,
         )
 
     async def on_message_command_completion(self, interaction: disnake.MessageCommandInteraction) -> None:
+        self.observe_command(interaction, "message", "ok")
         logging.trace(
-            f"[Bot] Message command '{interaction.application_command.name}:{interaction.id}' from '{interaction.guild.name+'#'+interaction.channel.name if interaction.guild else 'DM'}' by '{interaction.author.name}' at '{interaction.created_at}' ended normally"
+            "[Bot] Message command '%s:%s' from '%s' by '%s' at '%s' ended normally",
+            interaction.application_command.name,
+            interaction.id,
+            self.origin(interaction),
+            interaction.author.name,
+            interaction.created_at,
         )
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Cluster mode: the bot runs as CLUSTER_PROCESSES worker processes, each one owning a contiguous range of the shards.
+
+The launcher asks Discord for the recommended shard count (or uses SHARD_COUNT), starts the workers, restarts the ones
+that exit and serves the Riot rate limits shared by the workers (see `bot.ratelimit`). With RIOT_GATEWAY, it also runs
+the Riot data gateway process (see `cogs.Lol.gateway`), owning the caches and the rate limits of every worker.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import tempfile
+import time
+from typing import Callable
+from typing import List
+from typing import Optional
+
+import aiohttp
+
+from .ratelimit import LimiterServer
+
+
+def shard_ranges(shard_count: int, processes: int) -> List[List[int]]:
+    """Split the shards in `processes` contiguous ranges, the first ones taking the remainder."""
+    size, remainder = divmod(shard_count, processes)
+    ranges, start = [], 0
+    for i in range(processes):
+        end = start + size + (i < remainder)
+        ranges.append(list(range(start, end)))
+        start = end
+    return [shard_ids for shard_ids in ranges if shard_ids]
+
+
+async def recommended_shard_count(token: str) -> int:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot", headers={"Authorization": f"Bot {token}"}
+        ) as response:
+            response.raise_for_status()
+            return (await response.json())["shards"]
+
+
+class Worker:
+    """Process of the cluster, running `target(*args)`."""
+
+    def __init__(self, name: str, target: Callable, args: tuple):
+        self.name: str = name
+        self.target: Callable = target
+        self.args: tuple = args
+        self.process: Optional[multiprocessing.Process] = None
+        self.started_at: float = 0
+        self.restarts: int = 0
+        self.restart_at: Optional[float] = None
+
+
+class Cluster:
+    """Launcher of the workers, `run(cluster_id, shard_ids, shard_count)` is called in each of them.
+
+    `gateway(path)` is called in the process of the Riot data gateway, if any.
+    """
+
+    check_interval: float = 5
+    # A worker that exits sooner than this after its start is restarted after a growing delay.
+    stable_after: float = 60
+    max_backoff: float = 300
+
+    def __init__(
+        self, run: Callable, processes: int, shard_count: Optional[int] = None, gateway: Optional[Callable] = None
+    ):
+        self.run: Callable = run
+        self.processes: int = processes
+        self.shard_count: Optional[int] = shard_count
+        self.gateway: Optional[Callable] = gateway
+        self.workers: List[Worker] = []
+        self.limiter_server = LimiterServer(
+            os.path.join(tempfile.gettempdir(), f"porobot-ratelimit-{os.getpid()}.sock")
+        )
+        self.gateway_path: str = os.path.join(tempfile.gettempdir(), f"porobot-gateway-{os.getpid()}.sock")
+        self.context = multiprocessing.get_context("spawn")
+
+    def start(self) -> None:
+        asyncio.run(self.main())
+
+    async def main(self) -> None:
+        if self.shard_count is None:
+            self.shard_count = await recommended_shard_count(os.getenv("DISCORD_TOKEN"))
+        ranges = shard_ranges(self.shard_count, self.processes)
+        logging.info(f"[Cluster] {self.shard_count} shards on {len(ranges)} workers: {ranges}")
+        await self.limiter_server.start()
+        os.environ["RATE_LIMIT_SOCKET"] = self.limiter_server.path
+        os.environ["CLUSTER_PROCESSES"] = str(len(ranges))
+        self.workers = [
+            Worker(f"Worker-{i}", self.run, (i, shard_ids, self.shard_count)) for i, shard_ids in enumerate(ranges)
+        ]
+        if self.gateway is not None:
+            # Started first, the workers connect to it on their first Riot request.
+            self.workers.insert(0, Worker("RiotGateway", self.gateway, (self.gateway_path,)))
+            os.environ["RIOT_GATEWAY_SOCKET"] = self.gateway_path
+
+        loop = asyncio.get_running_loop()
+        stopped = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stopped.set)
+        for worker in self.workers:
+            self.spawn(worker)
+        try:
+            while not stopped.is_set():
+                try:
+                    await asyncio.wait_for(stopped.wait(), self.check_interval)
+                except asyncio.TimeoutError:
+                    pass
+                for worker in self.workers:
+                    if not stopped.is_set():
+                        self.check(worker)
+        finally:
+            await self.stop()
+
+    def spawn(self, worker: Worker) -> None:
+        worker.process = self.context.Process(target=worker.target, args=worker.args, name=worker.name)
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        logging.info(f"[Cluster] {worker.name} started (pid {worker.process.pid})")
+
+    def check(self, worker: Worker) -> None:
+        """Restart a worker that exited, after a delay growing with its successive short runs."""
+        now = time.monotonic()
+        if worker.restart_at is not None:
+            if now >= worker.restart_at:
+                worker.restart_at = None
+                self.spawn(worker)
+            return
+        if worker.process.is_alive():
+            return
+        uptime = now - worker.started_at
+        worker.restarts = worker.restarts + 1 if uptime < self.stable_after else 0
+        delay = min(self.max_backoff, 2**worker.restarts) if worker.restarts else 0
+        worker.restart_at = now + delay
+        logging.warning(
+            f"[Cluster] {worker.name} exited with {worker.process.exitcode} after {uptime:.0f}s, "
+            f"restarting it in {delay}s"
+        )
+
+    async def stop(self) -> None:
+        logging.info("[Cluster] Stopping the workers...")
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers:
+            if worker.process is not None:
+                await asyncio.get_running_loop().run_in_executor(None, worker.process.join, 30)
+                if worker.process.is_alive():
+                    worker.process.kill()
+        await self.limiter_server.stop()
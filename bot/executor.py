@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Render executor: runs the CPU bound embed builders away from the event loop thread, so the other interactions in flight
+are not delayed by them.
+
+The builders take plain data (raw responses, tuples) and return embed dicts, so they can run in another process.
+RENDER_EXECUTOR chooses where: "process" (default), "thread", or "inline" on the event loop as before.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+from typing import Callable
+from typing import Optional
+
+
+class RenderExecutor:
+    mode: str = os.getenv("RENDER_EXECUTOR", "process")
+    workers: int = int(os.getenv("RENDER_WORKERS", 1))
+
+    _executor: Optional[Executor] = None
+
+    @classmethod
+    def executor(cls) -> Optional[Executor]:
+        if cls._executor is None and cls.mode != "inline":
+            if cls.mode == "process":
+                # Spawned, the bot process has threads (logs, SQLite) whose locks a fork could copy while held.
+                cls._executor = ProcessPoolExecutor(cls.workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                cls._executor = ThreadPoolExecutor(cls.workers, thread_name_prefix="Render")
+            logging.info(f"[RenderExecutor] Started {cls.workers} {cls.mode} workers.")
+        return cls._executor
+
+    @classmethod
+    async def run(cls, function: Callable, *args) -> Any:
+        """`function(*args)` in the executor, `function` and `args` must be picklable in process mode."""
+        executor = cls.executor()
+        if executor is None:
+            return function(*args)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for its memory), the next render gets a new pool.
+            logging.warning("[RenderExecutor] Process pool broken, restarting it.")
+            cls.shutdown()
+            raise
+
+    @classmethod
+    def shutdown(cls) -> None:
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
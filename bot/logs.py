@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Logging off the event loop: the root logger only puts the records in a queue, a background thread formats them and
+writes them to the handlers. The log files are rotated when they reach LOG_MAX_BYTES (10 MiB by default) and their
+backups are compressed with gzip.
+"""
+import gzip
+import logging.handlers
+import os
+import queue
+import shutil
+from typing import List
+
+
+class CompressedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler whose backups are gzip files: `info.log.1.gz`, `info.log.2.gz`...
+
+    Rolling over before anything was logged (an empty logs directory at startup) only shifts the existing backups.
+    """
+
+    def __init__(self, filename: str, maxBytes: int = 0, backupCount: int = 0, encoding: str = "UTF-8"):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding, delay=True)
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self.compress
+
+    @staticmethod
+    def compress(source: str, destination: str) -> None:
+        if not os.path.exists(source):
+            return
+        with open(source, "rb") as f_in, gzip.open(destination, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves the formatting of the records to the listener thread.
+
+    The default one formats the message before queuing it, which would keep the cost of the formatting on the event
+    loop. The records stay in the process, so they do not need to be made picklable either: the arguments of a lazy
+    log call are formatted later, they must not be mutated after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(logger: logging.Logger, handlers: List[logging.Handler]) -> logging.handlers.QueueListener:
+    """Route the records of `logger` to `handlers` through a queue, returns the started listener."""
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    logger.addHandler(DeferredQueueHandler(records))
+    listener.start()
+    return listener
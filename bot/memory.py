@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+On-demand memory profiling. tracemalloc slows down every allocation, so it only runs for the window of a profile,
+unless the process was started with PYTHONTRACEMALLOC set.
+"""
+import asyncio
+import os
+import tracemalloc
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+# Groups of the allocation diffs, by the first matching part of the file path.
+GROUPS: Tuple[Tuple[str, str], ...] = (
+    (os.path.join("cogs", "Lol", "view.py"), "views"),
+    (os.path.join("cogs", "Lol", "stores.py"), "caches"),
+    (os.path.join("cogs", "Lol", "render.py"), "caches"),
+    (os.path.join("cogs", "Lol", "cards.py"), "caches"),
+    (os.path.join("cogs", "Lol", "static.py"), "caches"),
+    (os.path.join("site-packages", "pyot"), "pyot"),
+    (os.path.join("site-packages", "disnake"), "disnake"),
+    ("cogs", "cogs"),
+)
+
+
+def group(filename: str) -> str:
+    return next((name for part, name in GROUPS if part in filename), "other")
+
+
+def short(filename: str) -> str:
+    """Path relative to the repository or to site-packages."""
+    _, separator, package = filename.rpartition("site-packages" + os.sep)
+    if separator:
+        return package
+    return os.path.relpath(filename) if filename.startswith(os.getcwd()) else filename
+
+
+class MemoryProfile(NamedTuple):
+    seconds: float
+    lines: List[Tuple[str, int, int]]  # (file:line, size diff, count diff), largest change first
+    groups: Dict[str, int]  # size diff by group
+    total: int
+
+
+class MemoryProfiler:
+    running: bool = False
+
+    @classmethod
+    async def profile(cls, seconds: float, limit: int = 10) -> Optional[MemoryProfile]:
+        """Trace the allocations for `seconds` and diff the snapshots taken before and after, None if already running."""
+        if cls.running:
+            return None
+        cls.running = True
+        started = not tracemalloc.is_tracing()
+        try:
+            if started:
+                tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            await asyncio.sleep(seconds)
+            after = tracemalloc.take_snapshot()
+        finally:
+            if started:
+                tracemalloc.stop()
+            cls.running = False
+        # Diffing the snapshots takes a while, the event loop keeps running meanwhile.
+        return await asyncio.get_running_loop().run_in_executor(None, cls.diff, seconds, before, after, limit)
+
+    @staticmethod
+    def diff(seconds: float, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int) -> MemoryProfile:
+        filters = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        )
+        diffs = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+        groups: Dict[str, int] = {}
+        for diff in diffs:
+            name = group(diff.traceback[0].filename)
+            groups[name] = groups.get(name, 0) + diff.size_diff
+        lines = [
+            (f"{short(diff.traceback[0].filename)}:{diff.traceback[0].lineno}", diff.size_diff, diff.count_diff)
+            for diff in diffs[:limit]
+        ]
+        return MemoryProfile(seconds, lines, groups, sum(diff.size_diff for diff in diffs))
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Metrics of the bot, exposed in the Prometheus text format on `http://METRICS_HOST:METRICS_PORT/metrics`.
+The server is only started when METRICS_PORT is set.
+"""
+import asyncio
+import gc
+import logging
+import os
+import resource
+import time
+from bisect import bisect_left
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from aiohttp import web
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class Metric:
+    type: str = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Labels = ()):
+        self.name: str = name
+        self.help: str = help
+        self.labels: Labels = labels
+        METRICS.metrics.append(self)
+
+    def key(self, labels: Dict[str, str]) -> Labels:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def samples(self) -> Iterable[Sample]:
+        return []
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines += [f"{name}{format_labels(labels)} {format_value(value)}" for name, labels, value in self.samples()]
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Labels = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self.key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in self.values.items():
+            yield self.name, dict(zip(self.labels, key)), value
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Labels = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[Labels, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self.values[self.key(labels)] = value
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in self.values.items():
+            yield self.name, dict(zip(self.labels, key)), value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Labels = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets: Tuple[float, ...] = buckets
+        # Per labels: the count of each bucket (not cumulative, the last one is +Inf), then the sum.
+        self.values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self.key(labels)
+        counts, total = self.values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self) -> Iterable[Sample]:
+        for key, (counts, total) in self.values.items():
+            labels = dict(zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                yield f"{self.name}_bucket", {**labels, "le": le}, cumulative
+            yield f"{self.name}_sum", labels, total[0]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Registry:
+    """Metrics of the process, plus collectors called at each scrape for the values owned by the cogs."""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: Dict[str, Callable[[], Iterable[Sample]]] = {}
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines += metric.render()
+        for name, collector in list(self.collectors.items()):
+            try:
+                samples = list(collector())
+            except Exception as e:
+                logging.warning(f"[Metrics] Collector '{name}' failed: {e!r}")
+                continue
+            lines += [f"{sample}{format_labels(labels)} {format_value(value)}" for sample, labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Registry()
+
+COMMAND_LATENCY = Histogram(
+    "porobot_command_latency_seconds",
+    "Time from the interaction creation to the end of the command.",
+    labels=("command", "type", "status"),
+)
+COMMAND_ERRORS = Counter("porobot_command_errors_total", "Commands that raised.", labels=("command", "type", "error"))
+RIOT_REQUESTS = Histogram(
+    "porobot_riot_request_latency_seconds", "Riot API requests by endpoint and status.", labels=("endpoint", "status")
+)
+SHARD_EVENTS = Counter(
+    "porobot_shard_events_total", "Connections, disconnections and resumes of the shards.", labels=("shard", "event")
+)
+LOOP_LAG = Histogram(
+    "porobot_event_loop_lag_seconds",
+    "Delay of the event loop in waking up a sleeping task.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+RSS = Gauge("porobot_process_resident_memory_bytes", "Resident memory of the process.")
+RSS_MAX = Gauge("porobot_process_resident_memory_max_bytes", "Highest resident memory sampled since the start.")
+GC_COUNT = Gauge(
+    "porobot_gc_count", "Allocations or collections pending in each generation (gc.get_count).", labels=("generation",)
+)
+GC_COLLECTIONS = Gauge(
+    "porobot_gc_collections", "Collections of each generation since the start.", labels=("generation",)
+)
+GC_COLLECTED = Gauge(
+    "porobot_gc_collected_objects", "Objects collected in each generation since the start.", labels=("generation",)
+)
+UPTIME = Gauge("porobot_process_uptime_seconds", "Time since the metrics were started.")
+
+
+def rss() -> int:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Peak instead of current resident memory where /proc is not available (KiB on Linux, bytes on macOS).
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def sample_memory() -> None:
+    value = rss()
+    RSS.set(value)
+    RSS_MAX.set(max(value, RSS_MAX.values.get((), 0)))
+    for generation, (count, stats) in enumerate(zip(gc.get_count(), gc.get_stats())):
+        GC_COUNT.set(count, generation=str(generation))
+        GC_COLLECTIONS.set(stats["collections"], generation=str(generation))
+        GC_COLLECTED.set(stats["collected"], generation=str(generation))
+
+
+class MetricsServer:
+    lag_interval: float = 0.5
+    memory_interval: float = float(os.getenv("MEMORY_SAMPLE_INTERVAL", 15))
+
+    def __init__(self, host: str, port: int):
+        self.host: str = host
+        self.port: int = port
+        self.started: float = time.monotonic()
+        self.runner: Optional[web.AppRunner] = None
+        self.monitor: Optional[asyncio.Task] = None
+        self.sampler: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        self.monitor = asyncio.ensure_future(self.monitor_loop())
+        self.sampler = asyncio.ensure_future(self.sampler_loop())
+        logging.info(f"[Metrics] Serving on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        for task in (self.monitor, self.sampler):
+            if task is not None:
+                task.cancel()
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        sample_memory()
+        UPTIME.set(time.monotonic() - self.started)
+        return web.Response(text=METRICS.render(), content_type="text/plain", charset="utf-8")
+
+    async def monitor_loop(self) -> None:
+        while True:
+            expected = time.monotonic() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            LOOP_LAG.observe(max(0.0, time.monotonic() - expected))
+
+    async def sampler_loop(self) -> None:
+        """Sample the memory between the scrapes too, so the highest resident memory is not missed."""
+        while True:
+            sample_memory()
+            await asyncio.sleep(self.memory_interval)
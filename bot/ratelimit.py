@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Rate limits, shared by the processes of a cluster.
+
+The cluster launcher serves the token buckets on a Unix socket (RATE_LIMIT_SOCKET) and each worker asks it before
+sending a request, so the limits of the API key hold for the whole cluster. One line per message:
+    worker -> launcher: "C <app limits> <method>=<limits> ..."  configure the buckets, sent on connection
+    worker -> launcher: "T <reserve> <method>"                   take a request
+    worker -> launcher: "S <method> <app limits> <method limits>" limits of the API key returned by Riot
+    launcher -> worker: "<delay>"                                0 when taken, else the seconds to wait before retrying
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Set
+
+
+class TokenBucket:
+    """`limit` requests per `window` seconds, refilled continuously."""
+
+    def __init__(self, limit: int, window: float):
+        self.window: float = window
+        self.capacity: float = float(limit)
+        self.rate: float = limit / window
+        self.tokens: float = float(limit)
+        self.updated: float = time.monotonic()
+
+    def __repr__(self) -> str:
+        return f"TokenBucket({int(self.capacity)}:{int(self.window)})"
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float, reserve: float = 0) -> float:
+        """Seconds to wait before a request can be taken while leaving `reserve` of the capacity untouched."""
+        self.refill(now)
+        missing = 1 + reserve * self.capacity - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def resize(self, limit: int) -> None:
+        self.refill(time.monotonic())
+        self.capacity = float(limit)
+        self.rate = limit / self.window
+        self.tokens = min(self.tokens, self.capacity)
+
+    @classmethod
+    def parse(cls, limits: str, share: float = 1) -> List["TokenBucket"]:
+        """Parse limits written like the X-App-Rate-Limit header, e.g. `20:1,100:120`, keeping `share` of them."""
+        buckets: List[TokenBucket] = []
+        for limit in limits.split(","):
+            if limit.strip():
+                count, window = limit.split(":")
+                buckets.append(cls(max(1, int(int(count) * share)), float(window)))
+        return buckets
+
+    @classmethod
+    def update(cls, buckets: List["TokenBucket"], limits: str, share: float = 1) -> List["TokenBucket"]:
+        """`buckets` following the new `limits`, the buckets of the windows still limited keep their tokens."""
+        by_window = {bucket.window: bucket for bucket in buckets}
+        updated: List[TokenBucket] = []
+        for bucket in cls.parse(limits, share):
+            previous = by_window.get(bucket.window)
+            if previous is not None:
+                previous.resize(int(bucket.capacity))
+                bucket = previous
+            updated.append(bucket)
+        return updated
+
+
+class Limiter:
+    """Token buckets of the app and of each method, following the limits Riot returns once it answered."""
+
+    def __init__(self, app_limits: str, method_limits: Optional[Mapping[str, str]] = None, share: float = 1):
+        self.share: float = share
+        self.app_limits: str = app_limits
+        self.method_limits: Dict[str, str] = dict(method_limits or {})
+        self.app_buckets: List[TokenBucket] = TokenBucket.parse(app_limits, share)
+        self.method_buckets: Dict[str, List[TokenBucket]] = {
+            method: TokenBucket.parse(limits, share) for method, limits in self.method_limits.items()
+        }
+
+    def take(self, method: str, reserve: float = 0) -> float:
+        """Take a request from the buckets and return 0 if they all allow it, else the seconds to wait."""
+        now = time.monotonic()
+        buckets = self.app_buckets + self.method_buckets.get(method, [])
+        delay = max([bucket.delay(now, reserve) for bucket in buckets], default=0)
+        if delay == 0:
+            for bucket in buckets:
+                bucket.take()
+        return delay
+
+    async def acquire(self, method: str, reserve: float = 0) -> float:
+        return self.take(method, reserve)
+
+    def changed(self, method: str, app_limits: str, method_limits: str) -> bool:
+        return app_limits != self.app_limits or method_limits != self.method_limits.get(method)
+
+    def follow(self, method: str, app_limits: str, method_limits: str) -> None:
+        """Resize the buckets to the limits of the X-App-Rate-Limit and X-Method-Rate-Limit headers of a response."""
+        if app_limits != self.app_limits:
+            logging.info(f"[Limiter] App limits changed from {self.app_limits} to {app_limits}")
+            self.app_limits = app_limits
+            self.app_buckets = TokenBucket.update(self.app_buckets, app_limits, self.share)
+        if method_limits != self.method_limits.get(method):
+            logging.info(
+                f"[Limiter] Limits of {method} changed from {self.method_limits.get(method)} to {method_limits}"
+            )
+            self.method_limits[method] = method_limits
+            self.method_buckets[method] = TokenBucket.update(
+                self.method_buckets.get(method, []), method_limits, self.share
+            )
+
+    async def sync(self, method: str, app_limits: str, method_limits: str) -> None:
+        if self.changed(method, app_limits, method_limits):
+            self.follow(method, app_limits, method_limits)
+
+
+class LimiterServer:
+    """Limiter of the cluster, configured by the first worker that connects."""
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.limiter: Optional[Limiter] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.connections: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.server = await asyncio.start_unix_server(self.handle, self.path)
+        logging.info(f"[LimiterServer] Serving on {self.path}")
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            for task in self.connections:
+                task.cancel()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+            await self.server.wait_closed()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            while line := await reader.readline():
+                op, _, args = line.decode().rstrip("\n").partition(" ")
+                if op == "C":
+                    if self.limiter is None:
+                        app_limits, *methods = args.split(" ")
+                        self.limiter = Limiter(app_limits, dict(method.split("=", 1) for method in methods))
+                    delay = 0.0
+                elif op == "T":
+                    reserve, method = args.split(" ", 1)
+                    delay = self.limiter.take(method, float(reserve)) if self.limiter is not None else 0.0
+                elif op == "S":
+                    if self.limiter is not None:
+                        self.limiter.follow(*args.split(" "))
+                    delay = 0.0
+                else:
+                    logging.warning(f"[LimiterServer] Unknown message {line!r}")
+                    break
+                writer.write(f"{delay:.6f}\n".encode())
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            logging.warning(f"[LimiterServer] Worker connection closed: {e!r}")
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.connections.discard(task)
+            writer.close()
+
+
+class RemoteLimiter:
+    """Limiter of a cluster worker, asking the launcher's LimiterServer.
+
+    While the server can not be reached, the worker falls back to its `share` of the limits.
+    """
+
+    retry_after: float = 30
+
+    def __init__(self, path: str, app_limits: str, method_limits: Optional[Mapping[str, str]] = None, share: float = 1):
+        self.path: str = path
+        self.local: Limiter = Limiter(app_limits, method_limits, share)
+        methods = " ".join(f"{method}={limits}" for method, limits in (method_limits or {}).items())
+        self.configuration: bytes = f"C {app_limits} {methods}".rstrip().encode() + b"\n"
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.lock: Optional[asyncio.Lock] = None
+        self.unreachable_until: float = 0
+
+    async def request(self, message: bytes) -> float:
+        self.writer.write(message)
+        await self.writer.drain()
+        return float(await self.reader.readline())
+
+    async def send(self, message: bytes) -> Optional[float]:
+        """Reply of the server to `message`, None if it can not be reached."""
+        if time.monotonic() < self.unreachable_until:
+            return None
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            try:
+                if self.writer is None:
+                    self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+                    await self.request(self.configuration)
+                return await self.request(message)
+            except (OSError, ValueError) as e:
+                logging.warning(
+                    "[RemoteLimiter] %s unreachable, using the local limits for %ss: %r", self.path, self.retry_after, e
+                )
+                if self.writer is not None:
+                    self.writer.close()
+                self.reader = self.writer = None
+                self.unreachable_until = time.monotonic() + self.retry_after
+                return None
+
+    async def acquire(self, method: str, reserve: float = 0) -> float:
+        delay = await self.send(f"T {reserve} {method}\n".encode())
+        return self.local.take(method, reserve) if delay is None else delay
+
+    async def sync(self, method: str, app_limits: str, method_limits: str) -> None:
+        # Only the changes are sent, the server keeps the limits it followed for every worker.
+        if self.local.changed(method, app_limits, method_limits):
+            self.local.follow(method, app_limits, method_limits)
+            await self.send(f"S {method} {app_limits} {method_limits}\n".encode())
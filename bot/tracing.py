@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Lightweight tracing of the application commands.
+
+A trace is opened before a command is invoked and closed on its completion or error. Inside it, `span` records how
+long each nested step took (pipeline requests, embed renders, Discord requests). Traces slower than TRACE_SLOW_MS
+(2000 by default) are kept in memory for `/debug slow` and appended to `logs/slow_traces.jsonl`.
+"""
+import functools
+import inspect
+import json
+import logging
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Optional
+
+
+class Span:
+    __slots__ = ("name", "kind", "start", "end", "depth")
+
+    def __init__(self, name: str, kind: str, start: float, depth: int):
+        self.name: str = name
+        self.kind: str = kind
+        self.start: float = start
+        self.end: Optional[float] = None
+        self.depth: int = depth
+
+    @property
+    def dict(self) -> dict:
+        return {"name": self.name, "kind": self.kind, "start": self.start, "end": self.end, "depth": self.depth}
+
+
+class Trace:
+    max_spans: int = 500
+
+    def __init__(self, id: int, name: str):
+        self.id: int = id
+        self.name: str = name
+        self.created_at: float = time.time()
+        self.started: float = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.status: Optional[str] = None
+        self.spans: List[Span] = []
+        self.dropped: int = 0
+
+    @property
+    def dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "created_at": self.created_at,
+            "duration": self.duration,
+            "status": self.status,
+            "dropped": self.dropped,
+            "spans": [span.dict for span in self.spans],
+        }
+
+    def waterfall(self, width: int = 30) -> str:
+        """Text waterfall of the spans, one line per span with its offset, duration and bar."""
+        total = self.duration or time.perf_counter() - self.started
+        lines = [f"{self.name} ({self.status}) {total * 1000:.0f} ms"]
+        for span in self.spans:
+            end = span.end if span.end is not None else total
+            offset = int(span.start / total * width) if total else 0
+            length = max(1, int((end - span.start) / total * width)) if total else 1
+            bar = " " * offset + "█" * min(length, width - offset)
+            name = ("  " * span.depth + f"{span.kind}:{span.name}")[:40]
+            lines.append(f"{name:<40} {span.start * 1000:>6.0f} {(end - span.start) * 1000:>6.0f} |{bar:<{width}}|")
+        if self.dropped:
+            lines.append(f"... {self.dropped} more spans")
+        return "\n".join(lines)
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+current_depth: ContextVar[int] = ContextVar("current_depth", default=0)
+
+
+@contextmanager
+def span(name: str, kind: str):
+    """Record the time spent in this block as a span of the current trace, if any."""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    if len(trace.spans) >= trace.max_spans:
+        trace.dropped += 1
+        yield
+        return
+    depth = current_depth.get()
+    record = Span(name, kind, time.perf_counter() - trace.started, depth)
+    trace.spans.append(record)
+    reset = current_depth.set(depth + 1)
+    try:
+        yield
+    finally:
+        current_depth.reset(reset)
+        record.end = time.perf_counter() - trace.started
+
+
+def traced(name: str, kind: str = "render") -> Callable:
+    """Decorator recording each call of a function, or coroutine function, as a span."""
+
+    def decorator(function: Callable) -> Callable:
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                with span(name, kind):
+                    return await function(*args, **kwargs)
+
+        else:
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with span(name, kind):
+                    return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class Tracer:
+    threshold: float = int(os.getenv("TRACE_SLOW_MS", 2000)) / 1000
+    path: str = os.path.join("logs", "slow_traces.jsonl")
+
+    open_traces: Dict[int, Trace] = {}
+    slow: Deque[Trace] = deque(maxlen=50)
+
+    @classmethod
+    def open(cls, id: int, name: str) -> Trace:
+        # An interaction can not be answered after 15 minutes, forget the traces that were never closed.
+        expired = time.perf_counter() - 15 * 60
+        for key in [key for key, trace in cls.open_traces.items() if trace.started < expired]:
+            del cls.open_traces[key]
+        trace = Trace(id, name)
+        cls.open_traces[id] = trace
+        current_trace.set(trace)
+        return trace
+
+    @classmethod
+    def close(cls, id: int, status: str) -> Optional[Trace]:
+        trace = cls.open_traces.pop(id, None)
+        if trace is None:
+            return None
+        trace.duration = time.perf_counter() - trace.started
+        trace.status = status
+        if trace.duration >= cls.threshold:
+            cls.slow.append(trace)
+            try:
+                os.makedirs(os.path.dirname(cls.path), exist_ok=True)
+                with open(cls.path, "a", encoding="UTF-8") as f:
+                    f.write(json.dumps(trace.dict, separators=(",", ":")) + "\n")
+            except OSError as e:
+                logging.warning(f"[Tracer] Failed to write the slow trace of {trace.name}: {e}")
+        return trace
+
+    @classmethod
+    def slowest(cls, n: int = 5) -> List[Trace]:
+        return sorted(cls.slow, key=lambda trace: trace.duration, reverse=True)[:n]
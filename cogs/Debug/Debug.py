@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import datetime
+import tracemalloc
+
+import disnake
+from disnake import ApplicationCommandInteraction
+from disnake.ext import commands
+
+from bot.bot import Bot
+from bot.memory import MemoryProfiler
+from bot.tracing import Tracer
+
+INTENTS = disnake.Intents.none()
+
+
+class Debug(commands.Cog):
+    """Commands for the owner to inspect the bot while it runs."""
+
+    def __init__(self, bot):
+        self.bot: Bot = bot
+
+    @commands.slash_command(name="debug", description="Outils de diagnostic du bot")
+    @commands.is_owner()
+    async def debug(self, inter: ApplicationCommandInteraction):
+        pass
+
+    @debug.sub_command(name="slow", description="Les commandes lentes les plus récentes, en cascade")
+    async def slow(
+        self,
+        inter: ApplicationCommandInteraction,
+        nombre: int = commands.Param(default=3, ge=1, le=5, description="Le nombre de traces à afficher."),
+    ):
+        traces = Tracer.slowest(nombre)
+        if not traces:
+            await inter.response.send_message(
+                f"Aucune commande n'a dépassé {Tracer.threshold * 1000:.0f} ms.", ephemeral=True
+            )
+            return
+        # An embed description is limited to 4096 characters and all the embeds of a message to 6000.
+        limit = 5500 // len(traces) - 20
+        embeds = []
+        for trace in traces:
+            waterfall = trace.waterfall()
+            if len(waterfall) > limit:
+                waterfall = waterfall[: limit - 4] + "\n..."
+            embeds.append(
+                disnake.Embed(
+                    title=f"/{trace.name}",
+                    description=f"```{waterfall}```",
+                    color=disnake.Colour.red() if trace.status == "error" else disnake.Colour.orange(),
+                    timestamp=datetime.datetime.fromtimestamp(trace.created_at, datetime.timezone.utc),
+                ).set_footer(text="span, début (ms), durée (ms)")
+            )
+        await inter.response.send_message(embeds=embeds, ephemeral=True)
+
+    @debug.sub_command(name="memory", description="Profiler les allocations mémoire et poster le diff dans les logs")
+    async def memory(
+        self,
+        inter: ApplicationCommandInteraction,
+        duree: int = commands.Param(default=60, ge=5, le=600, description="La durée du profil en secondes."),
+        nombre: int = commands.Param(default=15, ge=1, le=40, description="Le nombre de lignes à afficher."),
+    ):
+        if MemoryProfiler.running:
+            await inter.response.send_message("Un profil mémoire est déjà en cours.", ephemeral=True)
+            return
+        await inter.response.send_message(
+            f"Profil mémoire en cours pendant {duree} s, le résultat sera posté dans le salon de logs.",
+            ephemeral=True,
+        )
+        profile = await MemoryProfiler.profile(duree, nombre)
+        if profile is None:
+            return
+        lines = [f"{size / 1024:>+9.1f} KiB {count:>+7} {line}" for line, size, count in profile.lines]
+        groups = [
+            f"{name:<8} {size / 1024:>+9.1f} KiB"
+            for name, size in sorted(profile.groups.items(), key=lambda item: item[1], reverse=True)
+        ]
+        embed = disnake.Embed(
+            title=":bar_chart: __**MEMORY**__",
+            description="```" + "\n".join(lines)[:4000] + "```",
+            color=disnake.Colour.blue(),
+        )
+        embed.add_field(name="Par groupe", value="```" + "\n".join(groups)[:1000] + "```", inline=False)
+        embed.set_footer(
+            text=f"Diff sur {duree} s ➖ {profile.total / 1024:+.1f} KiB au total"
+            + (" ➖ tracemalloc reste actif" if tracemalloc.is_tracing() else "")
+        )
+        await self.bot.log_channel.send(embed=embed)
+
+
+def setup(bot: commands.InteractionBot):
+    bot.add_cog(Debug(bot))
@@ -2,13 +2,27 @@
 import disnake
 from disnake import ApplicationCommandInteraction
 from disnake.ext import commands
+from disnake.ext import tasks
 
+from .cards import ChampionCards
 from .exceptions import *
+from .leaderboard import Leaderboards
+from .links import AccountLinks
+from .links import Link
+from .search import ChampionIndex
+from .spectator import SpectatorWatcher
+from .stores import store_samples
 from .view import *
+from .warmup import ChampionWarmup
 from .watcher import *
 from bot.bot import Bot
+from bot.executor import RenderExecutor
+from bot.metrics import METRICS
 from modules.Assets import *
 
+# The leaderboards ask Discord for the linked members of a guild by id, which does not need the members intent.
+INTENTS = disnake.Intents(guilds=True)
+
 
 def warning(message: str) -> disnake.Embed:
     return disnake.Embed(title="⚠", description=message, color=disnake.Colour.orange()).set_thumbnail(
@@ -33,7 +47,7 @@ class PoroFeed(disnake.ui.View):
     )
     async def feed(self, button: disnake.ui.Button, interaction: disnake.MessageInteraction):
         self.counter += 1
-        logging.debug(f"PoroFeedView#{self.id} counter is now {self.counter}.")
+        logging.debug("PoroFeedView#%s counter is now %s.", self.id, self.counter)
         if self.counter < 10:
             await interaction.response.edit_message(
                 embed=disnake.Embed(description="Continue à nourrir le poro !")
@@ -42,7 +56,7 @@ class PoroFeed(disnake.ui.View):
                 view=self,
             )
         else:
-            logging.debug(f"PoroFeedView#{self.id} is at max ({self.counter}).")
+            logging.debug("PoroFeedView#%s is at max (%s).", self.id, self.counter)
             self.remove_item(button)
             await interaction.response.edit_message(
                 embed=disnake.Embed(description="*#Explosion de poros*").set_image(
@@ -53,7 +67,7 @@ class PoroFeed(disnake.ui.View):
 
     async def on_timeout(self) -> None:
         await self.inter.delete_original_message()
-        logging.debug(f"PoroFeedView#{self.id} timeout")
+        logging.debug("PoroFeedView#%s timeout", self.id)
 
 
 class Lol(commands.Cog):
@@ -63,6 +77,103 @@ class Lol(commands.Cog):
         Get the member dict for the lore from the "Members.json" file next to it.
         """
         self.bot: Bot = bot
+        self.champions: Optional[ChampionIndex] = None
+        self.refresh_static_data.start()
+        self.prewarm_champions.start()
+        self.refresh_leaderboards.start()
+        METRICS.collectors["lol_stores"] = store_samples
+        METRICS.collectors["lol_render"] = lambda: [
+            ("porobot_render_cache", {"stat": stat}, value) for stat, value in RenderCache.stats().items()
+        ]
+
+    async def cog_load(self) -> None:
+        await AccountLinks.open()
+        # disnake runs this in a task, so the commands may come first: the live game view waits for the seed too.
+        await StaticData.seed()
+
+    def cog_unload(self) -> None:
+        self.refresh_static_data.cancel()
+        self.prewarm_champions.cancel()
+        self.refresh_leaderboards.cancel()
+        METRICS.collectors.pop("lol_stores", None)
+        METRICS.collectors.pop("lol_render", None)
+        SpectatorWatcher.stop()
+        RenderExecutor.shutdown()
+
+    @tasks.loop(hours=1)
+    async def refresh_static_data(self):
+        await StaticData.refresh()
+
+    @refresh_static_data.before_loop
+    async def before_refresh_static_data(self):
+        await StaticData.seed()
+
+    @tasks.loop(hours=1)
+    async def prewarm_champions(self):
+        await ChampionWarmup.run()
+        if ChampionWarmup.patch and ChampionCards.patch != ChampionWarmup.patch:
+            # In a cluster, the first worker builds the cards and the others load them once they are written.
+            if not self.bot.cluster_id:
+                await ChampionCards.build(ChampionWarmup.patch)
+            else:
+                ChampionCards.load()
+        await self.refresh_champion_index()
+
+    async def refresh_champion_index(self) -> ChampionIndex:
+        self.champions = ChampionIndex((await champion_keys_cache.data)["name_by_id"].values())
+        return self.champions
+
+    @prewarm_champions.before_loop
+    async def before_prewarm_champions(self):
+        await self.bot.wait_until_ready()
+
+    async def summoner(self, inter: ApplicationCommandInteraction, invocateur: Optional[str]) -> Optional[Summoner]:
+        """Summoner named `invocateur`, or the one linked to the author when empty (without any name lookup).
+
+        Answers the interaction with a warning and returns None when there is none. A link to a summoner that no longer
+        exists is dropped.
+        """
+        link = None
+        try:
+            if invocateur:
+                return await Summoner(name=invocateur).get()
+            link = await AccountLinks.get(inter.author.id)
+            if link is not None:
+                return await Summoner(id=link.summoner_id, platform=link.platform).get()
+        except NotFound:
+            if link is not None:
+                await AccountLinks.unlink(inter.author.id)
+                await inter.edit_original_message(
+                    embed=warning(
+                        f"L'invocateur lié à ton compte, ***{link.name}***, n'existe plus. Lie ton compte à nouveau "
+                        "avec `/lier`."
+                    ),
+                    view=None,
+                )
+                return None
+            await inter.edit_original_message(
+                embed=disnake.Embed(
+                    title="Invocateur inconnu",
+                    description=f"Le nom d'invocateur ***{invocateur}*** ne correspond à aucun invocateur...",
+                ).set_footer(text="Tu peux rejeter ce message pour le faire disparaitre"),
+                view=None,
+            )
+            await inter.delete_original_message(delay=3)
+            return None
+        await inter.edit_original_message(
+            embed=warning("Donne un nom d'invocateur ou lie ton compte avec `/lier` pour pouvoir le laisser vide.")
+        )
+        return None
+
+    @tasks.loop(minutes=10)
+    async def refresh_leaderboards(self):
+        if self.bot.cluster_id is not None:
+            await AccountLinks.reload()
+        await Leaderboards.refresh(self.bot.guilds)
+
+    @refresh_leaderboards.before_loop
+    async def before_refresh_leaderboards(self):
+        await self.bot.wait_until_ready()
 
     @commands.slash_command(description="Nourrir le poro avec des porosnacks jusqu'à le faire exploser")
     async def porosnack(self, inter: ApplicationCommandInteraction):
@@ -78,64 +189,119 @@ class Lol(commands.Cog):
         self,
         inter: ApplicationCommandInteraction,
         invocateur: str = commands.Param(
+            default=None,
             description="Le nom de l'invocateur à rechercher. Peut être vide pour soit-même si tu as lié ton compte",
         ),
     ):
         await inter.response.defer(ephemeral=True)
-        view = CurrentGameView(invocateur)
-        await view.start(inter)
+        summoner = await self.summoner(inter, invocateur)
+        if summoner:
+            view = CurrentGameView(summoner.name, summoner=summoner)
+            await view.start(inter)
 
     @commands.slash_command(name="invocateur", description="Info sur un invocateur")
     async def invocateur(
         self,
         inter: ApplicationCommandInteraction,
-        invocateur: str = commands.Param(description="Le nom de l'invocateur."),
+        invocateur: str = commands.Param(
+            default=None, description="Le nom de l'invocateur. Peut être vide pour soit-même si tu as lié ton compte"
+        ),
     ):
         await inter.response.defer(ephemeral=False)
-        try:
-            summoner = await Summoner(name=invocateur).get()
+        summoner = await self.summoner(inter, invocateur)
+        if summoner:
             await inter.edit_original_message(embed=await summoner.embed)
+
+    @commands.user_command(name="Invocateur")
+    async def user_invocateur(self, inter: disnake.UserCommandInteraction):
+        await inter.response.defer(ephemeral=True)
+        link = await AccountLinks.get(inter.target.id)
+        if link is None:
+            await inter.edit_original_message(embed=warning(f"{inter.target.mention} n'a pas lié son compte."))
+            return
+        try:
+            summoner = await Summoner(id=link.summoner_id, platform=link.platform).get()
         except NotFound:
             await inter.edit_original_message(
-                embed=disnake.Embed(
-                    title="Invocateur inconnu",
-                    description=f"Le nom d'invocateur ***{invocateur}*** ne correspond à aucun invocateur...",
-                ).set_footer(text="Tu peux rejeter ce message pour le faire disparaitre"),
-                view=None,
+                embed=warning(f"L'invocateur lié à {inter.target.mention} n'existe plus.")
             )
-            await inter.delete_original_message(delay=3)
+            return
+        await inter.edit_original_message(embed=await summoner.embed)
 
     @commands.slash_command(name="masteries", description="Info sur les masteries d'un invocateur")
     async def masteries(
         self,
         inter: ApplicationCommandInteraction,
-        invocateur: str = commands.Param(description="Le nom de l'invocateur."),
+        invocateur: str = commands.Param(
+            default=None, description="Le nom de l'invocateur. Peut être vide pour soit-même si tu as lié ton compte"
+        ),
+    ):
+        await inter.response.defer(ephemeral=True)
+        summoner = await self.summoner(inter, invocateur)
+        if not summoner:
+            return
+        masteries = await summoner.champion_masteries.get()
+        await inter.edit_original_message(
+            embed=disnake.Embed(
+                title="Envoie en privé", description=f"La list des maitrises va t'être envoyé en privé."
+            ).set_footer(text="Tu peux rejeter ce message pour le faire disparaitre"),
+            view=None,
+        )
+        embeds = await masteries.embeds
+        i = 0
+        while len(embeds) > 10 * (i + 1):
+            await inter.author.send(embeds=embeds[10 * i : 10 * (i + 1)])
+            i += 1
+        await inter.author.send(embeds=embeds[10 * i :])
+
+    @commands.slash_command(name="lier", description="Lier ton compte Discord à ton invocateur")
+    async def lier(
+        self,
+        inter: ApplicationCommandInteraction,
+        invocateur: str = commands.Param(description="Le nom de ton invocateur."),
     ):
         await inter.response.defer(ephemeral=True)
         try:
             summoner = await Summoner(name=invocateur).get()
-            masteries = await summoner.champion_masteries.get()
-            await inter.edit_original_message(
-                embed=disnake.Embed(
-                    title="Envoie en privé", description=f"La list des maitrises va t'être envoyé en privé."
-                ).set_footer(text="Tu peux rejeter ce message pour le faire disparaitre"),
-                view=None,
-            )
-            embeds = await masteries.embeds
-            i = 0
-            while len(embeds) > 10 * (i + 1):
-                await inter.author.send(embeds=embeds[10 * i : 10 * (i + 1)])
-                i += 1
-            await inter.author.send(embeds=embeds[10 * i :])
         except NotFound:
             await inter.edit_original_message(
-                embed=disnake.Embed(
-                    title="Invocateur inconnu",
-                    description=f"Le nom d'invocateur ***{invocateur}*** ne correspond à aucun invocateur...",
-                ).set_footer(text="Tu peux rejeter ce message pour le faire disparaitre"),
-                view=None,
+                embed=warning(f"Le nom d'invocateur ***{invocateur}*** ne correspond à aucun invocateur...")
             )
-            await inter.delete_original_message(delay=3)
+            return
+        await AccountLinks.link(Link(inter.author.id, summoner.puuid, summoner.id, summoner.platform, summoner.name))
+        await inter.edit_original_message(
+            embed=disnake.Embed(
+                description=f"Ton compte est maintenant lié à l'invocateur **{summoner.name}**.",
+                color=disnake.Colour.green(),
+            )
+        )
+
+    @commands.slash_command(name="delier", description="Délier ton compte Discord de ton invocateur")
+    async def delier(self, inter: ApplicationCommandInteraction):
+        if await AccountLinks.unlink(inter.author.id):
+            await inter.response.send_message(
+                embed=disnake.Embed(description="Ton compte n'est plus lié.", color=disnake.Colour.green()),
+                ephemeral=True,
+            )
+        else:
+            await inter.response.send_message(embed=warning("Ton compte n'est lié à aucun invocateur."), ephemeral=True)
+
+    @commands.slash_command(name="leaderboard", description="Classement ranked des membres du serveur")
+    @commands.guild_only()
+    async def leaderboard(
+        self,
+        inter: ApplicationCommandInteraction,
+        page: int = commands.Param(default=1, ge=1, description="La page du classement."),
+    ):
+        if Leaderboards.refreshed_at is None:
+            await inter.response.send_message(
+                embed=warning("Le classement est en cours de calcul, réessaie dans quelques minutes."), ephemeral=True
+            )
+            return
+        # The first time, the linked members of the guild are asked to Discord.
+        await inter.response.defer()
+        board = await Leaderboards.get(inter.guild)
+        await inter.edit_original_message(embed=board.embed(inter.guild, page - 1))
 
     @commands.slash_command(name="clash", description="Scouter une team clash à partir du nom d'un des joueurs")
     async def clash(
@@ -153,21 +319,16 @@ class Lol(commands.Cog):
         self, inter: ApplicationCommandInteraction, nom: str = commands.Param(description="Le nom du champion.")
     ):
         await inter.response.defer(ephemeral=True)
-        if nom in (await champion_keys_cache.data)["name_by_id"].values():
-            championView = await ChampionView(nom).get()
+        name = (self.champions or await self.refresh_champion_index()).resolve(nom)
+        if name:
+            championView = await ChampionView(name).get()
             await championView.start(inter)
         else:
             await inter.edit_original_message(embed=warning(f"Not champion with name **{nom}**"))
 
-    @champion.autocomplete("nom")  # TODO difflib to find closed match (cf. draft)
+    @champion.autocomplete("nom")
     async def autocomp_championt(self, inter: disnake.ApplicationCommandInteraction, user_input: str):
-        champions = []
-        for champion in (await champion_keys_cache.data)["name_by_id"].values():
-            if champion.lower().startswith(user_input.lower()):
-                champions.append(champion)
-        if len(champions) > 25:
-            champions = champions[:25]
-        return champions
+        return (self.champions or await self.refresh_champion_index()).complete(user_input)
 
     @commands.slash_command(description="Voir combien de temps et d'argent tu as dépensés sur LOL")
     async def wasteonlol(self, inter: ApplicationCommandInteraction):
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Precompiled champion cards: the embeds of every `ChampionView` tab of every champion, rendered once per patch.
+
+File layout: the magic and format version, the length of the json index (4 bytes, big endian), the index
+`{"patch", "names": {name: id}, "records": {"<id>:<tab>": [offset, length]}}`, then the records, each one the zlib
+compressed json list of the embed dicts of one tab. Offsets are relative to the end of the index.
+
+Build it for the current patch from the repository root with:
+    python -m cogs.Lol.cards
+"""
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import disnake
+from pyot.utils.lol.champion import champion_keys_cache
+
+from .concurrency import gather_bounded
+from .render import RenderCache
+from .watcher import MerakiChampion
+from bot.executor import RenderExecutor
+from bot.tracing import traced
+
+
+class ChampionCards:
+    path: str = os.path.join("data", "champion_cards.bin")
+    MAGIC: bytes = b"PCRD"
+    VERSION: int = 1
+    _header = struct.Struct(">4sHI")
+
+    patch: Optional[str] = None
+    names: Dict[str, int] = {}
+    records: Dict[str, Tuple[int, int]] = {}
+    _file = None
+    _map: Optional[mmap.mmap] = None
+    _start: int = 0
+
+    @classmethod
+    def load(cls) -> bool:
+        """Map the cards file, keeping only its index in memory. Returns whether a valid file was found."""
+        cls.close()
+        try:
+            file = open(cls.path, "rb")
+        except OSError:
+            return False
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, index_size = cls._header.unpack_from(data, 0)
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ValueError(f"unknown format {magic!r} v{version}")
+            index = json.loads(data[cls._header.size : cls._header.size + index_size])
+        except (OSError, ValueError, struct.error) as e:
+            logging.warning(f"[ChampionCards] Ignoring {cls.path}: {e!r}")
+            file.close()
+            return False
+        cls._file, cls._map = file, data
+        cls._start = cls._header.size + index_size
+        cls.patch = index["patch"]
+        cls.names = index["names"]
+        cls.records = {key: tuple(record) for key, record in index["records"].items()}
+        logging.info(f"[ChampionCards] Loaded {len(cls.records)} cards of patch {cls.patch}.")
+        return True
+
+    @classmethod
+    def close(cls) -> None:
+        if cls._map is not None:
+            cls._map.close()
+            cls._file.close()
+        cls._file, cls._map = None, None
+        cls.patch, cls.names, cls.records = None, {}, {}
+
+    @classmethod
+    def champion_id(cls, name: str) -> Optional[int]:
+        return cls.names.get(name)
+
+    @classmethod
+    @traced("card")
+    def get(cls, champion_id: int, tab: str) -> Optional[List[disnake.Embed]]:
+        """Embeds of a tab read from the file, None if the champion has no card."""
+        record = cls.records.get(f"{champion_id}:{tab}")
+        if record is None or cls._map is None:
+            return None
+        offset, length = record
+        start = cls._start + offset
+        payload = json.loads(zlib.decompress(cls._map[start : start + length]))
+        return [disnake.Embed.from_dict(data) for data in payload]
+
+    @classmethod
+    def write(cls, path: str, index: bytes, blobs: List[bytes]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(cls._header.pack(cls.MAGIC, cls.VERSION, len(index)))
+            f.write(index)
+            for blob in blobs:
+                f.write(blob)
+
+    @classmethod
+    async def build(cls, patch: str) -> None:
+        """Render every tab of every champion and replace the cards file with them."""
+        started = time.perf_counter()
+        name_by_id = (await champion_keys_cache.data)["name_by_id"]
+        champions = await gather_bounded(*[MerakiChampion(id=id).get() for id in name_by_id])
+        names: Dict[str, int] = {}
+        records: Dict[str, List[int]] = {}
+        blobs: List[bytes] = []
+        offset = 0
+        for id, champion in zip(name_by_id, champions):
+            if isinstance(champion, BaseException):
+                logging.warning(f"[ChampionCards] Skipping champion {id}: {champion!r}")
+                continue
+            names[name_by_id[id]] = int(id)
+            payloads = await RenderExecutor.run(
+                MerakiChampion.render_tabs, champion.raw(), list(RenderCache.tabs.values())
+            )
+            for tab, payload in zip(RenderCache.tabs, payloads):
+                blob = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("UTF-8"))
+                records[f"{id}:{tab}"] = [offset, len(blob)]
+                blobs.append(blob)
+                offset += len(blob)
+            # With the inline executor rendering is CPU bound, let the other tasks run between two champions.
+            await asyncio.sleep(0)
+        index = json.dumps({"patch": patch, "names": names, "records": records}, separators=(",", ":")).encode("UTF-8")
+        tmp = cls.path + ".tmp"
+        await asyncio.get_running_loop().run_in_executor(None, cls.write, tmp, index, blobs)
+        cls.close()
+        os.replace(tmp, cls.path)
+        cls.load()
+        logging.info(
+            f"[ChampionCards] Built {len(records)} cards of {len(names)} champions for patch {patch} "
+            f"({(cls._header.size + len(index) + offset) // 1024} KiB) in {time.perf_counter() - started:.1f}s."
+        )
+
+
+ChampionCards.load()
+
+
+if __name__ == "__main__":
+    from .warmup import ChampionWarmup
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        await ChampionCards.build(await ChampionWarmup.current_patch())
+
+    asyncio.run(main())
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+from typing import Any
+from typing import Awaitable
+from typing import List
+from typing import Optional
+
+FANOUT_LIMIT: int = int(os.getenv("RIOT_FANOUT_LIMIT", 10))
+
+
+async def gather_bounded(*aws: Awaitable, limit: Optional[int] = None) -> List[Any]:
+    """Await all `aws` concurrently, at most `limit` (default `RIOT_FANOUT_LIMIT`) at a time.
+
+    Results are returned in the order of `aws`. A failing awaitable does not cancel the others: its exception is
+    returned in place of its result, so callers can render a placeholder for it. That includes the CancelledError of a
+    cancelled request, which is not an Exception: callers check the results with `isinstance(result, BaseException)`.
+    The cap only bounds the number of requests in flight; the pipeline rate limiter still paces them.
+    """
+    semaphore = asyncio.Semaphore(limit or FANOUT_LIMIT)
+
+    async def bounded(aw: Awaitable) -> Any:
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*[bounded(aw) for aw in aws], return_exceptions=True)
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+"""
+Riot data gateway: a process owning the pipeline stores below the memory cache (disk cache, single flights, scheduler
+and rate limits), serving the pipeline tokens of the bot processes on a Unix socket (RIOT_GATEWAY_SOCKET).
+
+Every message is a frame of a 10 bytes header followed by a marshal payload:
+    op (1 byte), flags (1 byte), request id (4 bytes), payload length (4 bytes)
+    bot -> gateway: GET, flags = priority lane, payload = token dict
+    bot -> gateway: CANCEL, the request of the id was cancelled, no payload
+    bot -> gateway: INVALIDATE, payload = list of the methods to drop from the caches
+    gateway -> bot: the op of the request, flags = status, payload = (response, fetched at) or (error code, message)
+"""
+import asyncio
+import itertools
+import logging
+import marshal
+import os
+import signal
+import struct
+from enum import IntEnum
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from pyot.conf.pipeline import pipelines
+from pyot.core.exceptions import Forbidden
+from pyot.core.exceptions import MethodNotAllowed
+from pyot.core.exceptions import NoContent
+from pyot.core.exceptions import NotFindable
+from pyot.core.exceptions import NotFound
+from pyot.core.exceptions import PyotException
+from pyot.core.exceptions import RateLimited
+from pyot.core.exceptions import ServerError
+from pyot.pipeline.core import Pipeline
+from pyot.pipeline.token import PipelineToken
+from pyot.stores.base import StoreType
+
+from .scheduler import Priority
+from .scheduler import priority
+from .stores import fetched_at
+from .stores import Freshness
+from .stores import PipelineStore
+from .stores import store_samples
+from bot.metrics import METRICS
+from bot.metrics import MetricsServer
+from bot.tracing import span
+
+HEADER = struct.Struct(">BBII")
+
+
+class Op(IntEnum):
+    GET = 1
+    CANCEL = 2
+    INVALIDATE = 3
+
+
+class Status(IntEnum):
+    OK = 0
+    NOT_FOUND = 1
+    ERROR = 2
+
+
+ERRORS = {
+    NoContent.code: NoContent,
+    Forbidden.code: Forbidden,
+    NotFound.code: NotFound,
+    MethodNotAllowed.code: MethodNotAllowed,
+    RateLimited.code: RateLimited,
+}
+
+
+def frame(op: Op, flags: int, id: int, payload: bytes = b"") -> bytes:
+    return HEADER.pack(op, flags, id, len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[int, int, int, bytes]:
+    op, flags, id, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    return op, flags, id, await reader.readexactly(length) if length else b""
+
+
+def error(code: int, message: str, origin: str) -> PyotException:
+    """Rebuild the pyot exception of an error reply."""
+    if code in ERRORS:
+        return ERRORS[code](origin)
+    if code in ServerError.messages:
+        return ServerError(code, origin)
+    if code == NotFindable.code:
+        return NotFindable()
+    exception = PyotException(message)
+    exception.code = code
+    return exception
+
+
+class RiotGateway:
+    """Server of the data gateway, getting the tokens from the pipeline of its process, one task per request."""
+
+    def __init__(self, path: str, game: str = "lol"):
+        self.path: str = path
+        self.game: str = game
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.connections: Set[asyncio.Task] = set()
+
+    @classmethod
+    def serve(cls, path: str) -> None:
+        """Run a gateway until SIGINT or SIGTERM, with the stores of the `LolPipeline` configuration."""
+        # This process owns the stores and the rate limits, it is neither a client of a gateway nor of a launcher.
+        os.environ.pop("RIOT_GATEWAY_SOCKET", None)
+        os.environ.pop("RATE_LIMIT_SOCKET", None)
+        from . import watcher  # noqa: F401, activates the pipeline
+
+        asyncio.run(cls(path).run())
+
+    async def run(self) -> None:
+        metrics_server = None
+        if os.getenv("GATEWAY_METRICS_PORT"):
+            METRICS.collectors["lol_stores"] = store_samples
+            metrics_server = MetricsServer(
+                os.getenv("METRICS_HOST", "127.0.0.1"), int(os.getenv("GATEWAY_METRICS_PORT"))
+            )
+            await metrics_server.start()
+        stopped = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(sig, stopped.set)
+        await self.start()
+        try:
+            await stopped.wait()
+        finally:
+            await self.stop()
+            if metrics_server is not None:
+                await metrics_server.stop()
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.server = await asyncio.start_unix_server(self.handle, self.path)
+        logging.info(f"[RiotGateway] Serving on {self.path}")
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            for task in self.connections:
+                task.cancel()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+            await self.server.wait_closed()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self.connections.add(task)
+        requests: Dict[int, asyncio.Task] = {}
+        try:
+            while True:
+                op, flags, id, payload = await read_frame(reader)
+                if op == Op.CANCEL:
+                    if id in requests:
+                        requests[id].cancel()
+                    continue
+                if op == Op.GET:
+                    request = asyncio.ensure_future(self.get(writer, id, Priority(flags), payload))
+                elif op == Op.INVALIDATE:
+                    request = asyncio.ensure_future(self.invalidate(writer, id, payload))
+                else:
+                    logging.warning(f"[RiotGateway] Unknown op {op}, closing the connection")
+                    break
+                requests[id] = request
+                request.add_done_callback(lambda _, id=id: requests.pop(id, None))
+        except asyncio.IncompleteReadError:
+            pass
+        except (ConnectionError, ValueError, EOFError) as e:
+            logging.warning(f"[RiotGateway] Connection closed: {e!r}")
+        except asyncio.CancelledError:
+            pass
+        finally:
+            for request in list(requests.values()):
+                request.cancel()
+            self.connections.discard(task)
+            writer.close()
+
+    async def get(self, writer: asyncio.StreamWriter, id: int, lane: Priority, payload: bytes) -> None:
+        # Each request runs in its own task, the lane only applies to it.
+        priority.set(lane)
+        token = PipelineToken.load(marshal.loads(payload))
+        try:
+            response = await self.pipeline.get(token)
+            # The caches of the bot keep the age of the response.
+            status, reply = Status.OK, marshal.dumps((response, PipelineStore.fetched(token)))
+        except NotFound:
+            status, reply = Status.NOT_FOUND, b""
+        except Exception as e:
+            status, reply = Status.ERROR, marshal.dumps((getattr(e, "code", 500), str(e)))
+            if not isinstance(e, PyotException):
+                logging.warning(f"[RiotGateway] Getting {token.value} failed: {e!r}")
+        await self.reply(writer, Op.GET, status, id, reply)
+
+    async def invalidate(self, writer: asyncio.StreamWriter, id: int, payload: bytes) -> None:
+        methods: List[str] = marshal.loads(payload)
+        dropped = 0
+        for store in PipelineStore.stores.get(self.game, []):
+            invalidate = getattr(store, "invalidate", None)
+            if invalidate is not None:
+                dropped += await invalidate(methods)
+        logging.info(f"[RiotGateway] Dropped {dropped} cached entries of {methods}")
+        await self.reply(writer, Op.INVALIDATE, Status.OK, id, marshal.dumps(dropped))
+
+    @staticmethod
+    async def reply(writer: asyncio.StreamWriter, op: Op, status: Status, id: int, payload: bytes) -> None:
+        if writer.is_closing():
+            return
+        writer.write(frame(op, status, id, payload))
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass  # The bot process is gone, its connection is closed by `handle`.
+
+    @property
+    def pipeline(self) -> Pipeline:
+        return pipelines[self.game]
+
+
+class GatewayStore(PipelineStore):
+    """Service store getting the tokens from the Riot data gateway listening on `path`.
+
+    The requests of every caller share one connection and carry the priority lane of their caller. A request cancelled
+    by its caller is cancelled in the gateway too. While the gateway can not be reached, the requests fail with a 503.
+    """
+
+    type = StoreType.SERVICE
+
+    def __init__(
+        self,
+        game: str,
+        path: str,
+        timeout: float = 120,
+        policy: Optional[Mapping[str, Freshness]] = None,
+        log_level: int = 0,
+    ):
+        super().__init__(game, policy, log_level)
+        self.path: str = path
+        self.timeout: float = timeout
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.lock: Optional[asyncio.Lock] = None
+        self.listener: Optional[asyncio.Task] = None
+        self.pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self.requests: int = 0
+        self.errors: int = 0
+        self.connections: int = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "pending": len(self.pending),
+            "connections": self.connections,
+        }
+
+    async def connect(self) -> None:
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+                self.listener = asyncio.ensure_future(self.listen(self.reader, self.writer))
+                self.connections += 1
+                logging.info(f"[GatewayStore] Connected to {self.path}")
+
+    async def listen(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                _, status, id, payload = await read_frame(reader)
+                future = self.pending.pop(id, None)
+                if future is not None and not future.done():
+                    future.set_result((status, payload))
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            logging.warning(f"[GatewayStore] Connection to {self.path} lost: {e!r}")
+        finally:
+            writer.close()
+            if self.writer is writer:
+                self.reader = self.writer = None
+            pending, self.pending = self.pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionResetError("Connection to the gateway lost"))
+
+    async def request(self, op: Op, flags: int, payload: bytes, origin: str) -> Tuple[int, bytes]:
+        self.requests += 1
+        try:
+            await self.connect()
+        except OSError as e:
+            self.errors += 1
+            raise ServerError(503, origin) from e
+        id = next(self._ids) % 2**32
+        future = asyncio.get_running_loop().create_future()
+        writer = self.writer
+        if writer is None:
+            self.errors += 1
+            raise ServerError(503, origin)
+        self.pending[id] = future
+        try:
+            writer.write(frame(op, flags, id, payload))
+            await writer.drain()
+            return await asyncio.wait_for(future, self.timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            if self.pending.pop(id, None) is not None and not writer.is_closing():
+                writer.write(frame(Op.CANCEL, 0, id))
+            if isinstance(e, asyncio.TimeoutError):
+                self.errors += 1
+                raise ServerError(504, origin) from e
+            raise
+        except ConnectionError as e:
+            self.pending.pop(id, None)
+            self.errors += 1
+            raise ServerError(503, origin) from e
+
+    async def get(self, token: PipelineToken, **kwargs) -> Any:
+        with span(token.method, "RiotGateway"):
+            status, payload = await self.request(Op.GET, priority.get(), marshal.dumps(token.dict()), token.value)
+        if status == Status.OK:
+            response, fetched = marshal.loads(payload)
+            fetched_at.set((token.value, fetched))
+            return response
+        if status == Status.NOT_FOUND:
+            raise NotFound(token.value)
+        raise error(*marshal.loads(payload), token.value)
+
+    async def invalidate(self, methods: List[str]) -> int:
+        """Drop every entry of the `methods` endpoints from the caches of the gateway, returns the number dropped."""
+        _, payload = await self.request(Op.INVALIDATE, 0, marshal.dumps(list(methods)), self.path)
+        return marshal.loads(payload)
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from bisect import insort
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+import disnake
+
+from .concurrency import gather_bounded
+from .links import AccountLinks
+from .scheduler import background
+from .watcher import SummonerLeague
+from modules.Assets import Emotes
+
+
+class Rank(NamedTuple):
+    """Ranked entry of a queue, with the attribute names of `lol.league.SummonerLeagueEntryData`."""
+
+    tier: str
+    rank: str
+    league_points: int
+
+    @classmethod
+    def from_entry(cls, entry) -> Optional["Rank"]:
+        return cls(entry.tier, entry.rank, entry.league_points) if entry else None
+
+
+class Standing(NamedTuple):
+    discord_id: int
+    name: str
+    solo: Optional[Rank]
+    flex: Optional[Rank]
+
+    @property
+    def key(self) -> Tuple[int, int, str, int]:
+        """Sort key, best standing first: solo score, then flex score, then name."""
+        return (
+            -SummonerLeague.sorting_score(self.solo),
+            -SummonerLeague.sorting_score(self.flex),
+            self.name.lower(),
+            self.discord_id,
+        )
+
+    @staticmethod
+    def rank_to_line(rank: Optional[Rank]) -> str:
+        if rank:
+            return f"{Emotes.Lol.Tier.get(rank.tier)}{Emotes.Lol.Rank.get(rank.rank)} *{rank.league_points} LP*"
+        return f"{Emotes.Lol.Tier.get('UNRANKED')}{Emotes.Lol.Rank.NONE}"
+
+    def line(self, position: int) -> str:
+        return f"**{position}.** <@{self.discord_id}> *{self.name}* ➖ {self.rank_to_line(self.solo)} ➖ {self.rank_to_line(self.flex)}"
+
+
+class Leaderboard:
+    """Standings of the linked members of a guild, kept sorted as they change one at a time."""
+
+    def __init__(self):
+        self.keys: List[Tuple[int, int, str, int]] = []
+        self.standings: Dict[int, Standing] = {}
+        self.updated_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def update(self, standing: Standing) -> bool:
+        """Insert or move the standing of a member, returns whether the leaderboard changed."""
+        previous = self.standings.get(standing.discord_id)
+        if previous == standing:
+            return False
+        if previous is not None:
+            del self.keys[bisect_left(self.keys, previous.key)]
+        insort(self.keys, standing.key)
+        self.standings[standing.discord_id] = standing
+        return True
+
+    def remove(self, discord_id: int) -> bool:
+        previous = self.standings.pop(discord_id, None)
+        if previous is None:
+            return False
+        del self.keys[bisect_left(self.keys, previous.key)]
+        return True
+
+    def page(self, page: int, size: int = 10) -> List[Tuple[int, Standing]]:
+        """Standings of the `page`-th page (from 0) with their position."""
+        start = page * size
+        return [(start + i + 1, self.standings[key[-1]]) for i, key in enumerate(self.keys[start : start + size])]
+
+    def embed(self, guild: disnake.Guild, page: int, size: int = 10) -> disnake.Embed:
+        pages = max(1, -(-len(self) // size))
+        page = min(max(page, 0), pages - 1)
+        lines = [standing.line(position) for position, standing in self.page(page, size)]
+        return disnake.Embed(
+            title=f"{Emotes.Lol.LOGO} __**CLASSEMENT {guild.name.upper()}**__",
+            description="\n".join(lines) if lines else "*Aucun membre n'a lié son compte avec `/lier`.*",
+            color=disnake.Colour.blue(),
+        ).set_footer(text=f"Page {page + 1}/{pages} ➖ Solo/Duo puis Flex")
+
+
+class Leaderboards:
+    """Leaderboard of the guilds where it was asked, refreshed in the background so the command never calls the Riot API.
+
+    The standings of every linked account are refreshed together. The bot does not cache the members (no members
+    intent), so the linked members of a guild are asked to Discord by id when its leaderboard is first shown, then
+    again every `members_ttl` seconds.
+    """
+
+    members_ttl: float = 60 * 60
+    standings: Dict[int, Standing] = {}
+    refreshed_at: Optional[float] = None
+    boards: Dict[int, Leaderboard] = {}
+    members: Dict[int, Tuple[float, List[int]]] = {}
+
+    @classmethod
+    async def get(cls, guild: disnake.Guild) -> Optional[Leaderboard]:
+        """Leaderboard of `guild`, None until the standings were refreshed once."""
+        if cls.refreshed_at is None:
+            return None
+        if guild.id not in cls.boards:
+            await cls.update(guild)
+        return cls.boards[guild.id]
+
+    @classmethod
+    async def linked_members(cls, guild: disnake.Guild) -> List[int]:
+        """Ids of the linked members of `guild`, asked at most every `members_ttl` seconds."""
+        queried_at, ids = cls.members.get(guild.id, (None, []))
+        if queried_at is not None and time.monotonic() - queried_at < cls.members_ttl:
+            return ids
+        linked = list(AccountLinks.linked)
+        try:
+            members: List[disnake.Member] = []
+            # Discord answers for at most 100 ids per request.
+            for i in range(0, len(linked), 100):
+                members += await guild.query_members(user_ids=linked[i : i + 100], limit=100, cache=False)
+        except (asyncio.TimeoutError, disnake.HTTPException) as e:
+            logging.warning(f"[Leaderboards] Could not get the linked members of {guild.id}: {e!r}")
+            return ids
+        ids = [member.id for member in members]
+        cls.members[guild.id] = (time.monotonic(), ids)
+        return ids
+
+    @classmethod
+    async def update(cls, guild: disnake.Guild) -> int:
+        """Update the leaderboard of `guild` from the standings, returns the number of changes."""
+        ids = {discord_id for discord_id in await cls.linked_members(guild) if discord_id in cls.standings}
+        board = cls.boards.setdefault(guild.id, Leaderboard())
+        changes = 0
+        for discord_id in set(board.standings) - ids:
+            changes += board.remove(discord_id)
+        for discord_id in ids:
+            changes += board.update(cls.standings[discord_id])
+        board.updated_at = time.time()
+        return changes
+
+    @classmethod
+    async def refresh(cls, guilds: Iterable[disnake.Guild]) -> None:
+        started = time.perf_counter()
+        links = list((await AccountLinks.get_many(AccountLinks.linked)).values())
+        with background():
+            leagues = await gather_bounded(
+                *[SummonerLeague(summoner_id=link.summoner_id, platform=link.platform).get() for link in links]
+            )
+        standings: Dict[int, Standing] = {}
+        for link, league in zip(links, leagues):
+            if isinstance(league, BaseException):
+                logging.debug("[Leaderboards] No league for %s: %r", link.name, league)
+                continue
+            standings[link.discord_id] = Standing(
+                link.discord_id, link.name, Rank.from_entry(league.solo), Rank.from_entry(league.flex)
+            )
+        cls.standings, cls.refreshed_at = standings, time.time()
+        guilds = {guild.id: guild for guild in guilds}
+        for guild_id in set(cls.boards) - set(guilds):
+            del cls.boards[guild_id]
+            cls.members.pop(guild_id, None)
+        changes = 0
+        for guild_id in list(cls.boards):
+            changes += await cls.update(guilds[guild_id])
+        logging.info(
+            f"[Leaderboards] Refreshed {len(standings)} linked accounts and the leaderboards of {len(cls.boards)} "
+            f"guilds ({changes} changes) in {time.perf_counter() - started:.1f}s."
+        )
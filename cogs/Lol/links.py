@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+
+
+class Link(NamedTuple):
+    discord_id: int
+    puuid: str
+    summoner_id: str
+    platform: str
+    name: str
+
+
+class AccountLinks:
+    """Discord accounts linked to a summoner with `/lier`, stored in SQLite and indexed by Discord id and by account.
+
+    Rows are read through an in-memory cache, so a linked user's summoner is known without any query after the first
+    one. The set of linked Discord ids is kept in memory for the leaderboards. All SQLite calls run on a single
+    dedicated thread so the event loop never waits on the disk; the file is opened by the Lol cog when it loads.
+    """
+
+    path: str = os.path.join("data", "links.sqlite3")
+
+    linked: Set[int] = set()
+    _by_discord_id: Dict[int, Optional[Link]] = {}
+    _by_summoner_id: Dict[str, Optional[Link]] = {}
+    _connection: Optional[sqlite3.Connection] = None
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AccountLinks")
+
+    @classmethod
+    async def _run(cls, function: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(cls._executor, function, *args)
+
+    @classmethod
+    def _connect(cls) -> sqlite3.Connection:
+        if cls._connection is None:
+            os.makedirs(os.path.dirname(cls.path), exist_ok=True)
+            connection = sqlite3.connect(cls.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS links (
+                    discord_id INTEGER PRIMARY KEY,
+                    puuid TEXT NOT NULL,
+                    summoner_id TEXT NOT NULL,
+                    platform TEXT NOT NULL,
+                    name TEXT NOT NULL
+                )"""
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS links_puuid ON links (puuid)")
+            connection.execute("CREATE INDEX IF NOT EXISTS links_summoner_id ON links (summoner_id)")
+            connection.commit()
+            cls._connection = connection
+            cls.linked = cls._linked()
+            logging.info(f"[AccountLinks] Opened {cls.path} ({len(cls.linked)} links).")
+        return cls._connection
+
+    @classmethod
+    def _linked(cls) -> Set[int]:
+        return {row[0] for row in cls._connect().execute("SELECT discord_id FROM links")}
+
+    @classmethod
+    def _select(cls, column: str, value) -> Optional[Link]:
+        row = cls._connect().execute(f"SELECT * FROM links WHERE {column} = ?", (value,)).fetchone()
+        return Link(*row) if row else None
+
+    @classmethod
+    def _select_many(cls, discord_ids: List[int]) -> List[Link]:
+        connection = cls._connect()
+        links: List[Link] = []
+        # Stay under the SQLite limit of variables per statement.
+        for i in range(0, len(discord_ids), 500):
+            chunk = discord_ids[i : i + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = connection.execute(f"SELECT * FROM links WHERE discord_id IN ({placeholders})", chunk)
+            links += [Link(*row) for row in rows]
+        return links
+
+    @classmethod
+    def _replace(cls, link: Link) -> None:
+        connection = cls._connect()
+        connection.execute("INSERT OR REPLACE INTO links VALUES (?, ?, ?, ?, ?)", link)
+        connection.commit()
+
+    @classmethod
+    def _delete(cls, discord_id: int) -> None:
+        connection = cls._connect()
+        connection.execute("DELETE FROM links WHERE discord_id = ?", (discord_id,))
+        connection.commit()
+
+    @classmethod
+    async def open(cls) -> None:
+        await cls._run(cls._connect)
+
+    @classmethod
+    async def reload(cls) -> None:
+        """Forget the cached rows, for the links made by the other workers of a cluster."""
+        cls.linked = await cls._run(cls._linked)
+        cls._by_discord_id.clear()
+        cls._by_summoner_id.clear()
+
+    @classmethod
+    async def get(cls, discord_id: int) -> Optional[Link]:
+        if discord_id not in cls._by_discord_id:
+            if cls._connection is None:
+                await cls.open()
+            link = await cls._run(cls._select, "discord_id", discord_id) if discord_id in cls.linked else None
+            cls._by_discord_id[discord_id] = link
+        return cls._by_discord_id[discord_id]
+
+    @classmethod
+    async def get_many(cls, discord_ids: Iterable[int]) -> Dict[int, Link]:
+        """Links of the linked users among `discord_ids`, in a single query for the ones not cached."""
+        if cls._connection is None:
+            await cls.open()
+        discord_ids = [discord_id for discord_id in discord_ids if discord_id in cls.linked]
+        missing = [discord_id for discord_id in discord_ids if discord_id not in cls._by_discord_id]
+        if missing:
+            for link in await cls._run(cls._select_many, missing):
+                cls._by_discord_id[link.discord_id] = link
+        return {
+            discord_id: cls._by_discord_id[discord_id]
+            for discord_id in discord_ids
+            if cls._by_discord_id.get(discord_id) is not None
+        }
+
+    @classmethod
+    async def by_summoner_id(cls, summoner_id: str) -> Optional[Link]:
+        if summoner_id not in cls._by_summoner_id:
+            cls._by_summoner_id[summoner_id] = await cls._run(cls._select, "summoner_id", summoner_id)
+        return cls._by_summoner_id[summoner_id]
+
+    @classmethod
+    async def by_puuid(cls, puuid: str) -> Optional[Link]:
+        return await cls._run(cls._select, "puuid", puuid)
+
+    @classmethod
+    async def link(cls, link: Link) -> None:
+        previous = await cls.get(link.discord_id)
+        await cls._run(cls._replace, link)
+        cls.linked.add(link.discord_id)
+        cls._by_discord_id[link.discord_id] = link
+        if previous is not None:
+            cls._by_summoner_id.pop(previous.summoner_id, None)
+        cls._by_summoner_id.pop(link.summoner_id, None)
+
+    @classmethod
+    async def unlink(cls, discord_id: int) -> bool:
+        previous = await cls.get(discord_id)
+        if previous is None:
+            return False
+        await cls._run(cls._delete, discord_id)
+        cls.linked.discard(discord_id)
+        cls._by_discord_id[discord_id] = None
+        cls._by_summoner_id.pop(previous.summoner_id, None)
+        return True
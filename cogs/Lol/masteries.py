@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from array import array
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from .search import normalize
+
+
+class Mastery(NamedTuple):
+    """Mastery of a summoner on a champion, with the attribute names of `lol.ChampionMastery`."""
+
+    champion_id: int
+    champion_level: int
+    champion_points: int
+
+
+class MasteryIndex:
+    """Champion masteries of a summoner, stored as parallel arrays sorted once by level then points.
+
+    Since the rows are sorted by level, each level is a contiguous range of rows: the ranges and the row of each
+    champion are computed at construction, so a champion, a level or the top n is found without sorting or scanning.
+    """
+
+    __slots__ = ("ids", "levels", "points", "rows", "buckets")
+
+    def __init__(self, masteries: Iterable[Tuple[int, int, int]]):
+        ordered = sorted(masteries, key=lambda mastery: (mastery[1], mastery[2]), reverse=True)
+        self.ids: array = array("H", [mastery[0] for mastery in ordered])
+        self.levels: array = array("B", [mastery[1] for mastery in ordered])
+        self.points: array = array("I", [mastery[2] for mastery in ordered])
+        self.rows: Dict[int, int] = {id: row for row, id in enumerate(self.ids)}
+        self.buckets: Dict[int, Tuple[int, int]] = {}
+        for row, level in enumerate(self.levels):
+            start, _ = self.buckets.get(level, (row, row))
+            self.buckets[level] = (start, row + 1)
+
+    @classmethod
+    def from_models(cls, masteries: Iterable) -> "MasteryIndex":
+        """Index `lol.ChampionMastery` like objects."""
+        return cls((mastery.champion_id, mastery.champion_level, mastery.champion_points) for mastery in masteries)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, row: int) -> Mastery:
+        return Mastery(self.ids[row], self.levels[row], self.points[row])
+
+    def get(self, champion_id: int) -> Optional[Mastery]:
+        row = self.rows.get(int(champion_id))
+        return None if row is None else self[row]
+
+    def by_name(self, name: str, id_by_key: Mapping[str, int]) -> Optional[Mastery]:
+        """Mastery on the champion named `name`, `id_by_key` maps the normalized champion names and keys to their id."""
+        champion_id = id_by_key.get(normalize(name))
+        return None if champion_id is None else self.get(champion_id)
+
+    def top(self, n: int = 3) -> List[Mastery]:
+        return [self[row] for row in range(min(n, len(self)))]
+
+    def level(self, level: int) -> List[Mastery]:
+        """Masteries of a level, highest points first."""
+        start, end = self.buckets.get(level, (0, 0))
+        return [self[row] for row in range(start, end)]
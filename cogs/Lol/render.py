@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import disnake
+
+from .warmup import ChampionWarmup
+from .watcher import MerakiChampion
+from bot.executor import RenderExecutor
+from bot.tracing import traced
+
+
+class RenderCache:
+    """Embeds of the `ChampionView` tabs, rendered once per champion and patch by the `RenderExecutor`.
+
+    The payloads are kept as embed dicts, the least recently used dropped past `max_entries`, and every call gets its
+    own `disnake.Embed` objects built from them. Concurrent renders of the same champion wait for the first one.
+    """
+
+    tabs: Dict[str, str] = {
+        "overview": "embeds",
+        "stats": "stats_embed",
+        "P": "Pembeds",
+        "Q": "Qembeds",
+        "W": "Wembeds",
+        "E": "Eembeds",
+        "R": "Rembeds",
+    }
+    max_entries: int = int(os.getenv("RENDER_CACHE_SIZE", 1024))
+
+    _data: "OrderedDict[Tuple[int, str, str], List[dict]]" = OrderedDict()
+    _rendering: "Dict[Tuple[int, str], asyncio.Future]" = {}
+    hits: int = 0
+    misses: int = 0
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        return {"hits": cls.hits, "misses": cls.misses, "entries": len(cls._data), "rendering": len(cls._rendering)}
+
+    @classmethod
+    @traced("champion")
+    async def render(cls, champion: MerakiChampion, tab: str) -> List[disnake.Embed]:
+        patch = ChampionWarmup.patch or "latest"
+        key = (champion.id, patch, tab)
+        payload = cls._data.get(key)
+        if payload is not None:
+            cls.hits += 1
+            cls._data.move_to_end(key)
+            return [disnake.Embed.from_dict(data) for data in payload]
+        # Every tab is rendered at once, the others are likely to be opened next and it is a single executor call.
+        future = cls._rendering.get((champion.id, patch))
+        if future is None:
+            cls.misses += 1
+            future = asyncio.ensure_future(
+                RenderExecutor.run(MerakiChampion.render_tabs, champion.raw(), list(cls.tabs.values()))
+            )
+            cls._rendering[(champion.id, patch)] = future
+            future.add_done_callback(lambda done: cls._rendered(champion.id, patch, done))
+        payloads = await asyncio.shield(future)
+        return [disnake.Embed.from_dict(data) for data in payloads[list(cls.tabs).index(tab)]]
+
+    @classmethod
+    def _rendered(cls, id: int, patch: str, future: asyncio.Future) -> None:
+        del cls._rendering[(id, patch)]
+        # Also marks the exception as retrieved when every caller was cancelled.
+        if future.cancelled() or future.exception() is not None:
+            return
+        for tab, payload in zip(cls.tabs, future.result()):
+            cls._data[(id, patch, tab)] = payload
+        while len(cls._data) > cls.max_entries:
+            cls._data.popitem(last=False)
+
+    @classmethod
+    def clear(cls) -> None:
+        cls._data.clear()
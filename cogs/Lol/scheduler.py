@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Union
+
+from aiohttp import ClientResponse
+from pyot.limiters.base import LimiterToken
+from pyot.limiters.memory import MemoryLimiter
+from pyot.pipeline.token import PipelineToken
+
+from .stores import Freshness
+from .stores import WrapperStore
+from bot.metrics import RIOT_REQUESTS
+from bot.ratelimit import Limiter
+from bot.ratelimit import RemoteLimiter
+from bot.tracing import span
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+priority: ContextVar[Priority] = ContextVar("priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def background():
+    """Run the Riot requests made inside this block (and the tasks it creates) in the background lane."""
+    reset = priority.set(Priority.BACKGROUND)
+    try:
+        yield
+    finally:
+        priority.reset(reset)
+
+
+class LaneStats:
+    def __init__(self):
+        self.depth: int = 0
+        self.dispatched: int = 0
+        self.promoted: int = 0
+        self.total_wait: float = 0
+        self.max_wait: float = 0
+
+    @property
+    def dict(self) -> Dict[str, float]:
+        return {
+            "depth": self.depth,
+            "dispatched": self.dispatched,
+            "promoted": self.promoted,
+            "mean_wait": self.total_wait / self.dispatched if self.dispatched else 0,
+            "max_wait": self.max_wait,
+        }
+
+
+class Scheduler(WrapperStore):
+    """Dispatch the requests of the wrapped store by priority lane under per-app and per-method token buckets.
+
+    Each method has its own queue, where interactive requests always leave before background ones, and background
+    requests never take the last `background_reserve` share of a bucket. A method whose bucket is empty does not hold
+    back the requests of the others. A queued request is promoted when an interactive caller joins it.
+    The limits use the rate limit headers syntax. They are only the limits until Riot answers: a wrapped RiotAPI store
+    whose rate limiter is a `SchedulerLimiter` resizes the buckets to the limits of the headers of its responses.
+    """
+
+    def __init__(
+        self,
+        game: str,
+        store: dict,
+        app_limits: str = "20:1,100:120",
+        method_limits: Optional[Mapping[str, str]] = None,
+        background_reserve: float = 0.2,
+        policy: Optional[Mapping[str, Freshness]] = None,
+        log_level: int = 0,
+    ):
+        super().__init__(game, store, policy, log_level)
+        if os.getenv("RATE_LIMIT_SOCKET"):
+            # In a cluster, the buckets are shared by the workers through the launcher.
+            share = 1 / int(os.getenv("CLUSTER_PROCESSES", 1))
+            self.limiter = RemoteLimiter(os.getenv("RATE_LIMIT_SOCKET"), app_limits, method_limits, share)
+        else:
+            self.limiter = Limiter(app_limits, method_limits)
+        rate_limiter = getattr(self.store, "rate_limiter", None)
+        if isinstance(rate_limiter, SchedulerLimiter):
+            rate_limiter.limiter = self.limiter
+        self.background_reserve: float = background_reserve
+        self.queues: Dict[str, List[list]] = {}
+        self.entries: Dict[asyncio.Future, list] = {}
+        self.waiting: Dict[str, list] = {}
+        self.lanes: Dict[Priority, LaneStats] = {lane: LaneStats() for lane in Priority}
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {lane.name.lower(): stats.dict for lane, stats in self.lanes.items()}
+
+    async def get(self, token: PipelineToken, **kwargs) -> Any:
+        with span("queue", "Scheduler"):
+            await self.acquire(token)
+        started = time.monotonic()
+        status = "200"
+        try:
+            with span(token.method, type(self.store).__name__):
+                return await self.store.get(token, **kwargs)
+        except Exception as e:
+            status = str(getattr(e, "code", type(e).__name__))
+            raise
+        finally:
+            RIOT_REQUESTS.observe(time.monotonic() - started, endpoint=token.method, status=status)
+
+    async def acquire(self, token: PipelineToken) -> None:
+        lane = priority.get()
+        waiter = asyncio.get_running_loop().create_future()
+        self._push(lane, token, waiter, time.monotonic())
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            entry = self.entries.pop(waiter, None)
+            if entry is not None:
+                self._remove(entry)
+            raise
+
+    def promote(self, token: PipelineToken) -> None:
+        """Move a queued request to the lane of the current caller if it is a higher priority one."""
+        lane = priority.get()
+        entry = self.waiting.get(token.value)
+        if entry is None or entry[0] <= lane:
+            return
+        self._remove(entry)
+        self._push(lane, token, entry[3], entry[4])
+        self.lanes[lane].promoted += 1
+
+    def _push(self, lane: Priority, token: PipelineToken, waiter: asyncio.Future, enqueued_at: float) -> None:
+        entry = [lane, next(self._sequence), token, waiter, enqueued_at, False]
+        heapq.heappush(self.queues.setdefault(token.method, []), entry)
+        self.entries[waiter] = entry
+        self.waiting.setdefault(token.value, entry)
+        self.lanes[lane].depth += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        self._wakeup.set()
+
+    def _remove(self, entry: list) -> None:
+        entry[5] = True
+        self.lanes[entry[0]].depth -= 1
+        if self.waiting.get(entry[2].value) is entry:
+            del self.waiting[entry[2].value]
+
+    def _heads(self) -> List[list]:
+        """First live entry of every method queue, highest priority first."""
+        heads = []
+        for method, queue in list(self.queues.items()):
+            while queue and queue[0][5]:
+                heapq.heappop(queue)
+            if queue:
+                heads.append(queue[0])
+            else:
+                del self.queues[method]
+        heads.sort(key=lambda entry: (entry[0], entry[1]))
+        return heads
+
+    async def _dispatch(self) -> None:
+        while True:
+            heads = self._heads()
+            if not heads:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            now = time.monotonic()
+            head, delays = None, []
+            for entry in heads:
+                delay = await self.limiter.acquire(
+                    entry[2].method, self.background_reserve if entry[0] == Priority.BACKGROUND else 0
+                )
+                if delay <= 0:
+                    head = entry
+                    break
+                delays.append(delay)
+            if head is None:
+                # Every method is limited. Woken up early when a request is queued, in case it can leave first.
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), min(delays))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, _, token, waiter, enqueued_at, _ = head
+            # The limiter may have been asked over IPC, meanwhile the request may have been promoted or cancelled.
+            entry = self.entries.pop(waiter, None)
+            if entry is None:
+                continue
+            self._remove(entry)
+            lane = entry[0]
+            stats = self.lanes[lane]
+            stats.dispatched += 1
+            stats.total_wait += now - enqueued_at
+            stats.max_wait = max(stats.max_wait, now - enqueued_at)
+            if not waiter.done():
+                waiter.set_result(None)
+            if self.log_level:
+                logging.log(self.log_level, "[Scheduler] Dispatched %s (%s)", token.value, lane.name)
+
+
+class SchedulerLimiter(MemoryLimiter):
+    """pyot rate limiter of a RiotAPI store wrapped by a Scheduler, passing the limits of every response to its buckets.
+
+    pyot's own limiting still applies on top, following the counts of the headers.
+    """
+
+    def __init__(self, game: str, api_key: str, limiting_share: int = 1):
+        super().__init__(game, api_key, limiting_share)
+        self.limiter: Optional[Union[Limiter, RemoteLimiter]] = None
+
+    async def sync_rates(self, token: LimiterToken, response: ClientResponse):
+        await super().sync_rates(token, response)
+        headers = getattr(response, "headers", None)
+        if self.limiter is None or not headers:
+            return
+        app_limits, method_limits = headers.get("X-App-Rate-Limit"), headers.get("X-Method-Rate-Limit")
+        if app_limits and method_limits:
+            # The token method is the parent of the pipeline token, `<game>/<server>/<method>`.
+            await self.limiter.sync(token.method.rsplit("/", 1)[-1], app_limits, method_limits)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import difflib
+import heapq
+import unicodedata
+from bisect import bisect_left
+from typing import Dict
+from typing import FrozenSet
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+
+# Nicknames used by the players, normalized, for the champions they name.
+ALIASES: Dict[str, str] = {
+    "asol": "Aurelion Sol",
+    "blitz": "Blitzcrank",
+    "cait": "Caitlyn",
+    "cass": "Cassiopeia",
+    "ez": "Ezreal",
+    "fiddle": "Fiddlesticks",
+    "gp": "Gangplank",
+    "heimer": "Heimerdinger",
+    "j4": "Jarvan IV",
+    "kassa": "Kassadin",
+    "kha": "Kha'Zix",
+    "kog": "Kog'Maw",
+    "lb": "LeBlanc",
+    "leblanc": "LeBlanc",
+    "mf": "Miss Fortune",
+    "monkeyking": "Wukong",
+    "morde": "Mordekaiser",
+    "morg": "Morgana",
+    "mumu": "Amumu",
+    "mundo": "Dr. Mundo",
+    "naut": "Nautilus",
+    "nunu": "Nunu & Willump",
+    "rek": "Rek'Sai",
+    "tf": "Twisted Fate",
+    "tk": "Tahm Kench",
+    "trist": "Tristana",
+    "trynda": "Tryndamere",
+    "vel": "Vel'Koz",
+    "ww": "Warwick",
+    "xin": "Xin Zhao",
+    "yi": "Master Yi",
+}
+
+
+def normalize(text: str) -> str:
+    """Lowercase `text` without its accents, spaces and punctuation."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if c.isalnum()).lower()
+
+
+def bigrams(key: str) -> FrozenSet[str]:
+    padded = f" {key} "
+    return frozenset(padded[i : i + 2] for i in range(len(padded) - 1))
+
+
+class ChampionIndex:
+    """Champion names indexed for the autocompletion and validation of the `/champion` option.
+
+    Names and aliases are normalized and sorted once, so a prefix is found by bisection. When nothing starts with the
+    input, the keys sharing the most bigrams with it are ranked by difflib similarity and the closest names suggested.
+    """
+
+    def __init__(
+        self, names: Iterable[str], aliases: Mapping[str, str] = ALIASES, limit: int = 25, fuzzy_candidates: int = 10
+    ):
+        self.limit: int = limit
+        self.fuzzy_candidates: int = fuzzy_candidates
+        self.names: List[str] = sorted(set(names), key=normalize)
+        self.exact: frozenset = frozenset(self.names)
+        self.by_key: Dict[str, str] = {normalize(name): name for name in self.names}
+        for alias, name in aliases.items():
+            if name in self.exact:
+                self.by_key.setdefault(alias, name)
+        self.keys: List[str] = sorted(self.by_key)
+        self.bigrams: List[Tuple[str, FrozenSet[str]]] = [(key, bigrams(key)) for key in self.keys]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def resolve(self, text: str) -> Optional[str]:
+        """Champion named by `text`, ignoring case, accents, punctuation and aliases, None if there is none."""
+        if text in self.exact:
+            return text
+        return self.by_key.get(normalize(text))
+
+    def complete(self, text: str) -> List[str]:
+        key = normalize(text)
+        if not key:
+            return self.names[: self.limit]
+        matches: List[str] = []
+        for i in range(bisect_left(self.keys, key), len(self.keys)):
+            if not self.keys[i].startswith(key):
+                break
+            name = self.by_key[self.keys[i]]
+            if name not in matches:
+                matches.append(name)
+                if len(matches) == self.limit:
+                    return matches
+        if matches:
+            return matches
+        return self.fuzzy(key)
+
+    def fuzzy(self, key: str, cutoff: float = 0.5) -> List[str]:
+        """Names closest to the normalized `key`, most similar first."""
+        grams = bigrams(key)
+        candidates = heapq.nlargest(
+            self.fuzzy_candidates,
+            ((2 * len(grams & other) / (len(grams) + len(other)), candidate) for candidate, other in self.bigrams),
+        )
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(key)
+        scored: List[Tuple[float, str]] = []
+        for dice, candidate in candidates:
+            if not dice:
+                break
+            matcher.set_seq1(candidate)
+            ratio = matcher.ratio()
+            if ratio >= cutoff:
+                scored.append((ratio, candidate))
+        matches: List[str] = []
+        for _, candidate in sorted(scored, reverse=True):
+            name = self.by_key[candidate]
+            if name not in matches:
+                matches.append(name)
+        return matches
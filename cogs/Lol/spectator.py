@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+import time
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from pyot.core.exceptions import NotFound
+
+from .concurrency import gather_bounded
+from .scheduler import Priority
+from .scheduler import priority
+from .watcher import CurrentGame
+
+
+class Watch:
+    """Summoner watched by the `SpectatorWatcher`, with the views waiting for its game."""
+
+    __slots__ = ("summoner_id", "subscribers", "polls", "next_poll", "lane")
+
+    def __init__(self, summoner_id: str, next_poll: float, lane: Priority):
+        self.summoner_id: str = summoner_id
+        self.subscribers: List[asyncio.Future] = []
+        self.polls: int = 0
+        self.next_poll: float = next_poll
+        self.lane: Priority = lane
+
+    @property
+    def interval(self) -> float:
+        """Polling interval, short right after the lobby and growing the longer the game takes to start."""
+        return min(
+            SpectatorWatcher.max_interval, SpectatorWatcher.min_interval * SpectatorWatcher.backoff**self.polls
+        )
+
+
+class SpectatorWatcher:
+    """Background service polling the spectator endpoint for every summoner someone is waiting a game for.
+
+    Each watched summoner is polled once per cycle whatever the number of subscribers, and all of them are given
+    the same `CurrentGame` as soon as it is found. A summoner is polled in the lane of its most urgent subscriber, so a
+    user waiting for a game is not queued behind the background requests.
+    """
+
+    min_interval: float = 5
+    max_interval: float = 30
+    backoff: float = 1.2
+
+    watches: Dict[str, Watch] = {}
+    _task: Optional[asyncio.Task] = None
+    _wakeup: Optional[asyncio.Event] = None
+
+    @classmethod
+    async def watch(cls, summoner_id: str, timeout: float) -> Optional[CurrentGame]:
+        """Wait up to `timeout` seconds for the current game of a summoner, None if it did not start by then."""
+        try:
+            return await CurrentGame(summoner_id=summoner_id).get()
+        except NotFound:
+            pass
+        if timeout <= cls.min_interval:
+            return None
+        watch = cls.watches.get(summoner_id)
+        if watch is None:
+            watch = cls.watches[summoner_id] = Watch(summoner_id, time.monotonic() + cls.min_interval, priority.get())
+        watch.lane = min(watch.lane, priority.get())
+        subscriber = asyncio.get_running_loop().create_future()
+        watch.subscribers.append(subscriber)
+        cls._start()
+        try:
+            return await asyncio.wait_for(subscriber, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            if subscriber in watch.subscribers:
+                watch.subscribers.remove(subscriber)
+            if not watch.subscribers and cls.watches.get(summoner_id) is watch:
+                del cls.watches[summoner_id]
+
+    @classmethod
+    def stop(cls) -> None:
+        if cls._task is not None:
+            cls._task.cancel()
+            cls._task = None
+
+    @classmethod
+    def _start(cls) -> None:
+        if cls._task is None or cls._task.done():
+            cls._wakeup = asyncio.Event()
+            cls._task = asyncio.ensure_future(cls._run())
+        cls._wakeup.set()
+
+    @staticmethod
+    async def _poll(watch: Watch) -> CurrentGame:
+        # gather_bounded runs each poll in its own task, the lane is only set for this request.
+        priority.set(watch.lane)
+        return await CurrentGame(summoner_id=watch.summoner_id).get()
+
+    @classmethod
+    async def _run(cls) -> None:
+        while cls.watches:
+            now = time.monotonic()
+            due = [watch for watch in cls.watches.values() if watch.next_poll <= now]
+            if due:
+                games = await gather_bounded(*[cls._poll(watch) for watch in due])
+                for watch, game in zip(due, games):
+                    if isinstance(game, BaseException):
+                        if not isinstance(game, NotFound):
+                            logging.warning(f"[SpectatorWatcher] Polling {watch.summoner_id} failed: {game!r}")
+                        watch.polls += 1
+                        watch.next_poll = time.monotonic() + watch.interval
+                        continue
+                    logging.debug("[SpectatorWatcher] Game of %s found after %s polls", watch.summoner_id, watch.polls)
+                    for subscriber in watch.subscribers:
+                        if not subscriber.done():
+                            subscriber.set_result(game)
+                    if cls.watches.get(watch.summoner_id) is watch:
+                        del cls.watches[watch.summoner_id]
+            if not cls.watches:
+                break
+            delay = min(watch.next_poll for watch in cls.watches.values()) - time.monotonic()
+            if delay > 0:
+                # Woken up early when a summoner is watched, in case it has to be polled first.
+                cls._wakeup.clear()
+                try:
+                    await asyncio.wait_for(cls._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
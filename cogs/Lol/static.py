@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import aiohttp
+
+
+class StaticTable:
+    """A static json table published by Riot, indexed by one of its keys.
+
+    The table is loaded from a snapshot on disk when created and is refreshed from the network with `refresh`, which
+    writes the new snapshot from the default executor.
+    """
+
+    SNAPSHOT_VERSION: int = 1
+    directory: str = os.path.join("data", "static")
+
+    def __init__(self, name: str, url: str, key: str):
+        self.name: str = name
+        self.url: str = url
+        self.key: str = key
+        self.index: Dict[Any, dict] = {}
+        self.etag: Optional[str] = None
+        self.fetched_at: float = 0
+        self.load()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{self.name}.json")
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def get(self, key: Any, default: Optional[dict] = None) -> Optional[dict]:
+        return self.index.get(key, default)
+
+    def build(self, data: List[dict]) -> None:
+        self.index = {entry.get(self.key): entry for entry in data}
+
+    def load(self) -> bool:
+        try:
+            with open(self.path, encoding="UTF-8") as file:
+                snapshot = json.load(file)
+        except FileNotFoundError:
+            logging.info(f"[StaticTable] No snapshot found for '{self.name}', waiting for the first refresh.")
+            return False
+        except (OSError, ValueError) as e:
+            logging.warning(f"[StaticTable] Unreadable snapshot for '{self.name}': {e}")
+            return False
+        if snapshot.get("version") != self.SNAPSHOT_VERSION:
+            logging.info(f"[StaticTable] Snapshot for '{self.name}' has an outdated version, ignoring it.")
+            return False
+        self.build(snapshot.get("data", []))
+        self.etag = snapshot.get("etag")
+        self.fetched_at = snapshot.get("fetched_at", 0)
+        logging.debug(f"[StaticTable] Loaded {len(self.index)} '{self.name}' entries from snapshot.")
+        return True
+
+    def save(self, data: List[dict]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="UTF-8") as file:
+            json.dump(
+                {"version": self.SNAPSHOT_VERSION, "etag": self.etag, "fetched_at": self.fetched_at, "data": data},
+                file,
+            )
+        os.replace(temp_path, self.path)
+
+    async def refresh(self, session: aiohttp.ClientSession) -> bool:
+        """Fetch the table if it changed since the last snapshot. Return True if the index was updated."""
+        headers = {"If-None-Match": self.etag} if self.etag and self.index else {}
+        async with session.get(self.url, headers=headers) as response:
+            if response.status == 304:
+                self.fetched_at = time.time()
+                logging.debug(f"[StaticTable] '{self.name}' is up to date.")
+                return False
+            response.raise_for_status()
+            data: List[dict] = await response.json(content_type=None)
+            self.etag = response.headers.get("ETag")
+        self.fetched_at = time.time()
+        self.build(data)
+        await asyncio.get_running_loop().run_in_executor(None, self.save, data)
+        logging.info(f"[StaticTable] Refreshed {len(self.index)} '{self.name}' entries.")
+        return True
+
+
+class StaticData:
+    """Static tables used by the cog, loaded from their snapshots when the module is imported.
+
+    The tables without a snapshot are empty until `seed` fetched them. The cog starts it when it loads, without delaying
+    the commands, so the live game view waits for it before reading the tables.
+    """
+
+    refresh_interval: float = 24 * 60 * 60
+    _seeding: Optional[asyncio.Task] = None
+
+    queues = StaticTable("queues", "https://static.developer.riotgames.com/docs/lol/queues.json", "queueId")
+    maps = StaticTable("maps", "https://static.developer.riotgames.com/docs/lol/maps.json", "mapId")
+
+    tables: List[StaticTable] = [queues, maps]
+
+    @classmethod
+    async def seed(cls) -> None:
+        """Wait for the first refresh of the tables if one of them is empty, the first caller starts it.
+
+        When it fails, the next caller tries again.
+        """
+        if all(table.index for table in cls.tables):
+            return
+        if cls._seeding is None:
+            cls._seeding = asyncio.ensure_future(cls._seed())
+        await asyncio.shield(cls._seeding)
+
+    @classmethod
+    async def _seed(cls) -> None:
+        try:
+            await cls.refresh()
+        finally:
+            if not all(table.index for table in cls.tables):
+                cls._seeding = None
+
+    @classmethod
+    async def refresh(cls, force: bool = False) -> None:
+        due = [table for table in cls.tables if force or not table.index or table.age >= cls.refresh_interval]
+        if not due:
+            return
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+            for table in due:
+                try:
+                    await table.refresh(session)
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, OSError) as e:
+                    logging.warning(f"[StaticData] Failed to refresh '{table.name}', keeping the snapshot: {e}")
@@ -0,0 +1,551 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import copy
+import importlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+
+from pyot.conf.pipeline import pipelines
+from pyot.core.exceptions import NotFindable
+from pyot.core.exceptions import NotFound
+from pyot.core.exceptions import PyotException
+from pyot.pipeline.token import PipelineToken
+from pyot.stores.base import Store
+from pyot.stores.base import StoreType
+
+from bot.tracing import span
+
+
+class Freshness:
+    """Caching policy of one endpoint.
+
+    A response is served as is for `fresh` seconds (forever if -1, never cached if 0), then for `stale` more seconds
+    while it is revalidated in the background. A NotFound response is remembered for `negative` seconds.
+    The response is kept in the disk cache too if `persist`.
+    """
+
+    __slots__ = ("fresh", "stale", "negative", "persist")
+
+    def __init__(self, fresh: int, stale: int = 0, negative: int = 0, persist: bool = True):
+        self.fresh: int = fresh
+        self.stale: int = stale
+        self.negative: int = negative
+        self.persist: bool = persist
+
+    def __repr__(self) -> str:
+        return f"Freshness(fresh={self.fresh}, stale={self.stale}, negative={self.negative}, persist={self.persist})"
+
+
+DEFAULT_FRESHNESS = Freshness(fresh=60, persist=False)
+
+# Token and wall clock time at which its value was fetched from a service, set by the cache or gateway serving it, so
+# the caches it is copied to keep its age instead of restarting its fresh time. Cleared by the first store asked.
+fetched_at: ContextVar[Optional[Tuple[str, float]]] = ContextVar("fetched_at", default=None)
+
+
+def load_store(game: str, conf: dict) -> Store:
+    """Instantiate a pipeline store from a `LolPipeline.stores` style configuration."""
+    conf = dict(conf)
+    module_name, class_name = conf.pop("backend").rsplit(".", 1)
+    backend = getattr(importlib.import_module(module_name), class_name)
+    return backend(game=game, **conf)
+
+
+class PipelineStore(Store):
+    """Base of the cog's pipeline stores.
+
+    Instances are listed per game in `stores`, in pipeline order. Stores wrapped by a `WrapperStore` are not listed.
+    A cache serving a stale value `revalidate`s it through the services below, then updates every cache of the pipeline.
+    """
+
+    stores: Dict[str, List["PipelineStore"]] = {}
+
+    def __init__(self, game: str, policy: Optional[Mapping[str, Freshness]] = None, log_level: int = 0):
+        self.game: str = game
+        self.policy: Mapping[str, Freshness] = policy or {}
+        self.log_level: int = log_level
+        self.revalidating: Dict[str, asyncio.Task] = {}
+        PipelineStore.stores.setdefault(game, []).append(self)
+
+    def freshness(self, token: PipelineToken) -> Freshness:
+        return self.policy.get(token.method, DEFAULT_FRESHNESS)
+
+    @property
+    def below(self) -> List["PipelineStore"]:
+        stores = PipelineStore.stores[self.game]
+        return stores[stores.index(self) + 1 :]
+
+    @staticmethod
+    def fetched(token: PipelineToken) -> float:
+        """Wall clock time at which the value of `token` being set was fetched from a service."""
+        served = fetched_at.get()
+        return served[1] if served is not None and served[0] == token.value else time.time()
+
+    @staticmethod
+    async def fetch(stores: List[Store], token: PipelineToken) -> Any:
+        """Get `token` from `stores` the way `Pipeline.get` does, with the HTTP session of the pipeline."""
+        session = await pipelines[token.model].sessions.acquire()
+        error: PyotException = NotFound(token.value)
+        for store in stores:
+            try:
+                return await store.get(token, session=session)
+            except (NotImplementedError, NotFindable):
+                continue
+            except PyotException as e:
+                error = e
+        raise error
+
+    def revalidate(self, token: PipelineToken) -> None:
+        if token.value in self.revalidating:
+            return
+        task = asyncio.ensure_future(self._revalidate(token))
+        self.revalidating[token.value] = task
+        task.add_done_callback(lambda _: self.revalidating.pop(token.value, None))
+
+    async def _revalidate(self, token: PipelineToken) -> None:
+        # The other caches may hold the same stale copy, only the services can revalidate it.
+        stores = PipelineStore.stores[self.game]
+        caches = [store for store in stores if store.type == StoreType.CACHE]
+        services = [store for store in self.below if store.type != StoreType.CACHE]
+        fetched_at.set(None)
+        try:
+            response = await self.fetch(services, token)
+        except NotFound:
+            for cache in caches:
+                await cache.delete(token)
+        except Exception as e:
+            logging.warning(f"[{type(self).__name__}] Revalidation of {token.value} failed: {e!r}")
+        else:
+            for cache in caches:
+                await cache.set(token, response)
+
+
+def store_samples(game: str = "lol") -> Iterable[Tuple[str, Dict[str, str], float]]:
+    """Metrics samples of the `stats` of the pipeline stores, with the hit ratio of the caches."""
+    for position, store in enumerate(PipelineStore.stores.get(game, [])):
+        labels = {"store": type(store).__name__, "position": str(position)}
+        stats = getattr(store, "stats", {})
+        for stat, value in stats.items():
+            if isinstance(value, dict):
+                for name, lane_value in value.items():
+                    yield "porobot_store_stat", {**labels, "stat": name, "lane": stat}, lane_value
+            else:
+                yield "porobot_store_stat", {**labels, "stat": stat}, value
+        if "hits" in stats and "misses" in stats:
+            hits = stats["hits"] + stats.get("stale_hits", 0)
+            total = hits + stats["misses"]
+            yield "porobot_store_hit_ratio", labels, hits / total if total else 0
+
+
+class WrapperStore(PipelineStore):
+    """Base of the stores that wrap another store of the pipeline, given as the `store` configuration."""
+
+    def __init__(self, game: str, store: dict, policy: Optional[Mapping[str, Freshness]] = None, log_level: int = 0):
+        self.store: Store = load_store(game, store)
+        if self.store in PipelineStore.stores.get(game, []):
+            PipelineStore.stores[game].remove(self.store)
+        super().__init__(game, policy, log_level)
+
+    @property
+    def type(self) -> StoreType:
+        return self.store.type
+
+    async def initialize(self):
+        await self.store.initialize()
+
+    async def get(self, token: PipelineToken, **kwargs) -> Any:
+        return await self.store.get(token, **kwargs)
+
+    async def post(self, token: PipelineToken, body: Any, **kwargs) -> Any:
+        return await self.store.post(token, body, **kwargs)
+
+    async def put(self, token: PipelineToken, body: Any, **kwargs) -> Any:
+        return await self.store.put(token, body, **kwargs)
+
+
+class MemoryCache(PipelineStore):
+    """In-memory cache tier following the freshness `policy`, first store of the pipeline.
+
+    Values are kept pickled, so every caller parses its own copy, and the least recently used entries are dropped
+    past `max_entries`. A stale value is served immediately while the stores below revalidate it in the background.
+    """
+
+    type = StoreType.CACHE
+
+    def __init__(
+        self,
+        game: str,
+        policy: Optional[Mapping[str, Freshness]] = None,
+        max_entries: int = 10000,
+        log_level: int = 0,
+    ):
+        super().__init__(game, policy, log_level)
+        self.max_entries: int = max_entries
+        self._data: "OrderedDict[str, Tuple[bytes, float, float, str, float]]" = OrderedDict()
+        self.hits: int = 0
+        self.stale_hits: int = 0
+        self.misses: int = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "entries": len(self._data),
+            "revalidating": len(self.revalidating),
+        }
+
+    async def get(self, token: PipelineToken, **kwargs) -> Any:
+        fetched_at.set(None)
+        entry = self._data.get(token.value)
+        if entry is None:
+            self.misses += 1
+            raise NotFound(token.value)
+        value, fresh_until, stale_until, _, fetched = entry
+        now = time.monotonic()
+        if now >= stale_until:
+            del self._data[token.value]
+            self.misses += 1
+            raise NotFound(token.value)
+        self._data.move_to_end(token.value)
+        if now >= fresh_until:
+            self.stale_hits += 1
+            self.revalidate(token)
+        else:
+            self.hits += 1
+        fetched_at.set((token.value, fetched))
+        return pickle.loads(value)
+
+    async def set(self, token: PipelineToken, value: Any, **kwargs):
+        freshness = self.freshness(token)
+        if not freshness.fresh:
+            return
+        fetched = self.fetched(token)
+        now = time.monotonic()
+        fresh_until = float("inf") if freshness.fresh < 0 else now + freshness.fresh - (time.time() - fetched)
+        if now >= fresh_until + freshness.stale:
+            return
+        self._data[token.value] = (
+            pickle.dumps(value),
+            fresh_until,
+            fresh_until + freshness.stale,
+            token.method,
+            fetched,
+        )
+        self._data.move_to_end(token.value)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, token: PipelineToken, **kwargs):
+        self._data.pop(token.value, None)
+
+    async def contains(self, token: PipelineToken, **kwargs) -> bool:
+        entry = self._data.get(token.value)
+        return entry is not None and time.monotonic() < entry[2]
+
+    async def clear(self, **kwargs):
+        self._data.clear()
+
+    async def invalidate(self, methods: List[str]) -> int:
+        """Drop every entry of the `methods` endpoints, returns the number of entries dropped."""
+        keys = [key for key, entry in self._data.items() if entry[3] in methods]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    async def expire(self, **kwargs):
+        now = time.monotonic()
+        for key in [key for key, entry in self._data.items() if now >= entry[2]]:
+            del self._data[key]
+
+
+class SingleFlight(WrapperStore):
+    """Coalesce concurrent gets of the same token into a single request to the wrapped store.
+
+    Every caller waiting on an in-flight request receives its response (or its exception). The request runs in its
+    own task, so a caller being cancelled does not cancel it for the others.
+    A NotFound response is remembered for the `negative` time of the endpoint's freshness `policy`.
+    """
+
+    def __init__(self, game: str, store: dict, policy: Optional[Mapping[str, Freshness]] = None, log_level: int = 0):
+        super().__init__(game, store, policy, log_level)
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.negatives: Dict[str, float] = {}
+        self.calls: int = 0
+        self.coalesced: int = 0
+        self.negative_hits: int = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "negative_hits": self.negative_hits,
+            "inflight": len(self.inflight),
+        }
+
+    async def get(self, token: PipelineToken, **kwargs) -> Any:
+        self.calls += 1
+        negative_until = self.negatives.get(token.value)
+        if negative_until is not None:
+            if time.monotonic() < negative_until:
+                self.negative_hits += 1
+                raise NotFound(token.value)
+            del self.negatives[token.value]
+        task = self.inflight.get(token.value)
+        if task is not None:
+            self.coalesced += 1
+            if self.log_level:
+                logging.log(self.log_level, "[SingleFlight] Coalesced %s", token.value)
+            # An interactive caller joining a queued background request moves it to its own lane.
+            promote = getattr(self.store, "promote", None)
+            if promote is not None:
+                promote(token)
+            with span(f"{token.method} (coalesced)", self.name):
+                return copy.deepcopy(await asyncio.shield(task))
+        with span(token.method, self.name):
+            # Created inside the span so the spans of the wrapped store are nested in it.
+            task = asyncio.ensure_future(self.store.get(token, **kwargs))
+            self.inflight[token.value] = task
+            task.add_done_callback(lambda done: self._done(token, done))
+            return await asyncio.shield(task)
+
+    @property
+    def name(self) -> str:
+        return type(self.store).__name__
+
+    def _done(self, token: PipelineToken, task: asyncio.Task) -> None:
+        if self.inflight.get(token.value) is task:
+            del self.inflight[token.value]
+        if task.cancelled():
+            return
+        # Also marks the exception as retrieved when every caller was cancelled.
+        if isinstance(task.exception(), NotFound) and self.freshness(token).negative > 0:
+            if len(self.negatives) > 10000:
+                now = time.monotonic()
+                self.negatives = {key: until for key, until in self.negatives.items() if until > now}
+            self.negatives[token.value] = time.monotonic() + self.freshness(token).negative
+
+
+class SQLiteCache(PipelineStore):
+    """Persistent cache tier backed by a SQLite file, meant to sit between MemoryCache and the remote stores.
+
+    Values are stored as zlib compressed compact json, keyed (and indexed) by the pyot cache key.
+    The endpoints whose freshness `policy` is `persist` are kept for their `fresh` then `stale` time, so a restart keeps
+    serving the stale values while they are revalidated.
+    The sum of the stored values is capped to `max_size` bytes by evicting the least recently used entries.
+    All SQLite calls run on a single dedicated thread so the event loop never waits on the disk.
+    """
+
+    type = StoreType.CACHE
+    SCHEMA_VERSION: int = 2
+
+    def __init__(
+        self,
+        game: str,
+        path: str = os.path.join("data", "cache.sqlite3"),
+        policy: Optional[Mapping[str, Freshness]] = None,
+        max_size: int = 256 * 1024 * 1024,
+        log_level: int = 0,
+    ):
+        super().__init__(game, policy, log_level)
+        self.path: str = path
+        self.max_size: int = max_size
+        self.size: int = 0
+        self.hits: int = 0
+        self.stale_hits: int = 0
+        self.misses: int = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SQLiteCache")
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "size": self.size,
+            "revalidating": len(self.revalidating),
+        }
+
+    async def _run(self, function: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            if connection.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+                connection.execute("DROP TABLE IF EXISTS cache")
+                connection.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    method TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    stale_at REAL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+            connection.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+            connection.commit()
+            self.size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            self._connection = connection
+            logging.info(f"[SQLiteCache] Opened {self.path} ({self.size // 1024} KiB).")
+        return self._connection
+
+    def _get(self, key: str) -> Optional[Tuple[bytes, Optional[float]]]:
+        connection = self._connect()
+        row = connection.execute("SELECT value, size, stale_at, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, size, stale_at, expires_at = row
+        now = time.time()
+        if expires_at is not None and expires_at < now:
+            connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+            connection.commit()
+            self.size -= size
+            return None
+        connection.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        connection.commit()
+        return value, stale_at
+
+    def _set(self, key: str, method: str, value: bytes, stale_at: Optional[float], expires_at: Optional[float]) -> None:
+        connection = self._connect()
+        previous = connection.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+        connection.execute(
+            "INSERT OR REPLACE INTO cache (key, method, value, size, stale_at, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, method, value, len(value), stale_at, expires_at, time.time()),
+        )
+        self.size += len(value) - (previous[0] if previous else 0)
+        if self.size > self.max_size:
+            self._evict(connection)
+        connection.commit()
+
+    def _drop_expired(self, connection: sqlite3.Connection) -> None:
+        now = time.time()
+        self.size -= connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache WHERE expires_at < ?", (now,)
+        ).fetchone()[0]
+        connection.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        self._drop_expired(connection)
+        target = self.max_size * 0.9
+        evicted = 0
+        for key, size in connection.execute("SELECT key, size FROM cache ORDER BY accessed_at").fetchall():
+            if self.size <= target:
+                break
+            connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self.size -= size
+            evicted += 1
+        logging.debug(f"[SQLiteCache] Evicted {evicted} entries, size is now {self.size // 1024} KiB.")
+
+    def _delete(self, key: str) -> None:
+        connection = self._connect()
+        row = connection.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+        if row:
+            connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+            connection.commit()
+            self.size -= row[0]
+
+    def _invalidate(self, methods: List[str]) -> int:
+        connection = self._connect()
+        placeholders = ", ".join("?" * len(methods))
+        size, count = connection.execute(
+            f"SELECT COALESCE(SUM(size), 0), COUNT(*) FROM cache WHERE method IN ({placeholders})", methods
+        ).fetchone()
+        connection.execute(f"DELETE FROM cache WHERE method IN ({placeholders})", methods)
+        connection.commit()
+        self.size -= size
+        return count
+
+    def _clear(self) -> None:
+        connection = self._connect()
+        connection.execute("DELETE FROM cache")
+        connection.commit()
+        self.size = 0
+
+    def _expire(self) -> None:
+        connection = self._connect()
+        self._drop_expired(connection)
+        connection.commit()
+
+    async def initialize(self):
+        await self._run(self._connect)
+
+    async def get(self, token: PipelineToken, **kwargs) -> Any:
+        fetched_at.set(None)
+        freshness = self.freshness(token)
+        if not freshness.persist or not freshness.fresh:
+            raise NotFound(token.value)
+        with span(token.method, "SQLiteCache"):
+            row = await self._run(self._get, token.value)
+        if row is None:
+            self.misses += 1
+            raise NotFound(token.value)
+        value, stale_at = row
+        if stale_at is not None and stale_at <= time.time():
+            self.stale_hits += 1
+            self.revalidate(token)
+        else:
+            self.hits += 1
+        if stale_at is not None:
+            fetched_at.set((token.value, stale_at - freshness.fresh))
+        if self.log_level:
+            logging.log(self.log_level, "[SQLiteCache] Hit %s", token.value)
+        return json.loads(zlib.decompress(value))
+
+    async def set(self, token: PipelineToken, value: Any, **kwargs):
+        freshness = self.freshness(token)
+        if not freshness.persist or not freshness.fresh:
+            return
+        try:
+            data = zlib.compress(json.dumps(value, separators=(",", ":")).encode("UTF-8"))
+        except (TypeError, ValueError):
+            logging.debug("[SQLiteCache] Value of %s is not serializable, skipping it.", token.value)
+            return
+        stale_at = None if freshness.fresh < 0 else self.fetched(token) + freshness.fresh
+        expires_at = None if stale_at is None else stale_at + freshness.stale
+        if expires_at is not None and expires_at <= time.time():
+            return
+        await self._run(self._set, token.value, token.method, data, stale_at, expires_at)
+
+    async def delete(self, token: PipelineToken, **kwargs):
+        await self._run(self._delete, token.value)
+
+    async def contains(self, token: PipelineToken, **kwargs) -> bool:
+        return await self._run(self._get, token.value) is not None
+
+    async def clear(self, **kwargs):
+        await self._run(self._clear)
+
+    async def expire(self, **kwargs):
+        await self._run(self._expire)
+
+    async def invalidate(self, methods: List[str]) -> int:
+        """Drop every entry of the `methods` endpoints, returns the number of entries dropped."""
+        return await self._run(self._invalidate, list(methods))
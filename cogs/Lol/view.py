@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
+import time
 from typing import List
 from typing import Union
 
 import disnake
 
+from .cards import ChampionCards
+from .render import RenderCache
+from .spectator import SpectatorWatcher
+from .static import StaticData
 from .watcher import *
 from modules.Assets import *
 
@@ -46,9 +51,10 @@ drink_embed = (
 
 
 class CurrentGameView(disnake.ui.View):
-    def __init__(self, summoner_name: str):
+    def __init__(self, summoner_name: str, summoner: Optional[Summoner] = None):
         super().__init__(timeout=60 * 60)
         self.summoner_name: str = summoner_name
+        self.summoner: Optional[Summoner] = summoner
         self.live_game: CurrentGame = None
         self.embeds_cached: List[List[disnake.Embed]] = None
         self.current_participant_index: Tuple[int, int] = None
@@ -58,8 +64,10 @@ class CurrentGameView(disnake.ui.View):
 
     async def start(self, inter: Union[disnake.ApplicationCommandInteraction, disnake.Member], max: int = 1):
         self.inter = inter
+        # The names of the maps and queues, in case the live game is asked before the cog finished loading.
+        await StaticData.seed()
         try:
-            summoner = await Summoner(name=self.summoner_name).get()
+            summoner = self.summoner or await Summoner(name=self.summoner_name).get()
         except NotFound:
             if isinstance(inter, disnake.ApplicationCommandInteraction):
                 await inter.edit_original_message(
@@ -94,20 +102,12 @@ class CurrentGameView(disnake.ui.View):
                     disnake.Embed(description=f"{Emotes.LOADING} *Recherche de game en cours...*"),
                 ]
             )
-        counter: int = 0
-        while True:
-            try:
-                self.live_game = await CurrentGame(summoner_id=summoner.id).get()
-                break
-            except NotFound:
-                counter += 5
-                if counter < max:
-                    await asyncio.sleep(5)
-                else:
-                    break
+        started = time.monotonic()
+        self.live_game = await SpectatorWatcher.watch(summoner.id, timeout=max)
+        waited = round(time.monotonic() - started)
 
         if not self.live_game:
-            logging.info(f"Game not found after {counter} seconds")
+            logging.info(f"Game not found after {waited} seconds")
             if isinstance(inter, disnake.ApplicationCommandInteraction):
                 await inter.edit_original_message(
                     embeds=[
@@ -129,7 +129,7 @@ class CurrentGameView(disnake.ui.View):
                 )
             return
 
-        logging.info(f"Game found after {counter} seconds")
+        logging.info(f"Game found after {waited} seconds")
 
         if isinstance(inter, disnake.ApplicationCommandInteraction):
             await inter.edit_original_message(
@@ -158,7 +158,7 @@ class CurrentGameView(disnake.ui.View):
                 button = disnake.ui.Button(
                     custom_id=f"{i}:{j}",
                     style=(disnake.ButtonStyle.red if i else disnake.ButtonStyle.primary),
-                    emoji=(await MerakiChampion(id=participant.champion_id).get()).emote,
+                    emoji=Emotes.Lol.Champions.get(participant.champion_id),
                 )
                 if participant.summoner_name == summoner.name:
                     self.current_participant_index = [i, j]
@@ -219,11 +219,13 @@ class CurrentGameView(disnake.ui.View):
 
 
 class ClashTeamView(disnake.ui.View):
-    def __init__(self, summoner_name: str):
+    def __init__(self, summoner_name: str, summoner: Optional[Summoner] = None):
         super().__init__(timeout=60 * 60)
         self.summoner_name: str = summoner_name
+        self.summoner: Optional[Summoner] = summoner
         self.current_summoner: Summoner = None
         self.team: ClashTeam = None
+        self.roster: ClashRoster = None
         self.summoners: List[Summoner] = None
         self.inter: disnake.MessageCommandInteraction = None
 
@@ -233,9 +235,8 @@ class ClashTeamView(disnake.ui.View):
             clashPlayers = await summoner.clash_players.get()
             if len(clashPlayers.players) > 0:
                 self.team = await ClashTeam(id=clashPlayers.players[0].team_id).get()
-                self.summoners: List[Summoner] = [
-                    await Summoner(id=player.summoner_id).get() for player in self.team.players
-                ]
+                self.roster = await ClashRoster(self.team).get()
+                self.summoners = self.roster.summoners
                 return self
             else:
                 await inter.edit_original_message(
@@ -275,14 +276,14 @@ class ClashTeamView(disnake.ui.View):
                 self.current_summoner = self.summoners[i]
         self.add_item(
             disnake.ui.Button(
-                style=disnake.ButtonStyle.link, url=await self.team.opgg_url, emoji=Emotes.Lol.OPGG, row=2
+                style=disnake.ButtonStyle.link, url=self.team.opgg_url(self.roster), emoji=Emotes.Lol.OPGG, row=2
             )
         )
         await self.update(inter)
 
     @async_property
     async def embeds(self) -> List[disnake.Embed]:
-        return [await self.current_summoner.embed, await self.team.embed]
+        return [await self.current_summoner.embed, self.team.embed(self.roster)]
 
     async def update(self, inter: disnake.MessageInteraction):
         for button in self.buttons:
@@ -309,15 +310,30 @@ class ChampionView(disnake.ui.View):
         self.inter: disnake.MessageCommandInteraction = None
 
     async def get(self) -> Optional["ChampionView"]:
-        if self.champion_id:
-            self.champion = await MerakiChampion(id=self.champion_id).get()
-        elif self.champion_name:
-            self.champion = await MerakiChampion(name=self.champion_name).get()
-        else:
-            return None
-        self.embeds = self.champion.embeds
+        if not self.champion_id and self.champion_name:
+            self.champion_id = ChampionCards.champion_id(self.champion_name)
+        self.embeds = ChampionCards.get(self.champion_id, "overview") if self.champion_id else None
+        if self.embeds is None:
+            if self.champion_id:
+                self.champion = await MerakiChampion(id=self.champion_id).get()
+            elif self.champion_name:
+                self.champion = await MerakiChampion(name=self.champion_name).get()
+            else:
+                return None
+            self.champion_id = self.champion.id
+            self.embeds = await RenderCache.render(self.champion, "overview")
         return self
 
+    async def render(self, tab: str) -> List[disnake.Embed]:
+        """Embeds of a tab, read from the precompiled cards when they have the champion."""
+        embeds = ChampionCards.get(self.champion_id, tab)
+        if embeds is None:
+            if self.champion is None:
+                # Opened from the cards, which do not have this tab (e.g. built before it existed).
+                self.champion = await MerakiChampion(id=self.champion_id).get()
+            embeds = await RenderCache.render(self.champion, tab)
+        return embeds
+
     async def start(self, inter: disnake.ApplicationCommandInteraction):
         self.inter = inter
         self.overview.disabled = True
@@ -340,7 +356,7 @@ class ChampionView(disnake.ui.View):
 
     @disnake.ui.button(label="Overview", row=1)
     async def overview(self, button: disnake.ui.Button, inter: disnake.MessageInteraction):
-        self.embeds = self.champion.embeds
+        self.embeds = await self.render("overview")
         for other_button in self.children:
             other_button.disabled = False
         button.disabled = True
@@ -348,7 +364,7 @@ class ChampionView(disnake.ui.View):
 
     @disnake.ui.button(label="Stats", row=1)
     async def stats(self, button: disnake.ui.Button, inter: disnake.MessageInteraction):
-        self.embeds = self.champion.stats_embed
+        self.embeds = await self.render("stats")
         for other_button in self.children:
             other_button.disabled = False
         button.disabled = True
@@ -356,7 +372,7 @@ class ChampionView(disnake.ui.View):
 
     @disnake.ui.button(label="P", row=2)
     async def passive(self, button: disnake.ui.Button, inter: disnake.MessageInteraction):
-        self.embeds = self.champion.Pembeds
+        self.embeds = await self.render("P")
         for other_button in self.children:
             other_button.disabled = False
         button.disabled = True
@@ -364,7 +380,7 @@ class ChampionView(disnake.ui.View):
 
     @disnake.ui.button(label="Q", row=2)
     async def QSpell(self, button: disnake.ui.Button, inter: disnake.MessageInteraction):
-        self.embeds = self.champion.Qembeds
+        self.embeds = await self.render("Q")
         for other_button in self.children:
             other_button.disabled = False
         button.disabled = True
@@ -372,7 +388,7 @@ class ChampionView(disnake.ui.View):
 
     @disnake.ui.button(label="W", row=2)
     async def WSpell(self, button: disnake.ui.Button, inter: disnake.MessageInteraction):
-        self.embeds = self.champion.Wembeds
+        self.embeds = await self.render("W")
         for other_button in self.children:
             other_button.disabled = False
         button.disabled = True
@@ -380,7 +396,7 @@ class ChampionView(disnake.ui.View):
 
     @disnake.ui.button(label="E", row=2)
     async def ESpell(self, button: disnake.ui.Button, inter: disnake.MessageInteraction):
-        self.embeds = self.champion.Eembeds
+        self.embeds = await self.render("E")
         for other_button in self.children:
             other_button.disabled = False
         button.disabled = True
@@ -388,7 +404,7 @@ class ChampionView(disnake.ui.View):
 
     @disnake.ui.button(label="R", row=2)
     async def RSpell(self, button: disnake.ui.Button, inter: disnake.MessageInteraction):
-        self.embeds = self.champion.Rembeds
+        self.embeds = await self.render("R")
         for other_button in self.children:
             other_button.disabled = False
         button.disabled = True
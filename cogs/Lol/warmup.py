@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Awaitable
+from typing import List
+from typing import Optional
+
+import aiohttp
+from pyot.utils.lol.champion import champion_keys_cache
+
+from .concurrency import gather_bounded
+from .stores import PipelineStore
+from .watcher import Champion
+from .watcher import MerakiChampion
+
+
+class ChampionWarmup:
+    """Prefetch the Meraki and CDragon data of every champion into the pipeline caches.
+
+    The patch is checked against the one of the last warmup: on a new patch the cached champion data is dropped from
+    every cache tier before being prefetched again, so the first commands after a patch do not serve the old one.
+    """
+
+    versions_url: str = "https://ddragon.leagueoflegends.com/api/versions.json"
+    path: str = os.path.join("data", "warmup.json")
+    methods: List[str] = ["meraki_champion_by_key", "cdragon_champion_by_id"]
+    limit: int = int(os.getenv("WARMUP_FANOUT_LIMIT", 8))
+    progress_step: float = 0.25
+
+    patch: Optional[str] = None
+
+    @classmethod
+    async def run(cls) -> None:
+        try:
+            patch = await cls.current_patch()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, IndexError) as e:
+            logging.warning(f"[ChampionWarmup] Failed to get the current patch, skipping the warmup: {e!r}")
+            return
+        if patch == cls.patch:
+            return
+        previous = cls.patch or cls.load()
+        if previous is not None and previous != patch:
+            dropped = 0
+            for store in PipelineStore.stores.get("lol", []):
+                invalidate = getattr(store, "invalidate", None)
+                if invalidate is not None:
+                    dropped += await invalidate(cls.methods)
+            logging.info(f"[ChampionWarmup] Patch {previous} -> {patch}, dropped {dropped} cached champion entries.")
+        await cls.prefetch(patch)
+        cls.patch = patch
+        cls.save(patch)
+
+    @classmethod
+    async def current_patch(cls) -> str:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+            async with session.get(cls.versions_url) as response:
+                response.raise_for_status()
+                return (await response.json(content_type=None))[0]
+
+    @classmethod
+    async def prefetch(cls, patch: str) -> None:
+        ids = list((await champion_keys_cache.data)["name_by_id"].keys())
+        total = len(ids) * len(cls.methods)
+        done = 0
+        next_report = cls.progress_step
+        started = time.perf_counter()
+        logging.info(f"[ChampionWarmup] Prefetching {len(ids)} champions for patch {patch}...")
+
+        async def tracked(aw: Awaitable) -> None:
+            nonlocal done, next_report
+            try:
+                await aw
+            finally:
+                done += 1
+                if done / total >= next_report:
+                    elapsed = time.perf_counter() - started
+                    logging.info(f"[ChampionWarmup] {done}/{total} ({done / total:.0%}) in {elapsed:.1f}s")
+                    next_report += cls.progress_step
+
+        results = await gather_bounded(
+            *[tracked(MerakiChampion(id=id).get()) for id in ids],
+            *[tracked(Champion(id=id).get()) for id in ids],
+            limit=cls.limit,
+        )
+        failed = [result for result in results if isinstance(result, BaseException)]
+        for error in failed[:5]:
+            logging.debug(f"[ChampionWarmup] Prefetch failed: {error!r}")
+        logging.info(
+            f"[ChampionWarmup] Patch {patch} warm in {time.perf_counter() - started:.1f}s "
+            f"({total - len(failed)}/{total} fetched, {len(failed)} failed)."
+        )
+
+    @classmethod
+    def load(cls) -> Optional[str]:
+        try:
+            with open(cls.path, "r", encoding="UTF-8") as f:
+                return json.load(f).get("patch")
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def save(cls, patch: str) -> None:
+        os.makedirs(os.path.dirname(cls.path), exist_ok=True)
+        tmp = cls.path + ".tmp"
+        with open(tmp, "w", encoding="UTF-8") as f:
+            json.dump({"patch": patch, "warmed_at": time.time()}, f)
+        os.replace(tmp, cls.path)
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
-import json
 import logging
 import os
+import time
+from collections import OrderedDict
 from math import ceil
 from time import gmtime
 from time import strftime
@@ -9,9 +10,9 @@ from typing import Dict
 from typing import List
 from typing import Optional
 from typing import Tuple
+from typing import Union
 
 import disnake
-import requests
 from pyot.conf.model import activate_model
 from pyot.conf.model import ModelConf
 from pyot.conf.pipeline import activate_pipeline
@@ -19,6 +20,14 @@ from pyot.conf.pipeline import PipelineConf
 from pyot.core.exceptions import *
 from pyot.utils.lol.champion import *
 
+from .concurrency import gather_bounded
+from .masteries import Mastery
+from .masteries import MasteryIndex
+from .search import normalize
+from .static import StaticData
+from .stores import Freshness
+from bot.executor import RenderExecutor
+from bot.tracing import traced
 from modules.Assets import *
 
 
@@ -30,38 +39,91 @@ class LolModel(ModelConf):
     default_locale = "en_us"
 
 
+FRESHNESS: Dict[str, Freshness] = {
+    "summoner_v4_by_name": Freshness(fresh=10 * 60, stale=24 * 60 * 60, negative=60),
+    "summoner_v4_by_id": Freshness(fresh=60 * 60, stale=7 * 24 * 60 * 60, negative=60),
+    "summoner_v4_by_puuid": Freshness(fresh=60 * 60, stale=7 * 24 * 60 * 60, negative=60),
+    "league_v4_summoner_entries": Freshness(fresh=5 * 60, stale=60 * 60, negative=60),
+    "champion_mastery_v4_all_mastery": Freshness(fresh=30 * 60, stale=24 * 60 * 60, negative=60),
+    "champion_mastery_v4_by_champion_id": Freshness(fresh=30 * 60, stale=24 * 60 * 60, negative=5 * 60),
+    "clash_v1_players_by_summoner_id": Freshness(fresh=5 * 60, stale=30 * 60, negative=60),
+    "clash_v1_teams_by_team_id": Freshness(fresh=5 * 60, stale=30 * 60, negative=60),
+    "clash_v1_tournaments_by_team_id": Freshness(fresh=60 * 60, stale=24 * 60 * 60, negative=60),
+    "spectator_v4_current_game": Freshness(fresh=30, negative=5, persist=False),
+    "meraki_champion_by_key": Freshness(fresh=24 * 60 * 60, stale=7 * 24 * 60 * 60),
+    "cdragon_champion_by_id": Freshness(fresh=24 * 60 * 60, stale=7 * 24 * 60 * 60),
+}
+
+
 @activate_pipeline("lol")
 class LolPipeline(PipelineConf):
     name = "lol_main"
     default = True
     stores = [
         {
-            "backend": "pyot.stores.omnistone.Omnistone",
-            "expirations": {
-                "summoner_v4_by_name": 120,
-                "match_v4_match": 600,
-                "match_v4_timeline": 600,
-            },
-        },
-        {
-            "backend": "pyot.stores.cdragon.CDragon",
-        },
-        {
-            "backend": "pyot.stores.merakicdn.MerakiCDN",
-        },
-        {
-            "backend": "pyot.stores.riotapi.RiotAPI",
-            "api_key": os.getenv("RIOT_APIKEY"),
+            "backend": "cogs.Lol.stores.MemoryCache",
+            "policy": FRESHNESS,
         },
     ]
+    if os.getenv("RIOT_GATEWAY_SOCKET"):
+        # The Riot data gateway process owns the stores below the memory cache, see gateway.py.
+        stores.append(
+            {
+                "backend": "cogs.Lol.gateway.GatewayStore",
+                "path": os.getenv("RIOT_GATEWAY_SOCKET"),
+                "policy": FRESHNESS,
+            }
+        )
+    else:
+        stores += [
+            {
+                "backend": "cogs.Lol.stores.SQLiteCache",
+                "path": os.path.join("data", "cache.sqlite3"),
+                "max_size": int(os.getenv("CACHE_MAX_SIZE", 256 * 1024 * 1024)),
+                "policy": FRESHNESS,
+            },
+            {
+                "backend": "cogs.Lol.stores.SingleFlight",
+                "store": {
+                    "backend": "pyot.stores.cdragon.CDragon",
+                },
+                "policy": FRESHNESS,
+            },
+            {
+                "backend": "cogs.Lol.stores.SingleFlight",
+                "store": {
+                    "backend": "pyot.stores.merakicdn.MerakiCDN",
+                },
+                "policy": FRESHNESS,
+            },
+            {
+                "backend": "cogs.Lol.stores.SingleFlight",
+                "store": {
+                    "backend": "cogs.Lol.scheduler.Scheduler",
+                    "store": {
+                        "backend": "pyot.stores.riotapi.RiotAPI",
+                        "api_key": os.getenv("RIOT_APIKEY"),
+                        "rate_limiter": {
+                            "backend": "cogs.Lol.scheduler.SchedulerLimiter",
+                        },
+                    },
+                    "app_limits": os.getenv("RIOT_APP_RATE_LIMIT", "20:1,100:120"),
+                    "method_limits": {
+                        "summoner_v4_by_name": "1600:60",
+                        "league_v4_summoner_entries": "100:60",
+                        "champion_mastery_v4_by_champion_id": "20000:10",
+                        "champion_mastery_v4_all_mastery": "20000:10",
+                        "spectator_v4_current_game": "20000:10",
+                        "clash_v1_players_by_summoner_id": "20:1",
+                    },
+                },
+                "policy": FRESHNESS,
+            },
+        ]
 
 
 from pyot.models import lol
 
-queuesData: List[dict] = json.loads(requests.get(f"https://static.developer.riotgames.com/docs/lol/queues.json").text)
-
-mapsData: List[dict] = json.loads(requests.get(f"https://static.developer.riotgames.com/docs/lol/maps.json").text)
-
 
 class SummonerLeague(lol.SummonerLeague):
     class Queue:
@@ -75,6 +137,7 @@ class SummonerLeague(lol.SummonerLeague):
         "SILVER",
         "GOLD",
         "PLATINUM",
+        "EMERALD",
         "DIAMOND",
         "MASTER",
         "GRANDMASTER",
@@ -91,7 +154,8 @@ class SummonerLeague(lol.SummonerLeague):
 
     @staticmethod
     def sorting_score(entry: lol.league.SummonerLeagueEntryData):
-        if entry:
+        # A tier or rank Riot adds before it is known here scores like an unranked entry, after the known ones.
+        if entry and entry.tier in SummonerLeague.TIERS and entry.rank in SummonerLeague.RANKS:
             return (
                 SummonerLeague.TIERS.index(entry.tier) * 10000
                 + SummonerLeague.RANKS.index(entry.rank) * 1000
@@ -152,18 +216,74 @@ class ChampionMasteries(lol.ChampionMasteries):
     class Meta(lol.ChampionMasteries.Meta):
         pass
 
+    # Mastery index of the summoners whose full masteries were loaded recently, least recently used first.
+    _recent: "OrderedDict[str, Tuple[MasteryIndex, float]]" = OrderedDict()
+    _recent_max: int = 1000
+    # Champion ids by normalized name and key, and the champion key table they were built from.
+    _id_by_key: Dict[str, int] = {}
+    _id_by_key_source: Optional[dict] = None
+
+    async def get(self, *args, **kwargs) -> "ChampionMasteries":
+        await super().get(*args, **kwargs)
+        self.remember(self.summoner_id, MasteryIndex.from_models(self.masteries))
+        return self
+
     @property
     def summoner(self) -> "Summoner":
         return Summoner(id=self.summoner_id, platform=self.platform)
 
+    @property
+    def index(self) -> MasteryIndex:
+        recent = self._recent.get(self.summoner_id)
+        if recent is not None and time.monotonic() < recent[1]:
+            return recent[0]
+        index = MasteryIndex.from_models(self.masteries)
+        self.remember(self.summoner_id, index)
+        return index
+
     ###########################
 
-    def champion_by_name(self, name: str) -> lol.ChampionMastery:
-        return next((mastery for mastery in self.masteries if mastery.champion.name == name))
+    @classmethod
+    def remember(cls, summoner_id: str, index: MasteryIndex) -> None:
+        """Keep the mastery index of a summoner for as long as the full masteries response is fresh."""
+        fresh = FRESHNESS["champion_mastery_v4_all_mastery"].fresh
+        cls._recent[summoner_id] = (index, time.monotonic() + fresh)
+        cls._recent.move_to_end(summoner_id)
+        while len(cls._recent) > cls._recent_max:
+            cls._recent.popitem(last=False)
+
+    @classmethod
+    async def champion_mastery(cls, summoner_id: str, champion_id: int) -> Union[Mastery, lol.ChampionMastery, None]:
+        """Mastery of a summoner on a champion, None if the summoner never played it.
+
+        Answered from the summoner's mastery index when the full masteries were loaded recently, from the by-champion
+        endpoint otherwise.
+        """
+        recent = cls._recent.get(summoner_id)
+        if recent is not None and time.monotonic() < recent[1]:
+            cls._recent.move_to_end(summoner_id)
+            return recent[0].get(champion_id)
+        try:
+            return await lol.ChampionMastery(summoner_id=summoner_id, champion_id=champion_id).get()
+        except NotFound:
+            return None
 
-    def top(self, n: int = 3) -> List[lol.ChampionMastery]:
-        self.masteries.sort(key=lambda m: (m.champion_level, m.champion_points), reverse=True)
-        return [self.masteries[i] for i in range(min(n, len(self.masteries)))]
+    @classmethod
+    async def champion_ids(cls) -> Dict[str, int]:
+        """Champion ids by normalized name and key ("Kai'Sa", "KaiSa" and "kaisa" all give 145)."""
+        data = await champion_keys_cache.data
+        if data is not cls._id_by_key_source:
+            id_by_key = {normalize(key): id for key, id in data["id_by_key"].items()}
+            id_by_key.update({normalize(name): id for name, id in data["id_by_name"].items()})
+            cls._id_by_key, cls._id_by_key_source = id_by_key, data
+        return cls._id_by_key
+
+    async def champion_by_name(self, name: str) -> Optional[Mastery]:
+        """Mastery on the champion named `name` (name or key, in any case), None if never played or unknown."""
+        return self.index.by_name(name, await self.champion_ids())
+
+    def top(self, n: int = 3) -> List[Mastery]:
+        return self.index.top(n)
 
     def field(self, n: int = 3) -> dict:
         top = self.top(n=n)
@@ -178,11 +298,11 @@ class ChampionMasteries(lol.ChampionMasteries):
         }
 
     @classmethod
-    def champion_to_line(cls, champion: lol.ChampionMastery) -> str:
+    def champion_to_line(cls, champion: Union[Mastery, lol.ChampionMastery]) -> str:
         return f"{Emotes.Lol.MASTERIES[champion.champion_level]} **{Emotes.Lol.Champions.get(champion.champion_id)}** *{cls.champion_points_formatted(champion)}*"
 
     @staticmethod
-    def champion_points_formatted(champion: lol.ChampionMastery) -> str:
+    def champion_points_formatted(champion: Union[Mastery, lol.ChampionMastery]) -> str:
         num = float("{:.3g}".format(champion.champion_points))
         magnitude = 0
         while abs(num) >= 1000:
@@ -208,15 +328,18 @@ class ChampionMasteries(lol.ChampionMasteries):
             return disnake.Colour.blue()
 
     @async_property
+    @traced("masteries")
     async def embeds(self) -> List[disnake.Embed]:
-        sorted_champions = sorted(self.masteries, key=lambda c: (c.champion_level, c.champion_points), reverse=True)
-        blocks: List[List[lol.ChampionMastery]] = [[] for _ in range(7)]
-        for champion in sorted_champions:
-            blocks[-champion.champion_level].append(champion)
+        return [disnake.Embed.from_dict(data) for data in await RenderExecutor.run(self.render_embeds, self.index)]
+
+    @classmethod
+    def render_embeds(cls, index: MasteryIndex) -> List[dict]:
+        """Embed dicts of the masteries by level, run by the `RenderExecutor`."""
+        blocks: List[List[Mastery]] = [index.level(level) for level in range(7, 0, -1)]
         embeds: List[disnake.Embed] = []
         for j, block in enumerate(blocks):
             title = f"{Emotes.Lol.MASTERIES[-(j+1)]} __**Mastery {7-j}**__"
-            color = self.level_to_color(7 - j)
+            color = cls.level_to_color(7 - j)
             text = ""
             for i, champion in enumerate(block):
                 if i != 0 and i % 20 == 0:
@@ -224,10 +347,10 @@ class ChampionMasteries(lol.ChampionMasteries):
                     text = ""
                     title = None
                 text += (
-                    f"{Emotes.Lol.Champions.get(champion.champion_id)} *{self.champion_points_formatted(champion)}*\n"
+                    f"{Emotes.Lol.Champions.get(champion.champion_id)} *{cls.champion_points_formatted(champion)}*\n"
                 )
             embeds.append(disnake.Embed(title=title, description=text, color=color))
-        return embeds
+        return [embed.to_dict() for embed in embeds]
 
 
 class ClashPlayers(lol.ClashPlayers):
@@ -290,21 +413,17 @@ class ClashTeam(lol.ClashTeam):
     def icon_url(self) -> str:
         return self._icon_url + str(self.icon_id) + "/1.png"
 
-    @async_property
-    async def opgg_url(self) -> str:
-        return self._opgg_url + "".join(
-            [(await p.summoner.get()).name.replace(" ", "%20") + "%2C" for p in self.players]
-        )
+    def opgg_url(self, roster: "ClashRoster") -> str:
+        return self._opgg_url + "".join([summoner.name.replace(" ", "%20") + "%2C" for summoner in roster.summoners])
 
-    @async_property
-    async def embed(self) -> disnake.Embed:
+    @traced("clash team")
+    def embed(self, roster: "ClashRoster") -> disnake.Embed:
         description = f"Tier **{Emotes.Lol.Rank.get(self.tier)}**\n\n"
         for player in self.sortedPlayers:
-            summoner = await Summoner(id=player.summoner_id).get()
-            league = await summoner.league_entries.get()
-            description += (
-                f"> {Emotes.Lol.Positions.get(player.position)}{Emotes.Lol.Tier.get(league.first.tier)} {summoner.name}"
-            )
+            summoner = roster.summoner(player.summoner_id)
+            league = roster.league(player.summoner_id)
+            tier = league.first.tier if league and league.first else "UNRANKED"
+            description += f"> {Emotes.Lol.Positions.get(player.position)}{Emotes.Lol.Tier.get(tier)} {summoner.name}"
             if player.role == "CAPTAIN":
                 description += f" {Emotes.Lol.CAPTAIN}"
             description += "\n"
@@ -317,6 +436,37 @@ class ClashTeam(lol.ClashTeam):
         )
 
 
+class ClashRoster:
+    """The summoners and leagues of a clash team's players, fetched concurrently in a single round."""
+
+    def __init__(self, team: ClashTeam):
+        self.team: ClashTeam = team
+        self.summoners: List["Summoner"] = None
+        self.leagues: List[Optional[SummonerLeague]] = None
+
+    async def get(self) -> "ClashRoster":
+        ids = [player.summoner_id for player in self.team.players]
+        responses = await gather_bounded(
+            *[Summoner(id=id, platform=self.team.platform).get() for id in ids],
+            *[SummonerLeague(summoner_id=id, platform=self.team.platform).get() for id in ids],
+        )
+        for summoner in responses[: len(ids)]:
+            if isinstance(summoner, BaseException):
+                raise summoner
+        self.summoners = responses[: len(ids)]
+        self.leagues = [None if isinstance(league, BaseException) else league for league in responses[len(ids) :]]
+        return self
+
+    def summoner(self, summoner_id: str) -> "Summoner":
+        return self.summoners[self._index(summoner_id)]
+
+    def league(self, summoner_id: str) -> Optional[SummonerLeague]:
+        return self.leagues[self._index(summoner_id)]
+
+    def _index(self, summoner_id: str) -> int:
+        return next(i for i, player in enumerate(self.team.players) if player.summoner_id == summoner_id)
+
+
 class ClashTournament(lol.ClashTournament):
     class Meta(lol.ClashTournament.Meta):
         pass
@@ -361,6 +511,7 @@ class Summoner(lol.Summoner):
         return self._opgg_url + self.name.replace(" ", "%20")
 
     @async_property
+    @traced("summoner")
     async def embed(self) -> disnake.Embed:
         championMasteries = await self.champion_masteries.get()
         summonerLeague = await self.league_entries.get()
@@ -747,6 +898,13 @@ class MerakiChampion(lol.MerakiChampion):
     def emote(self) -> str:
         return Emotes.Lol.Champions.get(self.id)
 
+    @classmethod
+    def render_tabs(cls, raw: dict, attributes: List[str]) -> List[List[dict]]:
+        """Embed dicts of the `attributes` (e.g. "stats_embed") of the champion of a raw Meraki response, run by the
+        `RenderExecutor`."""
+        champion = cls.load(raw)
+        return [[embed.to_dict() for embed in getattr(champion, attribute)] for attribute in attributes]
+
 
 class CurrentGame(lol.spectator.CurrentGame):
     class Meta(lol.spectator.CurrentGame.Meta):
@@ -760,22 +918,19 @@ class CurrentGame(lol.spectator.CurrentGame):
 
     @property
     def map_name(self) -> str:
-        map_name = next(
-            (mapData.get("mapName") for mapData in mapsData if mapData.get("mapId") == self.map_id), "UNKNOWN"
-        )
-        if map_name == "UNKNOWN":
+        mapData = StaticData.maps.get(self.map_id)
+        if not mapData:
             logging.warning(f"No map matching id {self.map_id}")
-        return map_name
+            return "UNKNOWN"
+        return mapData.get("mapName")
 
     @property
     def game_name(self) -> str:
-        game_name = next(
-            (queueData.get("description") for queueData in queuesData if queueData.get("queueId") == self.queue_id),
-            "UNKNOWN------",
-        )[:-6]
-        if game_name == "UNKNOWN":
+        queueData = StaticData.queues.get(self.queue_id)
+        if not queueData or not queueData.get("description"):
             logging.warning(f"Game name not found for {self.queue_id}")
-        return game_name
+            return "UNKNOWN"
+        return queueData.get("description")[:-6]
 
     @property
     def map_image(self) -> str:
@@ -796,10 +951,20 @@ class CurrentGame(lol.spectator.CurrentGame):
         ).set_thumbnail(self.map_image)
 
     @async_property
+    @traced("team fields")
     async def team_fields(self) -> List[dict]:
+        participants = [participant for team in self.teams for participant in team.participants]
+        responses = await gather_bounded(
+            *[SummonerLeague(summoner_id=p.summoner_id).get() for p in participants],
+            *[ChampionMasteries.champion_mastery(p.summoner_id, p.champion_id) for p in participants],
+        )
+        leagues = dict(zip([p.summoner_id for p in participants], responses[: len(participants)]))
+        masteries = dict(zip([p.summoner_id for p in participants], responses[len(participants) :]))
         ret: List[dict] = []
         for j, team in enumerate(self.teams):
-            participant_tuples = [await self.participant_lines(p) for p in team.participants]
+            participant_tuples = [
+                self.participant_lines(p, leagues[p.summoner_id], masteries[p.summoner_id]) for p in team.participants
+            ]
             for i in range(len(participant_tuples[0])):
                 ret.append(
                     {
@@ -810,14 +975,23 @@ class CurrentGame(lol.spectator.CurrentGame):
                 )
         return ret
 
-    async def participant_lines(self, participant: lol.spectator.CurrentGameParticipantData) -> Tuple[str, str, str]:
-        league: SummonerLeague = await SummonerLeague(summoner_id=participant.summoner_id).get()
-        championMastery: lol.ChampionMastery = await lol.ChampionMastery(
-            summoner_id=participant.summoner_id, champion_id=participant.champion_id
-        ).get()
+    def participant_lines(
+        self,
+        participant: lol.spectator.CurrentGameParticipantData,
+        league: Union[SummonerLeague, BaseException],
+        championMastery: Union[Mastery, lol.ChampionMastery, None, BaseException],
+    ) -> Tuple[str, str, str]:
+        if isinstance(league, BaseException):
+            logging.debug("No league for %s: %r", participant.summoner_name, league)
+            league = None
+        if isinstance(championMastery, BaseException):
+            logging.debug(
+                "No mastery on %s for %s: %r", participant.champion_id, participant.summoner_name, championMastery
+            )
+            championMastery = None
         return (
             f"{league.short(league.first) if league else Emotes.Lol.Tier.UNRANKED+Emotes.Lol.Rank.NONE} **{participant.summoner_name}**",
-            f"{Emotes.Lol.Champions.get(participant.champion_id)} {Emotes.Lol.MASTERIES[championMastery.champion_level]} ➖ {Emotes.Lol.Runes.Perks.Get(participant.rune_ids[0])}{Emotes.Lol.Runes.Styles.Get(participant.rune_sub_style)}",
+            f"{Emotes.Lol.Champions.get(participant.champion_id)} {Emotes.Lol.MASTERIES[championMastery.champion_level if championMastery else 0]} ➖ {Emotes.Lol.Runes.Perks.Get(participant.rune_ids[0])}{Emotes.Lol.Runes.Styles.Get(participant.rune_sub_style)}",
             f"➖ {Emotes.Lol.SummonerSpells.get(participant.spell_ids[0])}{Emotes.Lol.SummonerSpells.get(participant.spell_ids[1])}",
         )
 
@@ -838,16 +1012,20 @@ class CurrentGame(lol.spectator.CurrentGame):
             "inline": True,
         }
 
+    @traced("participant")
     async def participant_embed(self, participant: lol.spectator.CurrentGameParticipantData) -> disnake.Embed:
+        # The summoner embed loads the full masteries, so the champion's mastery is read from them.
         embed = await (await Summoner(id=participant.summoner_id).get()).embed
         champion = await MerakiChampion(id=participant.champion_id).get()
-        championMastery = await lol.ChampionMastery(
-            summoner_id=participant.summoner_id, champion_id=participant.champion_id
-        ).get()
+        championMastery = await ChampionMasteries.champion_mastery(participant.summoner_id, participant.champion_id)
         embed.set_thumbnail(champion.skins[0].tile_path)
         masteryField: dict = {
             "name": f"{Emotes.Lol.MASTERIES[0]} **MASTERY**",
-            "value": f"> {ChampionMasteries.champion_to_line(championMastery)}",
+            "value": (
+                f"> {ChampionMasteries.champion_to_line(championMastery)}"
+                if championMastery
+                else f"> {Emotes.Lol.MASTERIES[0]} **{Emotes.Lol.Champions.get(participant.champion_id)}** *0*"
+            ),
             "inline": True,
         }
         for field in [self.perks_field(participant.rune_ids), self.spells_field(participant.spell_ids), masteryField]:
@@ -19,10 +19,15 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import logging
 import os
 import platform
+from typing import List
+from typing import Optional
 
 from dotenv import load_dotenv
 
 from bot import Bot
+from bot.cluster import Cluster
+from bot.logs import CompressedRotatingFileHandler
+from bot.logs import setup_logging
 
 
 def addLoggingLevel(levelName: str, levelNum: int, methodName: str = None):
@@ -76,8 +81,8 @@ def addLoggingLevel(levelName: str, levelNum: int, methodName: str = None):
     setattr(logging, methodName, logToRoot)
 
 
-if __name__ == "__main__":
-
+def setup_logs(suffix: str = ""):
+    """Log to the console and, on Linux, to `logs/info{suffix}.log` and `logs/debug{suffix}.log` from a background thread."""
     addLoggingLevel("TRACE", logging.INFO - 5)
 
     logFormatter = logging.Formatter("%(asctime)s [%(threadName)-12.12s] [%(levelname)-5.5s]  %(message)s")
@@ -87,29 +92,73 @@ if __name__ == "__main__":
     consoleHandler = logging.StreamHandler()
     consoleHandler.setFormatter(logFormatter)
     consoleHandler.setLevel(logging.TRACE)
-    rootLogger.addHandler(consoleHandler)
 
+    handlers = [consoleHandler]
     if platform.system() == "Linux":
-        fileInfoHandler = logging.handlers.RotatingFileHandler(
-            filename="logs/info.log", mode="w", encoding="UTF-8", delay=True, backupCount=5
+        maxBytes = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+        fileInfoHandler = CompressedRotatingFileHandler(
+            filename=f"logs/info{suffix}.log", maxBytes=maxBytes, backupCount=5
         )
-        fileDebugHandler = logging.handlers.RotatingFileHandler(
-            filename="logs/debug.log", mode="w", encoding="UTF-8", delay=True, backupCount=5
+        fileDebugHandler = CompressedRotatingFileHandler(
+            filename=f"logs/debug{suffix}.log", maxBytes=maxBytes, backupCount=5
         )
         fileInfoHandler.setFormatter(logFormatter)
         fileInfoHandler.setLevel(logging.TRACE)
         fileInfoHandler.doRollover()
-        rootLogger.addHandler(fileInfoHandler)
+        handlers.append(fileInfoHandler)
         fileDebugHandler.setFormatter(logFormatter)
         fileDebugHandler.setLevel(logging.DEBUG)
         fileDebugHandler.doRollover()
-        rootLogger.addHandler(fileDebugHandler)
+        handlers.append(fileDebugHandler)
 
-    else:
+    logListener = setup_logging(rootLogger, handlers)
+    if platform.system() != "Linux":
         logging.warning("Non Linux system. Log info and debug file won't be available.")
+    return rootLogger, logFormatter, logListener
+
+
+def run(cluster_id: Optional[int] = None, shard_ids: Optional[List[int]] = None, shard_count: Optional[int] = None):
+    """Run the bot with every shard, or as a worker of the cluster."""
+    rootLogger, logFormatter, logListener = setup_logs("" if cluster_id is None else f"-{cluster_id}")
+
+    bot = Bot(
+        logger=rootLogger,
+        logFormatter=logFormatter,
+        cluster_id=cluster_id,
+        shard_ids=shard_ids,
+        shard_count=shard_count,
+    )
+
+    try:
+        bot.run(os.getenv("DISCORD_TOKEN"))
+    finally:
+        logListener.stop()
 
-    load_dotenv()
 
-    bot = Bot(logger=rootLogger, logFormatter=logFormatter)
+def run_gateway(path: str):
+    """Run the Riot data gateway of the cluster."""
+    from cogs.Lol.gateway import RiotGateway
 
-    bot.run(os.getenv("DISCORD_TOKEN"))
+    _, _, logListener = setup_logs("-gateway")
+    try:
+        RiotGateway.serve(path)
+    finally:
+        logListener.stop()
+
+
+if __name__ == "__main__":
+
+    load_dotenv()
+
+    processes = int(os.getenv("CLUSTER_PROCESSES", 1))
+    gateway = os.getenv("RIOT_GATEWAY", "0") != "0"
+    if processes > 1 or gateway:
+        _, _, logListener = setup_logs("-cluster")
+        try:
+            Cluster(
+                run, processes, int(os.getenv("SHARD_COUNT") or 0) or None, run_gateway if gateway else None
+            ).start()
+        finally:
+            logListener.stop()
+    else:
+        run()
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import logging
+from types import MappingProxyType
 from typing import List
+from typing import Mapping
 from typing import Optional
 from typing import Union
 
@@ -111,16 +113,13 @@ class Emotes:
             ABILITYPOWER: str = "<:abilitypower:1010137865545592912>"
             ATTACKDAMAGE: str = "<:attackdamage:1010137867256873040>"
 
+            _by_key: Mapping[str, str] = MappingProxyType(
+                {"MELEE": MELEE, "PHYSICAL": ATTACKDAMAGE, "RANGED": RANGE, "MAGIC": ABILITYPOWER}
+            )
+
             @classmethod
             def get(cls, key: str):
-                if key == "MELEE":
-                    return cls.MELEE
-                elif key == "PHYSICAL":
-                    return cls.ATTACKDAMAGE
-                elif key == "RANGED":
-                    return cls.RANGE
-                elif key == "MAGIC":
-                    return cls.ABILITYPOWER
+                return cls._by_key.get(key)
 
         TROPHIES: List[str] = [
             "<:trophy:1007206322669879326>",
@@ -137,18 +136,23 @@ class Emotes:
             UNIT: str = "<:targetblue:1009110751404892211>"
             SELF: str = "<:selftarget:1012034302176931912>"
 
+            _by_key: Mapping[str, str] = MappingProxyType(
+                {
+                    **dict.fromkeys(["Unit", "Auto", "Varied", "Unit / Location", "Unit / Auto"], UNIT),
+                    **dict.fromkeys(
+                        ["Location", "Location / Auto", "Auto / Location", "Direction / Auto / Location"], LOCATION
+                    ),
+                    **dict.fromkeys(["Direction", "Direction / Auto", "Vector"], DIRECTION),
+                    "Passive": SELF,
+                }
+            )
+
             @classmethod
             def get(cls, key: str):
-                if key in ["Unit", "Auto", "Varied", "Unit / Location", "Unit / Auto"]:
-                    return cls.UNIT
-                elif key in ["Location", "Location / Auto", "Auto / Location", "Direction / Auto / Location"]:
-                    return cls.LOCATION
-                elif key in ["Direction", "Direction / Auto", "Vector"]:
-                    return cls.DIRECTION
-                elif key in ["Passive"]:
-                    return cls.SELF
-                else:
+                emote = cls._by_key.get(key)
+                if emote is None:
                     return "TargetType:" + key
+                return emote
 
         class Honor:
             CHILL: str = "<:chill:1009759448367120405>"
@@ -186,27 +190,13 @@ class Emotes:
             RANKIII: str = "<:TierIII:1013484280363622470>"
             RANKIV: str = "<:TierIV:1013484281613533184>"
 
+            _by_rank: Mapping[Union[int, str], str] = MappingProxyType(
+                {1: RANKI, 2: RANKII, 3: RANKIII, 4: RANKIV, "I": RANKI, "II": RANKII, "III": RANKIII, "IV": RANKIV}
+            )
+
             @classmethod
             def get(cls, rank: Union[int, str]):
-                if isinstance(rank, int):
-                    if rank == 1:
-                        return cls.RANKI
-                    if rank == 2:
-                        return cls.RANKII
-                    if rank == 3:
-                        return cls.RANKIII
-                    if rank == 4:
-                        return cls.RANKIV
-                elif isinstance(rank, str):
-                    if rank == "I":
-                        return cls.RANKI
-                    if rank == "II":
-                        return cls.RANKII
-                    if rank == "III":
-                        return cls.RANKIII
-                    if rank == "IV":
-                        return cls.RANKIV
-                return cls.NONE
+                return cls._by_rank.get(rank, cls.NONE)
 
         class Runes:
             class Styles:
@@ -217,20 +207,13 @@ class Emotes:
                 SORCERY: str = "<:runesorcery:1007206355867811921>"
                 INSPIRATION: str = "<:runewhimsy:1007206353577721886>"
 
+                _by_id: Mapping[int, str] = MappingProxyType(
+                    {8000: PRECISION, 8100: DOMINATION, 8200: SORCERY, 8300: INSPIRATION, 8400: RESOLVE}
+                )
+
                 @classmethod
                 def Get(cls, id: int) -> str:
-                    if id == 8000:
-                        return cls.PRECISION
-                    elif id == 8100:
-                        return cls.DOMINATION
-                    elif id == 8200:
-                        return cls.SORCERY
-                    elif id == 8300:
-                        return cls.INSPIRATION
-                    elif id == 8400:
-                        return cls.RESOLVE
-                    else:
-                        return cls.NONE
+                    return cls._by_id.get(id, cls.NONE)
 
             class Perks:
                 NONE: str = "<:rune:1007206351019180042>"
@@ -307,150 +290,86 @@ class Emotes:
                 ARMOR: str = "<:armor:1009809797614407690>"
                 ABILITYPOWER: str = "<:abilityPower:1009809800579780608>"
 
+                _by_id: Mapping[int, str] = MappingProxyType(
+                    {
+                        5001: HEALT,
+                        5002: ARMOR,
+                        5003: MAGICRESIST,
+                        5005: ATTACKSPEED,
+                        5007: ABILITYHASTE,
+                        5008: ABILITYPOWER,
+                        8005: PRESSTHEATACK,
+                        8008: LETALTEMPO,
+                        8009: PRESENCEOFMIND,
+                        8010: CONQUEROR,
+                        8014: COUPDEGRACE,
+                        8017: CUTDOWN,
+                        8021: FLEETFOOTWORK,
+                        8105: RELENTLESSHUNTER,
+                        8106: ULTIMATEHUNTER,
+                        8112: ELECTROCUTE,
+                        8120: GHOSTPORO,
+                        8124: PREDATOR,
+                        8126: CHEAPSHOT,
+                        8128: DARKHARVEST,
+                        8134: INGENIOUSHUNTER,
+                        8135: TREASUREHUNTER,
+                        8136: ZOMBIEWARD,
+                        8138: EYEBALLCOLLECTION,
+                        8139: TASTEOFBLOOD,
+                        8143: SUDDENIMPACT,
+                        8210: TRANSCENDENCE,
+                        8214: AERY,
+                        8224: POKESHIELD,
+                        8226: MANAFLOWBAND,
+                        8229: COMET,
+                        8230: PHASERUSH,
+                        8232: WATERWALKING,
+                        8233: ABSOLUTEFOCUS,
+                        8234: CELERITYTEMP,
+                        8236: GATHERINGSTORM,
+                        8237: SCORCH,
+                        8242: UNFLINCHING,
+                        8275: NIMBUSCLOAK,
+                        8299: LASTSTAND,
+                        8304: MAGICALFOOTWEAR,
+                        8306: HEXTECHFLASH,
+                        8313: PERFECTTIMING,
+                        8316: MINIONDEMATERIALIZER,
+                        8321: FUTURESMARKET,
+                        8345: BISCUITDELIVERY,
+                        8347: COSMICINSIGHT,
+                        8351: GLACIALAUGMENT,
+                        8360: SPELLBOOK,
+                        8369: FIRSSTRIKE,
+                        8401: SHIELDBASH,
+                        8410: APPROACHVELOCITY,
+                        8352: TIMEWARPTONIC,
+                        8429: CONDITIONING,
+                        8437: GRASP,
+                        8439: AFTERSHOCK,
+                        8444: SECONDWIND,
+                        8446: DEMOLISH,
+                        8451: OVERGROWTH,
+                        8453: REVITALIZE,
+                        8463: FONTOFLIFE,
+                        8465: GUARDIAN,
+                        8473: BONEPLATING,
+                        9101: OVERHEALT,
+                        9103: LEGENDBLOODLINE,
+                        9104: LEGENDALACRITY,
+                        9105: LEGENDTENACITE,
+                        9111: TRIUMPHE,
+                        9923: HAILOFBLADES,
+                    }
+                )
+
                 @classmethod
                 def Get(cls, id: int) -> str:
-                    if id == 5001:
-                        return cls.HEALT
-                    elif id == 5002:
-                        return cls.ARMOR
-                    elif id == 5003:
-                        return cls.MAGICRESIST
-                    elif id == 5005:
-                        return cls.ATTACKSPEED
-                    elif id == 5007:
-                        return cls.ABILITYHASTE
-                    elif id == 5008:
-                        return cls.ABILITYPOWER
-                    elif id == 5008:
-                        return cls.ABILITYPOWER
-
-                    elif id == 8005:
-                        return cls.PRESSTHEATACK
-                    elif id == 8008:
-                        return cls.LETALTEMPO
-                    elif id == 8009:
-                        return cls.PRESENCEOFMIND
-                    elif id == 8010:
-                        return cls.CONQUEROR
-                    elif id == 8014:
-                        return cls.COUPDEGRACE
-                    elif id == 8017:
-                        return cls.CUTDOWN
-                    elif id == 8021:
-                        return cls.FLEETFOOTWORK
-                    elif id == 8105:
-                        return cls.RELENTLESSHUNTER
-                    elif id == 8106:
-                        return cls.ULTIMATEHUNTER
-                    elif id == 8112:
-                        return cls.ELECTROCUTE
-                    elif id == 8120:
-                        return cls.GHOSTPORO
-                    elif id == 8124:
-                        return cls.PREDATOR
-                    elif id == 8126:
-                        return cls.CHEAPSHOT
-                    elif id == 8128:
-                        return cls.DARKHARVEST
-                    elif id == 8134:
-                        return cls.INGENIOUSHUNTER
-                    elif id == 8135:
-                        return cls.TREASUREHUNTER
-                    elif id == 8136:
-                        return cls.ZOMBIEWARD
-                    elif id == 8138:
-                        return cls.EYEBALLCOLLECTION
-                    elif id == 8139:
-                        return cls.TASTEOFBLOOD
-                    elif id == 8143:
-                        return cls.SUDDENIMPACT
-                    elif id == 8210:
-                        return cls.TRANSCENDENCE
-                    elif id == 8214:
-                        return cls.AERY
-                    elif id == 8224:
-                        return cls.POKESHIELD
-                    elif id == 8226:
-                        return cls.MANAFLOWBAND
-                    elif id == 8229:
-                        return cls.COMET
-                    elif id == 8230:
-                        return cls.PHASERUSH
-                    elif id == 8232:
-                        return cls.WATERWALKING
-                    elif id == 8233:
-                        return cls.ABSOLUTEFOCUS
-                    elif id == 8234:
-                        return cls.CELERITYTEMP
-                    elif id == 8236:
-                        return cls.GATHERINGSTORM
-                    elif id == 8237:
-                        return cls.SCORCH
-                    elif id == 8242:
-                        return cls.UNFLINCHING
-                    elif id == 8275:
-                        return cls.NIMBUSCLOAK
-                    elif id == 8299:
-                        return cls.LASTSTAND
-                    elif id == 8304:
-                        return cls.MAGICALFOOTWEAR
-                    elif id == 8306:
-                        return cls.HEXTECHFLASH
-                    elif id == 8313:
-                        return cls.PERFECTTIMING
-                    elif id == 8316:
-                        return cls.MINIONDEMATERIALIZER
-                    elif id == 8321:
-                        return cls.FUTURESMARKET
-                    elif id == 8345:
-                        return cls.BISCUITDELIVERY
-                    elif id == 8347:
-                        return cls.COSMICINSIGHT
-                    elif id == 8351:
-                        return cls.GLACIALAUGMENT
-                    elif id == 8360:
-                        return cls.SPELLBOOK
-                    elif id == 8369:
-                        return cls.FIRSSTRIKE
-                    elif id == 8401:
-                        return cls.SHIELDBASH
-                    elif id == 8410:
-                        return cls.APPROACHVELOCITY
-                    elif id == 8352:
-                        return cls.TIMEWARPTONIC
-                    elif id == 8429:
-                        return cls.CONDITIONING
-                    elif id == 8437:
-                        return cls.GRASP
-                    elif id == 8439:
-                        return cls.AFTERSHOCK
-                    elif id == 8444:
-                        return cls.SECONDWIND
-                    elif id == 8446:
-                        return cls.DEMOLISH
-                    elif id == 8451:
-                        return cls.OVERGROWTH
-                    elif id == 8453:
-                        return cls.REVITALIZE
-                    elif id == 8463:
-                        return cls.FONTOFLIFE
-                    elif id == 8465:
-                        return cls.GUARDIAN
-                    elif id == 8473:
-                        return cls.BONEPLATING
-                    elif id == 9101:
-                        return cls.OVERHEALT
-                    elif id == 9103:
-                        return cls.LEGENDBLOODLINE
-                    elif id == 9104:
-                        return cls.LEGENDALACRITY
-                    elif id == 9105:
-                        return cls.LEGENDTENACITE
-                    elif id == 9111:
-                        return cls.TRIUMPHE
-                    elif id == 9923:
-                        return cls.HAILOFBLADES
-                    return f"Perks:{id}"
+                    emote = cls._by_id.get(id)
+                    if emote is None:
+                        return f"Perks:{id}"
+                    return emote
 
         class Positions:
             UNSELECTED: str = "<:unselected:1007994502318923896>"
@@ -461,24 +380,21 @@ class Emotes:
             UTILITY: str = "<:support:1007994494744002631>"
             FILL: str = "<:fill:1007994493250850897>"
 
+            _by_key: Mapping[str, str] = MappingProxyType(
+                {
+                    "UNSELECTED": UNSELECTED,
+                    "TOP": TOP,
+                    "JUNGLE": JUNGLE,
+                    "MIDDLE": MIDDLE,
+                    "BOTTOM": BOTTOM,
+                    "UTILITY": UTILITY,
+                    "FILL": FILL,
+                }
+            )
+
             @classmethod
             def get(cls, key: str) -> Optional[str]:
-                if key == "UNSELECTED":
-                    return cls.UNSELECTED
-                elif key == "TOP":
-                    return cls.TOP
-                elif key == "JUNGLE":
-                    return cls.JUNGLE
-                elif key == "MIDDLE":
-                    return cls.MIDDLE
-                elif key == "BOTTOM":
-                    return cls.BOTTOM
-                elif key == "UTILITY":
-                    return cls.UTILITY
-                elif key == "FILL":
-                    return cls.FILL
-                else:
-                    return None
+                return cls._by_key.get(key)
 
         class Roles:
             ADC: str = "<:adc:1009110682639290380>"
@@ -488,22 +404,20 @@ class Emotes:
             SUPPORT: str = "<:support:1009110748523413556>"
             TANK: str = "<:tank:1009110749727162401>"
 
+            _by_id: Mapping[str, str] = MappingProxyType(
+                {
+                    "FIGHTER": FIGHTER,
+                    "TANK": TANK,
+                    "ASSASSIN": ASSASSIN,
+                    "MARKSMAN": ADC,
+                    "MAGE": MAGE,
+                    "SUPPORT": SUPPORT,
+                }
+            )
+
             @classmethod
             def get(cls, id: str):
-                if id == "FIGHTER":
-                    return cls.FIGHTER
-                elif id == "TANK":
-                    return cls.TANK
-                elif id == "ASSASSIN":
-                    return cls.ASSASSIN
-                elif id == "MARKSMAN":
-                    return cls.ADC
-                elif id == "MAGE":
-                    return cls.MAGE
-                elif id == "SUPPORT":
-                    return cls.SUPPORT
-                else:
-                    return ""
+                return cls._by_id.get(id, "")
 
         class Drakes:
             CHEMTECH: str = "<:chemtechdrake:1009110685256515705>"
@@ -534,24 +448,24 @@ class Emotes:
             HEALT: str = "<:healt:1009809788194013334>"
             MANA: str = "💧"
 
+            _by_ressource: Mapping[str, str] = MappingProxyType(
+                {
+                    "MANA": MANA,
+                    "MANA_PER_SECOND": MANA,
+                    "GRIT": ARMOR,
+                    "OTHER": MANA,
+                    "CHARGE": ABILITYPOWER,
+                    "ENERGY": MANA,
+                    "CURRENT_HEALTH": HEALT,
+                    "HEALTH": HEALT,
+                    "MAXIMUM_HEALTH": HEALT,
+                    "FURY": ARMORPEN,
+                }
+            )
+
             @classmethod
             def Ressource(cls, id: str):
-                if id == "MANA" or id == "MANA_PER_SECOND":
-                    return cls.MANA
-                elif id == "GRIT":
-                    return cls.ARMOR
-                elif id == "OTHER":
-                    return cls.MANA
-                elif id == "CHARGE":
-                    return cls.ABILITYPOWER
-                elif id == "ENERGY":
-                    return cls.MANA
-                elif id == "CURRENT_HEALTH" or id == "HEALTH" or id == "MAXIMUM_HEALTH":
-                    return cls.HEALT
-                elif id == "FURY":
-                    return cls.ARMORPEN
-                else:
-                    return ""
+                return cls._by_ressource.get(id, "")
 
         class SummonerSpells:
             NONE: str = "<:summonerSpell:1009110747214774402>"
@@ -570,42 +484,33 @@ class Emotes:
             IGNITE: str = "<:ignite:1009826791856287795>"
             BARRIER: str = "<:barrier:1009826789788487680>"
 
+            _by_id: Mapping[int, str] = MappingProxyType(
+                {
+                    1: CLEANSE,
+                    3: EXHAUSTE,
+                    4: FLASH,
+                    6: GHOST,
+                    7: HEALT,
+                    11: SMITE,
+                    12: TELEPORTATION,
+                    13: CLARITY,
+                    14: IGNITE,
+                    21: BARRIER,
+                    30: NONE,  # PoroKingDash
+                    31: NONE,  # PoroMark
+                    32: MARK,
+                    39: NONE,  # UrfMark
+                    54: NONE,  # UltBook
+                    55: NONE,  # UtlBookSmite
+                }
+            )
+
             @classmethod
             def get(cls, id: int):
-                if id == 1:
-                    return cls.CLEANSE
-                elif id == 3:
-                    return cls.EXHAUSTE
-                elif id == 4:
-                    return cls.FLASH
-                elif id == 6:
-                    return cls.GHOST
-                elif id == 7:
-                    return cls.HEALT
-                elif id == 11:
-                    return cls.SMITE
-                elif id == 12:
-                    return cls.TELEPORTATION
-                elif id == 13:
-                    return cls.CLARITY
-                elif id == 14:
-                    return cls.IGNITE
-                elif id == 21:
-                    return cls.BARRIER
-                elif id == 30:
-                    return cls.NONE  # PoroKingDash
-                elif id == 31:
-                    return cls.NONE  # PoroMark
-                elif id == 32:
-                    return cls.MARK
-                elif id == 39:
-                    return cls.NONE  # UrfMark
-                elif id == 54:
-                    return cls.NONE  # UltBook
-                elif id == 55:
-                    return cls.NONE  # UtlBookSmite
-                else:
+                emote = cls._by_id.get(id)
+                if emote is None:
                     return f"SumSpell:{id}"
+                return emote
 
         class Tier:
             NONE: str = "<:rankedemblem:1007206349509242880>"
@@ -621,33 +526,28 @@ class Emotes:
             GRANDMASTER: str = "<:grandmaster:1007976690078732348>"
             CHALLENGER: str = "<:challenger:1007976687948009544>"
 
+            _by_key: Mapping[str, str] = MappingProxyType(
+                {
+                    "NONE": NONE,
+                    "UNRANKED": UNRANKED,
+                    "IRON": IRON,
+                    "BRONZE": BRONZE,
+                    "SILVER": SILVER,
+                    "GOLD": GOLD,
+                    "PLATINUM": PLATINUM,
+                    "DIAMOND": DIAMOND,
+                    "MASTER": MASTER,
+                    "GRANDMASTER": GRANDMASTER,
+                    "CHALLENGER": CHALLENGER,
+                }
+            )
+
             @classmethod
             def get(cls, key: str) -> Optional[str]:
-                if key == "NONE":
-                    return cls.NONE
-                elif key == "UNRANKED":
-                    return cls.UNRANKED
-                elif key == "IRON":
-                    return cls.IRON
-                elif key == "BRONZE":
-                    return cls.BRONZE
-                elif key == "SILVER":
-                    return cls.SILVER
-                elif key == "GOLD":
-                    return cls.GOLD
-                elif key == "PLATINUM":
-                    return cls.PLATINUM
-                elif key == "DIAMOND":
-                    return cls.DIAMOND
-                elif key == "MASTER":
-                    return cls.MASTER
-                elif key == "GRANDMASTER":
-                    return cls.GRANDMASTER
-                elif key == "CHALLENGER":
-                    return cls.CHALLENGER
-                else:
+                emote = cls._by_key.get(key)
+                if emote is None:
                     logging.warning(f"Tier not found for {key = }")
-                    return None
+                return emote
 
         class Champions:
             NONE: str = "<:None:1009838143974944852>"
@@ -815,173 +715,178 @@ class Emotes:
             URGOT: str = "<:Urgot:1009839101983330344>"
             XINZHAO: str = "<:XinZhao:1009842143143149609>"
 
+            _by_id: Mapping[int, str] = MappingProxyType(
+                {
+                    266: AATROX,
+                    103: AHRI,
+                    84: AKALI,
+                    166: AKSHAN,
+                    12: ALISTAR,
+                    32: AMUMU,
+                    34: ANIVIA,
+                    1: ANNIE,
+                    523: APHELIOS,
+                    22: ASHE,
+                    136: AURELIONSOL,
+                    268: AZIR,
+                    432: BARD,
+                    200: BELVETH,
+                    53: BLITZCRANK,
+                    63: BRAND,
+                    201: BRAUM,
+                    51: CAITLYN,
+                    164: CAMILLE,
+                    69: CASSIOPEIA,
+                    31: CHOGATH,
+                    42: CORKI,
+                    122: DARIUS,
+                    131: DIANA,
+                    119: DRAVEN,
+                    36: DRMUNDO,
+                    245: EKKO,
+                    60: ELISE,
+                    28: EVELYNN,
+                    81: EZREAL,
+                    9: FIDDLESTICKS,
+                    114: FIORA,
+                    105: FIZZ,
+                    3: GALIO,
+                    41: GANGPLANK,
+                    86: GAREN,
+                    150: GNAR,
+                    79: GRAGAS,
+                    104: GRAVES,
+                    887: GWEN,
+                    120: HECARIM,
+                    74: HEIMERDINGER,
+                    420: ILLAOI,
+                    39: IRELIA,
+                    427: IVERN,
+                    40: JANNA,
+                    59: JARVANIV,
+                    24: JAX,
+                    126: JAYCE,
+                    202: JHIN,
+                    222: JINX,
+                    145: KAISA,
+                    429: KALISTA,
+                    43: KARMA,
+                    30: KARTHUS,
+                    38: KASSADIN,
+                    55: KATARINA,
+                    10: KAYLE,
+                    141: KAYN,
+                    85: KENNEN,
+                    121: KHAZIX,
+                    203: KINDRED,
+                    240: KLED,
+                    96: KOGMAW,
+                    7: LEBLANC,
+                    64: LEESIN,
+                    89: LEONA,
+                    876: LILLIA,
+                    127: LISSANDRA,
+                    236: LUCIAN,
+                    117: LULU,
+                    99: LUX,
+                    54: MALPHITE,
+                    90: MALZAHAR,
+                    57: MAOKAI,
+                    11: MASTERYI,
+                    21: MISSFORTUNE,
+                    62: WUKONG,
+                    82: MORDEKAISER,
+                    25: MORGANA,
+                    267: NAMI,
+                    75: NASUS,
+                    111: NAUTILUS,
+                    518: NEEKO,
+                    76: NIDALEE,
+                    895: NILAH,
+                    56: NOCTURNE,
+                    20: NUNU,
+                    2: OLAF,
+                    61: ORIANNA,
+                    516: ORNN,
+                    80: PANTHEON,
+                    78: POPPY,
+                    555: PYKE,
+                    246: QIYANA,
+                    133: QUINN,
+                    497: RAKAN,
+                    33: RAMMUS,
+                    421: REKSAI,
+                    526: RELL,
+                    888: RENATA,
+                    58: RENEKTON,
+                    107: RENGAR,
+                    92: RIVEN,
+                    68: RUMBLE,
+                    13: RYZE,
+                    360: SAMIRA,
+                    113: SEJUANI,
+                    235: SENNA,
+                    147: SERAPHINE,
+                    875: SETT,
+                    35: SHACO,
+                    98: SHEN,
+                    102: SHYVANA,
+                    27: SINGED,
+                    14: SION,
+                    15: SIVIR,
+                    72: SKARNER,
+                    37: SONA,
+                    16: SORAKA,
+                    50: SWAIN,
+                    517: SYLAS,
+                    134: SYNDRA,
+                    223: TAHMKENCH,
+                    163: TALIYAH,
+                    91: TALON,
+                    44: TARIC,
+                    17: TEEMO,
+                    412: THRESH,
+                    18: TRISTANA,
+                    48: TRUNDLE,
+                    23: TRYNDAMERE,
+                    4: TWISTEDFATE,
+                    29: TWITCH,
+                    77: UDYR,
+                    6: URGOT,
+                    110: VARUS,
+                    67: VAYNE,
+                    45: VEIGAR,
+                    161: VELKOZ,
+                    711: VEX,
+                    254: VI,
+                    234: VIEGO,
+                    112: VIKTOR,
+                    8: VLADIMIR,
+                    106: VOLIBEAR,
+                    19: WARWICK,
+                    498: XAYAH,
+                    101: XERATH,
+                    5: XINZHAO,
+                    157: YASUO,
+                    777: YONE,
+                    83: YORICK,
+                    350: YUUMI,
+                    154: ZAC,
+                    238: ZED,
+                    221: ZERI,
+                    115: ZIGGS,
+                    26: ZILEAN,
+                    142: ZOE,
+                    143: ZYRA,
+                }
+            )
+
             @classmethod
             def get(cls, id: Union[str, int]):
-                map = {
-                    "266": cls.AATROX,
-                    "103": cls.AHRI,
-                    "84": cls.AKALI,
-                    "166": cls.AKSHAN,
-                    "12": cls.ALISTAR,
-                    "32": cls.AMUMU,
-                    "34": cls.ANIVIA,
-                    "1": cls.ANNIE,
-                    "523": cls.APHELIOS,
-                    "22": cls.ASHE,
-                    "136": cls.AURELIONSOL,
-                    "268": cls.AZIR,
-                    "432": cls.BARD,
-                    "200": cls.BELVETH,
-                    "53": cls.BLITZCRANK,
-                    "63": cls.BRAND,
-                    "201": cls.BRAUM,
-                    "51": cls.CAITLYN,
-                    "164": cls.CAMILLE,
-                    "69": cls.CASSIOPEIA,
-                    "31": cls.CHOGATH,
-                    "42": cls.CORKI,
-                    "122": cls.DARIUS,
-                    "131": cls.DIANA,
-                    "119": cls.DRAVEN,
-                    "36": cls.DRMUNDO,
-                    "245": cls.EKKO,
-                    "60": cls.ELISE,
-                    "28": cls.EVELYNN,
-                    "81": cls.EZREAL,
-                    "9": cls.FIDDLESTICKS,
-                    "114": cls.FIORA,
-                    "105": cls.FIZZ,
-                    "3": cls.GALIO,
-                    "41": cls.GANGPLANK,
-                    "86": cls.GAREN,
-                    "150": cls.GNAR,
-                    "79": cls.GRAGAS,
-                    "104": cls.GRAVES,
-                    "887": cls.GWEN,
-                    "120": cls.HECARIM,
-                    "74": cls.HEIMERDINGER,
-                    "420": cls.ILLAOI,
-                    "39": cls.IRELIA,
-                    "427": cls.IVERN,
-                    "40": cls.JANNA,
-                    "59": cls.JARVANIV,
-                    "24": cls.JAX,
-                    "126": cls.JAYCE,
-                    "202": cls.JHIN,
-                    "222": cls.JINX,
-                    "145": cls.KAISA,
-                    "429": cls.KALISTA,
-                    "43": cls.KARMA,
-                    "30": cls.KARTHUS,
-                    "38": cls.KASSADIN,
-                    "55": cls.KATARINA,
-                    "10": cls.KAYLE,
-                    "141": cls.KAYN,
-                    "85": cls.KENNEN,
-                    "121": cls.KHAZIX,
-                    "203": cls.KINDRED,
-                    "240": cls.KLED,
-                    "96": cls.KOGMAW,
-                    "7": cls.LEBLANC,
-                    "64": cls.LEESIN,
-                    "89": cls.LEONA,
-                    "876": cls.LILLIA,
-                    "127": cls.LISSANDRA,
-                    "236": cls.LUCIAN,
-                    "117": cls.LULU,
-                    "99": cls.LUX,
-                    "54": cls.MALPHITE,
-                    "90": cls.MALZAHAR,
-                    "57": cls.MAOKAI,
-                    "11": cls.MASTERYI,
-                    "21": cls.MISSFORTUNE,
-                    "62": cls.WUKONG,
-                    "82": cls.MORDEKAISER,
-                    "25": cls.MORGANA,
-                    "267": cls.NAMI,
-                    "75": cls.NASUS,
-                    "111": cls.NAUTILUS,
-                    "518": cls.NEEKO,
-                    "76": cls.NIDALEE,
-                    "895": cls.NILAH,
-                    "56": cls.NOCTURNE,
-                    "20": cls.NUNU,
-                    "2": cls.OLAF,
-                    "61": cls.ORIANNA,
-                    "516": cls.ORNN,
-                    "80": cls.PANTHEON,
-                    "78": cls.POPPY,
-                    "555": cls.PYKE,
-                    "246": cls.QIYANA,
-                    "133": cls.QUINN,
-                    "497": cls.RAKAN,
-                    "33": cls.RAMMUS,
-                    "421": cls.REKSAI,
-                    "526": cls.RELL,
-                    "888": cls.RENATA,
-                    "58": cls.RENEKTON,
-                    "107": cls.RENGAR,
-                    "92": cls.RIVEN,
-                    "68": cls.RUMBLE,
-                    "13": cls.RYZE,
-                    "360": cls.SAMIRA,
-                    "113": cls.SEJUANI,
-                    "235": cls.SENNA,
-                    "147": cls.SERAPHINE,
-                    "875": cls.SETT,
-                    "35": cls.SHACO,
-                    "98": cls.SHEN,
-                    "102": cls.SHYVANA,
-                    "27": cls.SINGED,
-                    "14": cls.SION,
-                    "15": cls.SIVIR,
-                    "72": cls.SKARNER,
-                    "37": cls.SONA,
-                    "16": cls.SORAKA,
-                    "50": cls.SWAIN,
-                    "517": cls.SYLAS,
-                    "134": cls.SYNDRA,
-                    "223": cls.TAHMKENCH,
-                    "163": cls.TALIYAH,
-                    "91": cls.TALON,
-                    "44": cls.TARIC,
-                    "17": cls.TEEMO,
-                    "412": cls.THRESH,
-                    "18": cls.TRISTANA,
-                    "48": cls.TRUNDLE,
-                    "23": cls.TRYNDAMERE,
-                    "4": cls.TWISTEDFATE,
-                    "29": cls.TWITCH,
-                    "77": cls.UDYR,
-                    "6": cls.URGOT,
-                    "110": cls.VARUS,
-                    "67": cls.VAYNE,
-                    "45": cls.VEIGAR,
-                    "161": cls.VELKOZ,
-                    "711": cls.VEX,
-                    "254": cls.VI,
-                    "234": cls.VIEGO,
-                    "112": cls.VIKTOR,
-                    "8": cls.VLADIMIR,
-                    "106": cls.VOLIBEAR,
-                    "19": cls.WARWICK,
-                    "498": cls.XAYAH,
-                    "101": cls.XERATH,
-                    "5": cls.XINZHAO,
-                    "157": cls.YASUO,
-                    "777": cls.YONE,
-                    "83": cls.YORICK,
-                    "350": cls.YUUMI,
-                    "154": cls.ZAC,
-                    "238": cls.ZED,
-                    "221": cls.ZERI,
-                    "115": cls.ZIGGS,
-                    "26": cls.ZILEAN,
-                    "142": cls.ZOE,
-                    "143": cls.ZYRA,
-                }
-                id = str(id)
-                return map.get(str(id), cls.NONE)
+                try:
+                    return cls._by_id.get(int(id), cls.NONE)
+                except (TypeError, ValueError):
+                    return cls.NONE
 
         @classmethod
         def get(cls, position: str, rank: str) -> Optional[tuple[str, str]]: